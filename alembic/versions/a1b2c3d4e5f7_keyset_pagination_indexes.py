@@ -0,0 +1,63 @@
+"""keyset pagination indexes for service_requests
+
+Revision ID: a1b2c3d4e5f7
+Revises: e9f0a1b2c3d4
+Create Date: 2026-10-18 00:00:00.000000
+
+Keyset-пагинация сортирует по (created_at DESC, id DESC). Индексы из
+c7d8e9f0a1b2 покрывают /my, /queue и /requests?status=...; здесь
+добавляем недостающие под seek-доступ:
+    - /requests без фильтров → ix_service_requests_created_at_id
+    - /assigned-to-me       → ix_service_requests_assignee_created_at
+      (ix_service_requests_assignee_status не даёт порядка по created_at)
+
+Индексы строятся CONCURRENTLY вне транзакции миграции: service_requests —
+горячая таблица, обычный CREATE INDEX держал бы SHARE-лок на запись всё
+время построения. IF [NOT] EXISTS делает шаг повторяемым после сбоя.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "a1b2c3d4e5f7"
+down_revision: Union[str, Sequence[str], None] = "e9f0a1b2c3d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_service_requests_created_at_id",
+            "service_requests",
+            [sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_service_requests_assignee_created_at",
+            "service_requests",
+            ["assigned_to_user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_service_requests_assignee_created_at",
+            table_name="service_requests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_service_requests_created_at_id",
+            table_name="service_requests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,54 @@
+"""request_counters table (denormalized per-status / per-assignee counts)
+
+Revision ID: b2c3d4e5f6a8
+Revises: a1b2c3d4e5f7
+Create Date: 2026-10-18 00:10:00.000000
+
+Счётчики для /queue, /assigned-to-me, /my и фильтра по статусу.
+Сразу заполняем по текущим данным — дальше их двигает сервисный слой
+в транзакции бизнес-операции, а воркер периодически сверяет.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "b2c3d4e5f6a8"
+down_revision: Union[str, Sequence[str], None] = "a1b2c3d4e5f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_counters",
+        sa.Column("scope", sa.String(length=20), nullable=False),
+        sa.Column("scope_key", sa.String(length=64), nullable=False),
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("scope", "scope_key", "slot", name="pk_request_counters"),
+    )
+    op.execute(
+        """
+        INSERT INTO request_counters (scope, scope_key, slot, value)
+        SELECT 'all', '', 0, count(*) FROM service_requests
+        UNION ALL
+        SELECT 'status', status::text, 0, count(*) FROM service_requests GROUP BY status
+        UNION ALL
+        SELECT 'creator', created_by_user_id::text, 0, count(*)
+        FROM service_requests GROUP BY created_by_user_id
+        UNION ALL
+        SELECT 'assignee', assigned_to_user_id::text, 0, count(*)
+        FROM service_requests WHERE assigned_to_user_id IS NOT NULL GROUP BY assigned_to_user_id
+        UNION ALL
+        SELECT 'queue', '', 0, count(*)
+        FROM service_requests WHERE status = 'NEW' AND assigned_to_user_id IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("request_counters")
@@ -0,0 +1,84 @@
+"""outbox retries: attempts / next_attempt_at / last_error + dead letters
+
+Revision ID: c3d4e5f6a7b9
+Revises: b2c3d4e5f6a8
+Create Date: 2026-10-18 00:20:00.000000
+
+Сбой публикации больше не откатывает всю пачку: событие откладывается
+до next_attempt_at с экспоненциальным backoff, а после
+OUTBOX_MAX_ATTEMPTS попыток переносится в outbox_dead_letters.
+
+ix_outbox_events_pending пересоздаётся с next_attempt_at в ключе —
+отложенные события отсекаются прямо по индексу. Новый
+ix_outbox_events_retrying_request покрывает только отложенные события:
+по нему fetch_pending проверяет, не ждёт ли ретрая более раннее событие
+той же заявки.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "c3d4e5f6a7b9"
+down_revision: Union[str, Sequence[str], None] = "b2c3d4e5f6a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOT NULL + константный DEFAULT в PG 11+ — только метаданные, без переписывания таблицы.
+    op.add_column(
+        "outbox_events",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("outbox_events", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+    op.add_column("outbox_events", sa.Column("last_error", sa.Text(), nullable=True))
+
+    op.drop_index("ix_outbox_events_pending", table_name="outbox_events")
+    op.create_index(
+        "ix_outbox_events_pending",
+        "outbox_events",
+        ["created_at", "next_attempt_at"],
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+    op.create_index(
+        "ix_outbox_events_retrying_request",
+        "outbox_events",
+        [sa.text("(payload ->> 'request_id')"), "created_at"],
+        postgresql_where=sa.text("processed_at IS NULL AND next_attempt_at IS NOT NULL"),
+    )
+
+    op.create_table(
+        "outbox_dead_letters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=100), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("failed_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_outbox_dead_letters_event_id", "outbox_dead_letters", ["event_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_dead_letters_event_id", table_name="outbox_dead_letters")
+    op.drop_table("outbox_dead_letters")
+
+    op.drop_index("ix_outbox_events_retrying_request", table_name="outbox_events")
+    op.drop_index("ix_outbox_events_pending", table_name="outbox_events")
+    op.create_index(
+        "ix_outbox_events_pending",
+        "outbox_events",
+        ["created_at"],
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+
+    op.drop_column("outbox_events", "last_error")
+    op.drop_column("outbox_events", "next_attempt_at")
+    op.drop_column("outbox_events", "attempts")
@@ -0,0 +1,148 @@
+"""partition outbox_events by created_at
+
+Revision ID: d4e5f6a7b8c0
+Revises: c3d4e5f6a7b9
+Create Date: 2026-10-18 00:30:00.000000
+
+Обработанные события копились бесконечно: таблица и частичный индекс
+росли, vacuum замедлялся. Теперь outbox_events — RANGE-партиционированная
+по created_at таблица; воркер создаёт партиции вперёд и DROP'ает
+партиции старше OUTBOX_RETENTION_DAYS (см. app.database.partitioning).
+
+Конвертация онлайн, без переписывания данных:
+    1. Заранее и без блокировки записи, каждый шаг — своей транзакцией:
+       уникальный индекс (id, created_at) CONCURRENTLY; CHECK (created_at <
+       cutover) NOT VALID — мгновенный ACCESS EXCLUSIVE под lock_timeout;
+       VALIDATE — скан под SHARE UPDATE EXCLUSIVE, чтение и запись идут.
+    2. Короткая транзакция, lock_timeout — первой командой: старая таблица
+       переименовывается в outbox_events_legacy, создаётся партиционированный
+       родитель и legacy цепляется к нему партицией [MINVALUE, cutover).
+       PK legacy переезжает на готовый индекс (id, created_at) через
+       USING INDEX. Валидный CHECK и готовые индексы избавляют ATTACH от
+       скана и перестроения индексов.
+    3. Дневные партиции на несколько дней вперёд и DEFAULT-партиция
+       на случай, если воркер не успел создать нужную.
+
+cutover — полночь (UTC) следующего дня. Legacy-партиция удаляется
+воркером целиком, когда все её события обработаны и старше окна хранения.
+При недельном интервале (OUTBOX_PARTITION_INTERVAL=week) события между
+последней дневной партицией и началом первой недельной попадают в DEFAULT
+и вычищаются оттуда по тому же окну хранения.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "d4e5f6a7b8c0"
+down_revision: Union[str, Sequence[str], None] = "c3d4e5f6a7b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = (
+    "ix_outbox_events_event_type",
+    "ix_outbox_events_pending",
+    "ix_outbox_events_retrying_request",
+)
+_DAYS_AHEAD = 3
+_LOCK_TIMEOUT = "10s"
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_outbox_events_event_type", "outbox_events", ["event_type"])
+    op.create_index(
+        "ix_outbox_events_pending",
+        "outbox_events",
+        ["created_at", "next_attempt_at"],
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+    op.create_index(
+        "ix_outbox_events_retrying_request",
+        "outbox_events",
+        [sa.text("(payload ->> 'request_id')"), "created_at"],
+        postgresql_where=sa.text("processed_at IS NULL AND next_attempt_at IS NOT NULL"),
+    )
+
+
+def upgrade() -> None:
+    cutover = (datetime.utcnow() + timedelta(days=1)).date()
+
+    # --- 1. подготовка без блокировки записи ---
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS outbox_events_legacy_id_created_at "
+            "ON outbox_events (id, created_at)"
+        )
+        # NOT VALID держит ACCESS EXCLUSIVE мгновение, но в очереди за длинной
+        # транзакцией остановил бы весь трафик — поэтому lock_timeout.
+        op.execute(f"SET lock_timeout = '{_LOCK_TIMEOUT}'")
+        op.execute(
+            "ALTER TABLE outbox_events ADD CONSTRAINT outbox_events_legacy_range "
+            f"CHECK (created_at < '{cutover.isoformat()}') NOT VALID"
+        )
+        # VALIDATE — SHARE UPDATE EXCLUSIVE: скан не мешает чтению и записи.
+        op.execute("ALTER TABLE outbox_events VALIDATE CONSTRAINT outbox_events_legacy_range")
+        op.execute("RESET lock_timeout")
+
+    # --- 2. подмена таблицы: только метаданные ---
+    # lock_timeout — первой командой, до любой блокировки в транзакции.
+    op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+    op.execute("ALTER TABLE outbox_events RENAME TO outbox_events_legacy")
+    # ATTACH переиспользует индекс партиции, только если он держит ограничение
+    # того же типа, что у родителя (PRIMARY KEY): иначе строит новый под
+    # ACCESS EXCLUSIVE. Поэтому PK переезжает на готовый индекс — только метаданные.
+    op.execute(
+        "ALTER TABLE outbox_events_legacy DROP CONSTRAINT outbox_events_pkey, "
+        "ADD CONSTRAINT outbox_events_legacy_pkey PRIMARY KEY USING INDEX outbox_events_legacy_id_created_at"
+    )
+    for name in _INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_legacy")
+
+    op.execute(
+        """
+        CREATE TABLE outbox_events (
+            id integer NOT NULL DEFAULT nextval('outbox_events_id_seq'),
+            event_type varchar(100) NOT NULL,
+            payload jsonb NOT NULL,
+            created_at timestamp NOT NULL DEFAULT now(),
+            processed_at timestamp,
+            attempts integer NOT NULL DEFAULT 0,
+            next_attempt_at timestamp,
+            last_error text,
+            CONSTRAINT outbox_events_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE outbox_events_id_seq OWNED BY outbox_events.id")
+    _create_indexes()
+
+    op.execute(
+        "ALTER TABLE outbox_events ATTACH PARTITION outbox_events_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat()}')"
+    )
+    op.execute("ALTER TABLE outbox_events_legacy DROP CONSTRAINT outbox_events_legacy_range")
+
+    # --- 3. партиции вперёд + DEFAULT ---
+    for offset in range(_DAYS_AHEAD):
+        start = cutover + timedelta(days=offset)
+        end = start + timedelta(days=1)
+        op.execute(
+            f"CREATE TABLE outbox_events_p{start:%Y%m%d} PARTITION OF outbox_events "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute("CREATE TABLE outbox_events_default PARTITION OF outbox_events DEFAULT")
+
+
+def downgrade() -> None:
+    # Обратно в обычную таблицу: данные копируются (outbox после retention небольшой).
+    op.execute("CREATE TABLE outbox_events_plain (LIKE outbox_events INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO outbox_events_plain SELECT * FROM outbox_events")
+    op.execute("ALTER SEQUENCE outbox_events_id_seq OWNED BY outbox_events_plain.id")
+    op.execute("DROP TABLE outbox_events")
+    op.execute("ALTER TABLE outbox_events_plain RENAME TO outbox_events")
+    op.execute("ALTER TABLE outbox_events ADD CONSTRAINT outbox_events_pkey PRIMARY KEY (id)")
+    _create_indexes()
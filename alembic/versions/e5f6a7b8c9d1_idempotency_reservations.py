@@ -0,0 +1,49 @@
+"""idempotency_keys: pending reservations (nullable response)
+
+Revision ID: e5f6a7b8c9d1
+Revises: d4e5f6a7b8c0
+Create Date: 2026-10-18 01:00:00.000000
+
+Ключ идемпотентности сначала бронируется строкой без ответа и только
+потом, в транзакции самого запроса, получает response_status и
+response_body. DROP NOT NULL — только метаданные, без переписывания таблицы.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "e5f6a7b8c9d1"
+down_revision: Union[str, Sequence[str], None] = "d4e5f6a7b8c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "idempotency_keys", "response_status", existing_type=sa.Integer(), nullable=True
+    )
+    op.alter_column(
+        "idempotency_keys",
+        "response_body",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=True,
+    )
+
+
+def downgrade() -> None:
+    # Недозавершённые брони ответа не имеют — их нельзя оставить под NOT NULL.
+    op.execute("DELETE FROM idempotency_keys WHERE response_status IS NULL")
+    op.alter_column(
+        "idempotency_keys",
+        "response_body",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=False,
+    )
+    op.alter_column(
+        "idempotency_keys", "response_status", existing_type=sa.Integer(), nullable=False
+    )
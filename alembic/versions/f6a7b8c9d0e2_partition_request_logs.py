@@ -0,0 +1,144 @@
+"""partition request_logs by timestamp (monthly)
+
+Revision ID: f6a7b8c9d0e2
+Revises: e5f6a7b8c9d1
+Create Date: 2026-10-18 02:00:00.000000
+
+request_logs — самая большая таблица: каждое создание и смена статуса
+дописывают строки, а история заявки читалась целиком. Теперь это
+RANGE-партиционированная по timestamp таблица с месячными партициями;
+воркер создаёт партиции вперёд (maintain_request_log_partitions).
+
+Конвертация онлайн, по схеме d4e5f6a7b8c0 (outbox_events):
+    1. Без блокировки записи, каждый шаг — своей транзакцией: уникальный
+       индекс (id, timestamp) CONCURRENTLY; CHECK (timestamp < cutover)
+       NOT VALID — мгновенный ACCESS EXCLUSIVE под lock_timeout; VALIDATE —
+       скан под SHARE UPDATE EXCLUSIVE, чтение и запись идут.
+    2. Короткая транзакция, lock_timeout — первой командой: таблица
+       переименовывается в request_logs_legacy, создаётся партиционированный
+       родитель, legacy цепляется партицией [MINVALUE, cutover). PK legacy
+       переезжает на готовый индекс (id, timestamp) через USING INDEX.
+       Валидный CHECK, готовые индексы и такие же внешние ключи избавляют
+       ATTACH от скана и перестроения индексов.
+    3. Месячные партиции на несколько месяцев вперёд и DEFAULT.
+
+cutover — первое число месяца, наступающего не раньше чем через сутки:
+до него новые строки продолжают писаться в legacy-партицию. Данные
+журнала не удаляются — legacy-партиция остаётся навсегда.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "f6a7b8c9d0e2"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEX = "ix_request_logs_request_timestamp"
+_MONTHS_AHEAD = 3
+_LOCK_TIMEOUT = "10s"
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def upgrade() -> None:
+    cutover = _next_month((datetime.utcnow() + timedelta(days=1)).date())
+
+    # --- 1. подготовка без блокировки записи ---
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS request_logs_legacy_id_timestamp "
+            'ON request_logs (id, "timestamp")'
+        )
+        # NOT VALID держит ACCESS EXCLUSIVE мгновение, но в очереди за длинной
+        # транзакцией остановил бы весь трафик — поэтому lock_timeout.
+        op.execute(f"SET lock_timeout = '{_LOCK_TIMEOUT}'")
+        op.execute(
+            "ALTER TABLE request_logs ADD CONSTRAINT request_logs_legacy_range "
+            f"CHECK (\"timestamp\" < '{cutover.isoformat()}') NOT VALID"
+        )
+        # VALIDATE — SHARE UPDATE EXCLUSIVE: скан не мешает чтению и записи.
+        op.execute("ALTER TABLE request_logs VALIDATE CONSTRAINT request_logs_legacy_range")
+        op.execute("RESET lock_timeout")
+
+    # --- 2. подмена таблицы: только метаданные ---
+    # lock_timeout — первой командой, до любой блокировки в транзакции.
+    op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+    op.execute("ALTER TABLE request_logs RENAME TO request_logs_legacy")
+    # ATTACH переиспользует индекс партиции, только если он держит ограничение
+    # того же типа, что у родителя (PRIMARY KEY): иначе строит новый под
+    # ACCESS EXCLUSIVE. Поэтому PK переезжает на готовый индекс — только метаданные.
+    op.execute(
+        "ALTER TABLE request_logs_legacy DROP CONSTRAINT request_logs_pkey, "
+        "ADD CONSTRAINT request_logs_legacy_pkey PRIMARY KEY USING INDEX request_logs_legacy_id_timestamp"
+    )
+    op.execute(f"ALTER INDEX {_INDEX} RENAME TO {_INDEX}_legacy")
+
+    op.execute(
+        """
+        CREATE TABLE request_logs (
+            id integer NOT NULL DEFAULT nextval('request_logs_id_seq'),
+            request_id integer NOT NULL,
+            user_id integer NOT NULL,
+            action varchar(50) NOT NULL,
+            old_value varchar(200),
+            new_value varchar(200),
+            "timestamp" timestamp NOT NULL,
+            client_ip varchar(45),
+            user_agent varchar(255),
+            comment varchar(500),
+            source varchar(20) NOT NULL DEFAULT 'API',
+            CONSTRAINT request_logs_pkey PRIMARY KEY (id, "timestamp"),
+            CONSTRAINT request_logs_request_id_fkey
+                FOREIGN KEY (request_id) REFERENCES service_requests (id),
+            CONSTRAINT request_logs_user_id_fkey
+                FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY RANGE ("timestamp")
+        """
+    )
+    op.execute("ALTER SEQUENCE request_logs_id_seq OWNED BY request_logs.id")
+    op.create_index(_INDEX, "request_logs", ["request_id", "timestamp"])
+
+    op.execute(
+        "ALTER TABLE request_logs ATTACH PARTITION request_logs_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat()}')"
+    )
+    op.execute("ALTER TABLE request_logs_legacy DROP CONSTRAINT request_logs_legacy_range")
+
+    # --- 3. партиции вперёд + DEFAULT ---
+    start = cutover
+    for _ in range(_MONTHS_AHEAD):
+        end = _next_month(start)
+        op.execute(
+            f"CREATE TABLE request_logs_p{start:%Y%m%d} PARTITION OF request_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    op.execute("CREATE TABLE request_logs_default PARTITION OF request_logs DEFAULT")
+
+
+def downgrade() -> None:
+    # Обратно в обычную таблицу — с копированием строк: на большом журнале
+    # это долго, запускать в окно обслуживания.
+    op.execute("CREATE TABLE request_logs_plain (LIKE request_logs INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO request_logs_plain SELECT * FROM request_logs")
+    op.execute("ALTER SEQUENCE request_logs_id_seq OWNED BY request_logs_plain.id")
+    op.execute("DROP TABLE request_logs")
+    op.execute("ALTER TABLE request_logs_plain RENAME TO request_logs")
+    op.execute("ALTER TABLE request_logs ADD CONSTRAINT request_logs_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE request_logs ADD CONSTRAINT request_logs_request_id_fkey "
+        "FOREIGN KEY (request_id) REFERENCES service_requests (id)"
+    )
+    op.execute(
+        "ALTER TABLE request_logs ADD CONSTRAINT request_logs_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id)"
+    )
+    op.create_index(_INDEX, "request_logs", ["request_id", "timestamp"])
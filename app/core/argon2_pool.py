@@ -0,0 +1,152 @@
+"""Выделенный пул для argon2: verify / generate / rehash API-ключей.
+
+argon2id намеренно дорогой по CPU. Выполняясь прямо в обработчике, он
+занимает поток threadpool'а FastAPI (sync-стек) или asyncio.to_thread
+(async-стек) на всё время хеширования — во время «шторма» логинов или
+массовой ротации ключей остальным запросам не остаётся потоков.
+
+ARGON2_EXECUTOR:
+    inline  — как раньше: в вызывающем потоке (async — через asyncio.to_thread);
+    thread  — свой ThreadPoolExecutor (argon2-cffi отпускает GIL на хешировании);
+    process — ProcessPoolExecutor: хеширование вообще вне процесса API.
+
+Backpressure (thread/process): в полёте не больше ARGON2_WORKERS +
+ARGON2_QUEUE_DEPTH задач, следующая сразу получает Argon2Overloaded
+(503 + Retry-After) вместо ожидания в неограниченной очереди.
+
+Метрики: argon2_queue_wait_seconds{op} — от постановки в пул до конца
+минус время хеширования (очередь + IPC), argon2_hash_seconds{op} — чистое
+время argon2 в воркере, argon2_rejected_total{op}, argon2_in_flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+from app.core.config import settings
+from app.core.exceptions import Argon2Overloaded
+from app.core.hashing import timed_call
+from app.core.metrics import (
+    argon2_hash_seconds,
+    argon2_in_flight,
+    argon2_queue_wait_seconds,
+    argon2_rejected_total,
+)
+
+T = TypeVar("T")
+
+ExecutorKind = Literal["inline", "thread", "process"]
+
+
+class Argon2Pool:
+    def __init__(
+        self,
+        *,
+        kind: ExecutorKind,
+        workers: int,
+        queue_depth: int,
+        retry_after: int,
+    ) -> None:
+        if kind != "inline" and workers < 1:
+            raise ValueError("ARGON2_WORKERS должен быть >= 1 для thread/process пула.")
+        self._kind = kind
+        self._workers = workers
+        self._capacity = workers + max(queue_depth, 0)
+        self._retry_after = retry_after
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+    @classmethod
+    def from_settings(cls) -> Argon2Pool:
+        return cls(
+            kind=settings.ARGON2_EXECUTOR,
+            workers=settings.ARGON2_WORKERS,
+            queue_depth=settings.ARGON2_QUEUE_DEPTH,
+            retry_after=settings.ARGON2_RETRY_AFTER_SECONDS,
+        )
+
+    def run(self, op: str, fn: Callable[..., T], *args: Any) -> T:
+        """Блокирующий вызов — для sync-кода (поток threadpool просто ждёт)."""
+        if self._kind == "inline":
+            result, seconds = timed_call(fn, *args)
+            argon2_hash_seconds.labels(op=op).observe(seconds)
+            return result
+        future, submitted = self._submit(op, fn, *args)
+        result, seconds = future.result()
+        self._observe(op, submitted, seconds)
+        return result
+
+    async def arun(self, op: str, fn: Callable[..., T], *args: Any) -> T:
+        if self._kind == "inline":
+            result, seconds = await asyncio.to_thread(timed_call, fn, *args)
+            argon2_hash_seconds.labels(op=op).observe(seconds)
+            return result
+        future, submitted = self._submit(op, fn, *args)
+        result, seconds = await asyncio.wrap_future(future)
+        self._observe(op, submitted, seconds)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(
+        self, op: str, fn: Callable[..., T], *args: Any
+    ) -> tuple[Future[tuple[T, float]], float]:
+        self._admit(op)
+        submitted = time.perf_counter()
+        try:
+            future = self._get_executor().submit(timed_call, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Слот освобождается, когда задача реально закончилась, — даже если
+        # вызывающий уже ушёл (отмена корутины не останавливает хеширование).
+        future.add_done_callback(self._release)
+        return future, submitted
+
+    def _admit(self, op: str) -> None:
+        with self._lock:
+            if self._in_flight >= self._capacity:
+                argon2_rejected_total.labels(op=op).inc()
+                raise Argon2Overloaded(retry_after=self._retry_after)
+            self._in_flight += 1
+        argon2_in_flight.inc()
+
+    def _release(self, _future: Future[Any] | None = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        argon2_in_flight.dec()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self._kind == "process":
+                    # spawn, а не fork: родитель многопоточный (uvicorn, пулы БД).
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._workers, thread_name_prefix="argon2"
+                    )
+            return self._executor
+
+    @staticmethod
+    def _observe(op: str, submitted: float, hash_seconds: float) -> None:
+        total = time.perf_counter() - submitted
+        argon2_hash_seconds.labels(op=op).observe(hash_seconds)
+        argon2_queue_wait_seconds.labels(op=op).observe(max(total - hash_seconds, 0.0))
+
+
+argon2_pool = Argon2Pool.from_settings()
@@ -0,0 +1,158 @@
+"""In-process кеш успешно верифицированных API-ключей.
+
+argon2id намеренно дорогой (десятки миллисекунд и заметный кусок памяти),
+а `get_current_user` вызывается на каждом запросе — без кеша argon2
+задаёт потолок RPS на воркер. Кеш запоминает факт «этот ключ уже
+проверен для user_id с таким-то api_key_hash» и позволяет пропустить
+argon2.verify на повторных запросах.
+
+Свойства:
+    - ключ кеша — HMAC-SHA256 от сырого ключа на случайном секрете
+      процесса; сырой ключ в памяти кеша не хранится;
+    - ограниченный размер (LRU-вытеснение) и TTL на запись;
+    - запись хранит api_key_hash, с которым ключ был проверен: если хеш
+      в БД сменился (ротация в другом процессе), запись игнорируется —
+      так кеш остаётся корректным и в multi-worker деплое;
+    - явная инвалидация по user_id при ротации ключа и смене роли.
+
+Пользователь при попадании в кеш всё равно читается из БД по PK, поэтому
+is_active/role всегда актуальны — кеш экономит только argon2.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.metrics import api_key_cache_total
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    user_id: int
+    api_key_hash: str
+    expires_at: float
+
+
+class VerifiedKeyCache:
+    """Потокобезопасный TTL + LRU кеш «digest ключа → (user_id, hash)».
+
+    Sync-хендлеры FastAPI работают в threadpool, поэтому все операции
+    под одним lock'ом — они O(1) и не держат его долго.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._secret = secrets.token_bytes(32)
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self._by_user: dict[int, set[bytes]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0 and self._ttl > 0
+
+    def _digest(self, raw_key: str) -> bytes:
+        return hmac.new(self._secret, raw_key.encode("utf-8"), hashlib.sha256).digest()
+
+    def get(self, raw_key: str) -> tuple[int, str] | None:
+        """Возвращает (user_id, api_key_hash) для ранее проверенного ключа."""
+        if not self.enabled:
+            return None
+        digest = self._digest(raw_key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                api_key_cache_total.labels(event="miss").inc()
+                return None
+            if entry.expires_at <= self._clock():
+                self._drop(digest)
+                api_key_cache_total.labels(event="expired").inc()
+                return None
+            self._entries.move_to_end(digest)
+        api_key_cache_total.labels(event="hit").inc()
+        return entry.user_id, entry.api_key_hash
+
+    def peek(self, raw_key: str) -> int | None:
+        """user_id проверенного ключа без метрик и LRU — для ключа rate limit."""
+        if not self.enabled:
+            return None
+        digest = self._digest(raw_key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry.expires_at <= self._clock():
+                return None
+            return entry.user_id
+
+    def put(self, raw_key: str, *, user_id: int, api_key_hash: str) -> None:
+        if not self.enabled:
+            return
+        digest = self._digest(raw_key)
+        entry = _Entry(
+            user_id=user_id,
+            api_key_hash=api_key_hash,
+            expires_at=self._clock() + self._ttl,
+        )
+        with self._lock:
+            self._drop(digest)
+            self._entries[digest] = entry
+            self._by_user.setdefault(user_id, set()).add(digest)
+            while len(self._entries) > self._max_size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                api_key_cache_total.labels(event="eviction").inc()
+
+    def discard(self, raw_key: str) -> None:
+        """Удаляет запись конкретного ключа (например, хеш в БД уже другой)."""
+        digest = self._digest(raw_key)
+        with self._lock:
+            self._drop(digest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Сбрасывает все закешированные ключи пользователя."""
+        with self._lock:
+            digests = self._by_user.pop(user_id, set())
+            for digest in digests:
+                self._entries.pop(digest, None)
+        if digests:
+            api_key_cache_total.labels(event="invalidation").inc(len(digests))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, digest: bytes) -> None:
+        # Вызывается под self._lock.
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        owned = self._by_user.get(entry.user_id)
+        if owned is not None:
+            owned.discard(digest)
+            if not owned:
+                del self._by_user[entry.user_id]
+
+
+verified_key_cache = VerifiedKeyCache(
+    max_size=settings.API_KEY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS,
+)
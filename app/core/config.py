@@ -9,9 +9,9 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import List
+from typing import List, Literal
 
-from pydantic import SecretStr, field_validator
+from pydantic import SecretStr, ValidationInfo, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -33,14 +33,117 @@ class Settings(BaseSettings):
 
     # === DATABASE ===
     DATABASE_URL_POSTGRES: SecretStr
+    # Стек доменных роутов: sync — def-обработчики на Session в threadpool,
+    # async — async def на AsyncSession. Контракт API одинаковый.
+    DB_STACK: Literal["sync", "async"] = "sync"
+    # Реплика для чтения (опционально): GET/HEAD-обработчики читают из неё
+    # в read-only Unit of Work. Read-your-writes: после записи клиент получает
+    # LSN primary (заголовок X-DB-LSN и cookie на REPLICA_READ_YOUR_WRITES_SECONDS);
+    # чтение с этим LSN идёт в реплику, только если она его уже проиграла.
+    DATABASE_URL_REPLICA: SecretStr | None = None
+    REPLICA_READ_YOUR_WRITES_SECONDS: int = 10
+
+    # === API ===
+    # Сериализация JSON-ответов: orjson — ORJSONResponse по умолчанию и
+    # страницы через model_dump_json; std — стандартный JSONResponse FastAPI.
+    JSON_RESPONSE: Literal["orjson", "std"] = "orjson"
+    # Максимум элементов в POST /requests:batch (одна транзакция на пачку).
+    REQUEST_BATCH_MAX_ITEMS: int = 500
+
+    # === REDIS ===
+    # Общий Redis для Redis-бэкендов (IDEMPOTENCY_BACKEND=redis,
+    # RATE_LIMIT_STORAGE=redis). Клиент
+    # создаётся лениво: пока такие бэкенды выключены, API к Redis не ходит.
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # === IDEMPOTENCY ===
+    # Idempotency-Key: бронь ключа коммитится до выполнения запроса, ответ
+    # пишется в неё в транзакции самого запроса. Дубль, пришедший, пока
+    # оригинал выполняется, ждёт до IDEMPOTENCY_WAIT_SECONDS, затем получает
+    # 409 idempotency_key_in_progress. Бронь без ответа старше
+    # IDEMPOTENCY_LOCK_SECONDS считается брошенной (процесс упал) и
+    # перехватывается. Ключи старше IDEMPOTENCY_TTL_HOURS удаляет воркер
+    # пачками по IDEMPOTENCY_PURGE_BATCH.
+    #
+    # Хранилище ключей: postgres — таблица idempotency_keys, ответ пишется
+    # атомарно с изменением; redis — ключи с нативным TTL и сжатыми ответами,
+    # ответ пишется сразу после commit запроса, очистка воркером не нужна.
+    IDEMPOTENCY_BACKEND: Literal["postgres", "redis"] = "postgres"
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: float = 2.0
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_PURGE_BATCH: int = 1_000
+
+    # === RATE LIMIT ===
+    # Хранилище счётчиков slowapi: memory — в памяти процесса (лимит
+    # фактически умножается на число воркеров и нод); redis — общие счётчики
+    # в REDIS_URL. Хиты копятся локально и уходят в Redis пачкой по
+    # RATE_LIMIT_SYNC_BATCH или не реже раза в RATE_LIMIT_SYNC_INTERVAL_SECONDS:
+    # превышение лимита ограничено (число процессов) × RATE_LIMIT_SYNC_BATCH.
+    RATE_LIMIT_STORAGE: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_SYNC_BATCH: int = 10
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 1.0
+    # Квоты ролей на роуты заявок: единицы на окно, ключ — пользователь, а не
+    # IP. Операции весят по-разному (список с COUNT — 5, деталь — 1, пачка —
+    # по единице за элемент), см. app.core.rate_limit.
+    RATE_LIMIT_QUOTA_EMPLOYEE: str = "300/minute"
+    RATE_LIMIT_QUOTA_AGENT: str = "1200/minute"
+    RATE_LIMIT_QUOTA_ADMIN: str = "1200/minute"
 
     # === SECURITY ===
     API_KEY_HEADER: str = "X-API-Key"
     ADMIN_BOOTSTRAP_KEY: SecretStr
 
+    # Кеш успешно проверенных API-ключей (экономит argon2.verify на каждом запросе).
+    # 0 в любом из параметров выключает кеш.
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0
+    API_KEY_CACHE_MAX_SIZE: int = 10_000
+
+    # Выделенный пул для argon2 (verify/hash ключей). inline — в вызывающем
+    # потоке, как раньше; thread/process — отдельный пул на ARGON2_WORKERS.
+    # Сверх WORKERS + QUEUE_DEPTH задач в полёте — 503 с Retry-After.
+    ARGON2_EXECUTOR: Literal["inline", "thread", "process"] = "inline"
+    ARGON2_WORKERS: int = 2
+    ARGON2_QUEUE_DEPTH: int = 32
+    ARGON2_RETRY_AFTER_SECONDS: int = 1
+
     # Разделённые запятой origin'ы: https://app.example.com,https://admin.example.com
     CORS_ORIGINS: str = "http://localhost:5173"
 
+    # === OUTBOX WORKER ===
+    # Drain крутит пачки, пока они приходят полными; размер пачки
+    # подстраивается между MIN и MAX так, чтобы одна пачка обрабатывалась
+    # примерно за OUTBOX_BATCH_TARGET_SECONDS.
+    OUTBOX_BATCH_MIN: int = 50
+    OUTBOX_BATCH_MAX: int = 2_000
+    OUTBOX_BATCH_TARGET_SECONDS: float = 0.5
+    # Порядок внутри заявки между процессами воркера: заявки раскладываются
+    # по OUTBOX_LOCK_SHARDS шардам, пачка берёт только шарды, на которые
+    # получила advisory-lock. Одинаковое значение на всех воркерах.
+    OUTBOX_LOCK_SHARDS: int = 16
+    # Ретраи неудачной публикации: задержка растёт экспоненциально от BASE
+    # до MAX (с jitter); после MAX_ATTEMPTS событие уходит в outbox_dead_letters.
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 900.0
+    # Куда публикуются события: log — структурный лог, webhook — POST пачек
+    # {"events": [...]} на OUTBOX_WEBHOOK_URL (keep-alive пул httpx, HTTP/2).
+    OUTBOX_SINK: Literal["log", "webhook"] = "log"
+    OUTBOX_SINK_BATCH_SIZE: int = 100
+    OUTBOX_WEBHOOK_URL: str | None = None
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    OUTBOX_WEBHOOK_CONCURRENCY: int = 8
+    # outbox_events партиционирована по created_at: воркер держит партиции
+    # на OUTBOX_PARTITIONS_AHEAD периодов вперёд и удаляет целиком обработанные
+    # партиции старше OUTBOX_RETENTION_DAYS.
+    OUTBOX_PARTITION_INTERVAL: Literal["day", "week"] = "day"
+    OUTBOX_PARTITIONS_AHEAD: int = 3
+    OUTBOX_RETENTION_DAYS: int = 7
+    # request_logs партиционирована помесячно по timestamp: воркер держит
+    # партиции на REQUEST_LOG_PARTITIONS_AHEAD месяцев вперёд. Журнал не
+    # удаляется — окна хранения нет.
+    REQUEST_LOG_PARTITIONS_AHEAD: int = 3
+
     # === LOGGING ===
     LOG_LEVEL: str = "INFO"
     LOG_JSON: bool = True
@@ -51,6 +154,22 @@ class Settings(BaseSettings):
     def db_url(self) -> str:
         return self.DATABASE_URL_POSTGRES.get_secret_value()
 
+    @property
+    def async_db_url(self) -> str:
+        """DSN для create_async_engine: голый postgresql:// → psycopg 3 (async)."""
+        return _async_dsn(self.db_url)
+
+    @property
+    def replica_db_url(self) -> str | None:
+        if self.DATABASE_URL_REPLICA is None:
+            return None
+        return self.DATABASE_URL_REPLICA.get_secret_value()
+
+    @property
+    def async_replica_db_url(self) -> str | None:
+        raw = self.replica_db_url
+        return _async_dsn(raw) if raw is not None else None
+
     @property
     def admin_bootstrap_key(self) -> str:
         return self.ADMIN_BOOTSTRAP_KEY.get_secret_value()
@@ -79,13 +198,16 @@ class Settings(BaseSettings):
             raise ValueError("ADMIN_BOOTSTRAP_KEY должен быть не короче 24 символов.")
         return v
 
-    @field_validator("DATABASE_URL_POSTGRES")
+    @field_validator("DATABASE_URL_POSTGRES", "DATABASE_URL_REPLICA")
     @classmethod
-    def _validate_db_url(cls, v: SecretStr) -> SecretStr:
+    def _validate_db_url(cls, v: SecretStr | None, info: ValidationInfo) -> SecretStr | None:
+        # Пустая строка в .env (DATABASE_URL_REPLICA=) — «реплики нет».
+        if v is None or not v.get_secret_value():
+            return None
         raw = v.get_secret_value()
         if not raw.startswith(("postgresql://", "postgresql+psycopg://", "postgresql+asyncpg://")):
             raise ValueError(
-                "DATABASE_URL_POSTGRES должен быть PostgreSQL DSN "
+                f"{info.field_name} должен быть PostgreSQL DSN "
                 "(postgresql://, postgresql+psycopg://, postgresql+asyncpg://)."
             )
         return v
@@ -99,6 +221,12 @@ class Settings(BaseSettings):
         return v
 
 
+def _async_dsn(raw: str) -> str:
+    if raw.startswith("postgresql://"):
+        return "postgresql+psycopg://" + raw.removeprefix("postgresql://")
+    return raw
+
+
 _settings: Settings | None = None
 
 
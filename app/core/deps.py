@@ -1,16 +1,46 @@
 """DI-зависимости FastAPI для доменных сервисов.
 
 Держим здесь, а не в security.py, чтобы security отвечал только за аутентификацию.
+
+UoW выбирается по методу запроса: GET/HEAD — read-only (реплика, если она
+догнала LSN клиента), остальные — primary с отдачей LSN после commit.
+FastAPI кеширует зависимость в пределах запроса, поэтому аутентификация
+и обработчик работают в одном UoW.
 """
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
+
+from fastapi import Request, Response
 
-from app.uow import SqlAlchemyUnitOfWork
+from app.database.replica import (
+    async_lsn_tracker,
+    async_read_session_factory,
+    client_lsn,
+    is_read_request,
+    lsn_tracker,
+    read_session_factory,
+)
+from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
 
 
-def get_uow() -> Iterator[SqlAlchemyUnitOfWork]:
-    uow = SqlAlchemyUnitOfWork()
+def get_uow(request: Request, response: Response) -> Iterator[SqlAlchemyUnitOfWork]:
+    if is_read_request(request):
+        uow = SqlAlchemyUnitOfWork(read_session_factory(client_lsn(request)), read_only=True)
+    else:
+        uow = SqlAlchemyUnitOfWork(after_commit=lsn_tracker(response))
     with uow:
         yield uow
+
+
+async def get_async_uow(
+    request: Request, response: Response
+) -> AsyncIterator[AsyncSqlAlchemyUnitOfWork]:
+    if is_read_request(request):
+        factory = await async_read_session_factory(client_lsn(request))
+        uow = AsyncSqlAlchemyUnitOfWork(factory, read_only=True)
+    else:
+        uow = AsyncSqlAlchemyUnitOfWork(after_commit=async_lsn_tracker(response))
+    async with uow:
+        yield uow
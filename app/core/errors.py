@@ -24,8 +24,14 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette import status as http_status
 
-from app.core.exceptions import DomainError
+from app.core.exceptions import (
+    DomainError,
+    IdempotencyKeyInProgress,
+    QuotaExceeded,
+    ServiceOverloaded,
+)
 from app.core.logging import get_logger, request_id_ctx
+from app.core.responses import default_response_class
 
 _log = get_logger("errors")
 
@@ -59,7 +65,7 @@ def _problem_response(
     if errors is not None:
         payload["errors"] = errors
 
-    return JSONResponse(
+    return default_response_class()(
         status_code=status_code,
         content=payload,
         media_type=PROBLEM_CONTENT_TYPE,
@@ -79,12 +85,16 @@ def _instance_of(request: Request) -> str:
 
 
 async def domain_exception_handler(request: Request, exc: DomainError) -> JSONResponse:
+    headers = None
+    if isinstance(exc, ServiceOverloaded | IdempotencyKeyInProgress | QuotaExceeded):
+        headers = {"Retry-After": str(exc.retry_after)}
     return _problem_response(
         status_code=exc.http_status,
         code=exc.code,
         detail=exc.message,
         instance=_instance_of(request),
         errors=exc.details,
+        headers=headers,
     )
 
 
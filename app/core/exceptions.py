@@ -42,6 +42,21 @@ class ValidationFailed(DomainError):
     default_message = "Некорректные данные."
 
 
+class InvalidCursor(ValidationFailed):
+    code = "invalid_cursor"
+    default_message = "Некорректный курсор пагинации."
+
+
+class BatchTooLarge(ValidationFailed):
+    code = "batch_too_large"
+    default_message = "Слишком много элементов в пачке."
+
+
+class InvalidFields(ValidationFailed):
+    code = "invalid_fields"
+    default_message = "Неизвестные поля в параметре fields."
+
+
 class BusinessRuleViolation(DomainError):
     """Нарушение бизнес-правила (например, попытка изменить terminal-статус)."""
 
@@ -160,3 +175,61 @@ class OptimisticLockFailed(ConflictError):
 class IdempotencyKeyConflict(ConflictError):
     code = "idempotency_key_conflict"
     default_message = "Idempotency-Key уже использован с другим телом запроса."
+
+
+class IdempotencyKeyInProgress(ConflictError):
+    """Запрос с этим ключом ещё выполняется; повторить через retry_after секунд."""
+
+    code = "idempotency_key_in_progress"
+    default_message = "Запрос с этим Idempotency-Key ещё выполняется."
+
+    def __init__(self, message: str | None = None, *, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ---------- 429 TOO MANY REQUESTS ----------
+
+
+class QuotaExceeded(DomainError):
+    """Квота роли пользователя на окно исчерпана; повторить через retry_after секунд."""
+
+    code = "quota_exceeded"
+    http_status = 429
+    default_message = "Превышена квота запросов для вашей роли."
+
+    def __init__(
+        self,
+        message: str | None = None,
+        *,
+        retry_after: int = 1,
+        details: Any | None = None,
+    ) -> None:
+        super().__init__(message, details=details)
+        self.retry_after = retry_after
+
+
+# ---------- 503 SERVICE UNAVAILABLE ----------
+
+
+class ServiceOverloaded(DomainError):
+    """Перегрузка: запрос не принят, клиенту стоит повторить через retry_after секунд."""
+
+    code = "service_overloaded"
+    http_status = 503
+    default_message = "Сервис перегружен, повторите запрос позже."
+
+    def __init__(
+        self,
+        message: str | None = None,
+        *,
+        retry_after: int = 1,
+        code: str | None = None,
+    ) -> None:
+        super().__init__(message, code=code)
+        self.retry_after = retry_after
+
+
+class Argon2Overloaded(ServiceOverloaded):
+    code = "argon2_overloaded"
+    default_message = "Проверка API-ключей перегружена, повторите запрос позже."
@@ -17,11 +17,16 @@ API-ключи **никогда** не хранятся в БД в открыт
 from __future__ import annotations
 
 import secrets
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Any, TypeVar
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 
+T = TypeVar("T")
+
 PREFIX_LEN = 8
 LAST_LEN = 4
 RAW_KEY_BYTES = 32  # 256 бит энтропии
@@ -85,3 +90,15 @@ def needs_rehash(stored_hash: str) -> bool:
         return _hasher.check_needs_rehash(stored_hash)
     except Exception:
         return False
+
+
+def timed_call(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    """Выполняет fn и возвращает (результат, длительность в секундах).
+
+    Запускается внутри воркера пула app.core.argon2_pool: длительность
+    меряется там, где идёт хеширование, — так ожидание в очереди и время
+    argon2 разделяются и для process-пула.
+    """
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
@@ -7,7 +7,7 @@ HTTP-метрик (RPS, latency-гистограммы, in-flight, по стат
 
 from __future__ import annotations
 
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_fastapi_instrumentator.metrics import (
     default,
@@ -35,6 +35,89 @@ api_key_auth_total = Counter(
     labelnames=("result",),  # ok | invalid | inactive | missing
 )
 
+api_key_cache_total = Counter(
+    "serviceflow_api_key_cache_total",
+    "События кеша проверенных API-ключей.",
+    labelnames=("event",),  # hit | miss | expired | eviction | invalidation
+)
+
+db_read_route_total = Counter(
+    "serviceflow_db_read_route_total",
+    "Куда ушли чтения при настроенной реплике.",
+    labelnames=("target", "reason"),  # replica: no_lsn | caught_up; primary: stale
+)
+
+argon2_queue_wait_seconds = Histogram(
+    "serviceflow_argon2_queue_wait_seconds",
+    "Ожидание задачи argon2 в очереди пула до начала хеширования.",
+    labelnames=("op",),  # verify | generate | rehash
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+argon2_hash_seconds = Histogram(
+    "serviceflow_argon2_hash_seconds",
+    "Чистое время argon2-операции в воркере пула.",
+    labelnames=("op",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+argon2_rejected_total = Counter(
+    "serviceflow_argon2_rejected_total",
+    "Задачи argon2, отклонённые из-за переполнения пула (ответ 503).",
+    labelnames=("op",),
+)
+
+argon2_in_flight = Gauge(
+    "serviceflow_argon2_in_flight",
+    "Задачи argon2 в пуле: выполняются + ждут в очереди.",
+)
+
+
+# --- outbox (метрики воркера; отдаются его собственным /metrics) ---
+
+outbox_delivery_lag_seconds = Histogram(
+    "serviceflow_outbox_delivery_lag_seconds",
+    "Задержка от записи события в outbox до публикации.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+outbox_events_published_total = Counter(
+    "serviceflow_outbox_events_published_total",
+    "Опубликованные события outbox.",
+)
+
+outbox_sink_latency_seconds = Histogram(
+    "serviceflow_outbox_sink_latency_seconds",
+    "Длительность одного вызова sink'а outbox (пачка событий).",
+    labelnames=("sink", "outcome"),  # outcome: ok | error
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+outbox_publish_failures_total = Counter(
+    "serviceflow_outbox_publish_failures_total",
+    "Неудачные попытки публикации событий outbox.",
+)
+
+outbox_dead_letters_total = Counter(
+    "serviceflow_outbox_dead_letters_total",
+    "События outbox, перенесённые в dead-letter после исчерпания попыток.",
+)
+
+outbox_backlog_events = Gauge(
+    "serviceflow_outbox_backlog_events",
+    "Необработанные события outbox после последнего прохода drain.",
+)
+
+outbox_drain_rate_events_per_second = Gauge(
+    "serviceflow_outbox_drain_rate_events_per_second",
+    "Скорость последнего прохода drain.",
+)
+
+outbox_batch_size = Gauge(
+    "serviceflow_outbox_batch_size",
+    "Текущий адаптивный размер пачки drain.",
+)
+
 
 def build_instrumentator() -> Instrumentator:
     """Строит инструментатор с адекватными HTTP-метриками и исключает служебные URL."""
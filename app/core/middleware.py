@@ -5,18 +5,19 @@ RequestContextMiddleware:
     - Пишет access-лог: method, path, status_code, duration_ms, client_ip.
     - Хранит request_id в contextvars, чтобы structlog подхватывал его
       во всех вложенных логах (сервисы, SQLAlchemy и т.п.).
+
+Обе middleware — «чистый» ASGI, а не BaseHTTPMiddleware: заголовки
+дописываются прямо в сообщение http.response.start, без отдельной задачи
+и memory stream на каждый слой. Замер — scripts/bench_middleware.py.
 """
 
 from __future__ import annotations
 
 import time
 import uuid
-from typing import Awaitable, Callable
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 from app.core.logging import get_logger, request_id_ctx
@@ -38,6 +39,8 @@ _SECURITY_HEADERS: dict[str, str] = {
     "Cross-Origin-Resource-Policy": "same-origin",
 }
 
+_HSTS_VALUE = "max-age=31536000; includeSubDomains; preload"
+
 _log = get_logger("http")
 
 
@@ -48,67 +51,74 @@ def _normalize_request_id(value: str | None) -> str:
     return uuid.uuid4().hex
 
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
+class RequestContextMiddleware:
     def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
-
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]],
-    ) -> Response:
-        request_id = _normalize_request_id(request.headers.get(REQUEST_ID_HEADER))
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = _normalize_request_id(headers.get(REQUEST_ID_HEADER))
         token = request_id_ctx.set(request_id)
 
         start = time.perf_counter()
         status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Пишем request_id в ответ, даже если обработчик его не выставил.
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
         try:
-            response = await call_next(request)
-            status_code = response.status_code
-            return response
-        except Exception:
-            # Хендлер Exception напишет Problem Details; здесь — лог access с 500.
-            raise
+            # Исключение пролетает дальше: Problem Details 500 напишет
+            # хендлер Exception, здесь — только access-лог со статусом 500.
+            await self.app(scope, receive, send_with_request_id)
         finally:
             duration_ms = round((time.perf_counter() - start) * 1000, 2)
-            client_ip = request.client.host if request.client else None
+            client = scope.get("client")
             _log.info(
                 "http_request",
-                method=request.method,
-                path=request.url.path,
-                query=request.url.query or None,
+                method=scope["method"],
+                path=scope["path"],
+                query=scope["query_string"].decode("latin-1") or None,
                 status_code=status_code,
                 duration_ms=duration_ms,
-                client_ip=client_ip,
-                user_agent=request.headers.get("user-agent"),
+                client_ip=client[0] if client else None,
+                user_agent=headers.get("user-agent"),
             )
-            # Пишем request_id в ответ, даже если обработчик его не выставил.
-            try:
-                response_headers = response.headers  # type: ignore[name-defined]
-                response_headers[REQUEST_ID_HEADER] = request_id
-            except Exception:  # noqa: S110 - response мог не быть присвоен (upstream raise)
-                pass
             request_id_ctx.reset(token)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Проставляет безопасные заголовки на каждый ответ.
 
     HSTS добавляется только в проде и только поверх HTTPS — иначе
     это бесполезно или мешает разработке.
     """
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]],
-    ) -> Response:
-        response = await call_next(request)
-        for name, value in _SECURITY_HEADERS.items():
-            response.headers.setdefault(name, value)
-        if settings.is_prod and request.url.scheme == "https":
-            response.headers.setdefault(
-                "Strict-Transport-Security",
-                "max-age=31536000; includeSubDomains; preload",
-            )
-        return response
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        hsts = settings.is_prod and scope.get("scheme") == "https"
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in _SECURITY_HEADERS.items():
+                    headers.setdefault(name, value)
+                if hsts:
+                    headers.setdefault("Strict-Transport-Security", _HSTS_VALUE)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,27 +1,59 @@
 """Rate limiting.
 
-slowapi хранит счётчики in-memory (процессе uvicorn). Для multi-instance
-деплоя нужен shared storage — переключится на Redis-backend сменой
-storage_uri. Для одиночного бэкенда/портфолио этого достаточно.
+RATE_LIMIT_STORAGE=memory — счётчики slowapi в памяти процесса uvicorn:
+на одиночном бэкенде этого достаточно. redis — общие счётчики в REDIS_URL
+через BatchedRedisStorage (app.core.rate_limit_storage): хиты считаются
+локально и синхронизируются с Redis пачками, без round-trip на каждый запрос.
 
-Ключ лимита — IP клиента с учётом заголовков X-Forwarded-For (если
-сервис стоит за reverse proxy).
+Два уровня:
+    - лимиты slowapi (120/minute на путь по умолчанию и декораторы на
+      users) — ключ «user:<id>», если X-API-Key уже проверен в этом процессе
+      (verified_key_cache, без БД), иначе IP клиента с учётом
+      X-Forwarded-For. Офис за NAT больше не делит один счётчик;
+    - квота роли на роуты заявок (charge_quota — зависимость роутера):
+      после аутентификации списывает вес операции из квоты
+      RATE_LIMIT_QUOTA_<ROLE> пользователя. Тяжёлый клиент получает 429
+      quota_exceeded до запроса к БД, а не после.
+
+Вес операции: список с total_mode=exact — 5 (выборка + COUNT), списки без
+точного total — 2, пачка — по единице за элемент (не больше квоты,
+иначе пачка не прошла бы никогда), остальное — 1.
 """
 
 from __future__ import annotations
 
-from fastapi import Request
+import math
+import time
+from functools import lru_cache
+
+from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
+from limits import RateLimitItem, parse
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from app.core.auth_cache import verified_key_cache
+from app.core.config import settings
+from app.core.enums import UserRole
+from app.core.exceptions import QuotaExceeded
 from app.core.logging import get_logger, request_id_ctx
+from app.core.rate_limit_storage import BatchedRedisStorage  # noqa: F401  (регистрирует схему)
+from app.core.responses import default_response_class
+from app.core.security import api_key_scheme, get_current_user, get_current_user_async
+from app.models.user import User
+from app.schemas.common import TotalMode
 
 _log = get_logger("ratelimit")
 
 
 def _client_key(request: Request) -> str:
+    raw_key = request.headers.get(api_key_scheme.model.name)
+    if raw_key:
+        user_id = verified_key_cache.peek(raw_key)
+        if user_id is not None:
+            return f"user:{user_id}"
     # Берём первый адрес из X-Forwarded-For, иначе — адрес соединения.
     xff = request.headers.get("x-forwarded-for")
     if xff:
@@ -29,11 +61,99 @@ def _client_key(request: Request) -> str:
     return get_remote_address(request)
 
 
+def _storage_uri() -> str:
+    if settings.RATE_LIMIT_STORAGE == "redis":
+        # Схема batched+redis зарегистрирована импортом BatchedRedisStorage.
+        return f"batched+{settings.REDIS_URL}"
+    return "memory://"
+
+
 limiter = Limiter(
     key_func=_client_key,
     default_limits=["120/minute"],
     headers_enabled=True,  # добавляет X-RateLimit-Limit/Remaining/Reset
+    storage_uri=_storage_uri(),
+    storage_options=(
+        {
+            "sync_batch": settings.RATE_LIMIT_SYNC_BATCH,
+            "sync_interval": settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS,
+        }
+        if settings.RATE_LIMIT_STORAGE == "redis"
+        else {}
+    ),
+)
+
+
+# ---------- квоты ролей ----------
+
+_LIST_OPERATIONS = frozenset(
+    {"requests_list", "requests_list_my", "requests_list_assigned", "requests_list_queue"}
 )
+_BATCH_OPERATIONS = frozenset({"requests_create_batch", "requests_update_status_batch"})
+_LIST_COST = 5
+_LIST_COST_WITHOUT_COUNT = 2
+
+
+@lru_cache(maxsize=16)
+def _parse_quota(value: str) -> RateLimitItem:
+    return parse(value)
+
+
+def _role_quota(role: UserRole) -> RateLimitItem:
+    return _parse_quota(
+        {
+            UserRole.ADMIN: settings.RATE_LIMIT_QUOTA_ADMIN,
+            UserRole.AGENT: settings.RATE_LIMIT_QUOTA_AGENT,
+            UserRole.EMPLOYEE: settings.RATE_LIMIT_QUOTA_EMPLOYEE,
+        }[role]
+    )
+
+
+async def _operation_cost(request: Request) -> int:
+    operation_id = getattr(request.scope.get("route"), "operation_id", None)
+    if operation_id in _LIST_OPERATIONS:
+        total_mode = request.query_params.get("total_mode", TotalMode.EXACT.value)
+        return _LIST_COST if total_mode == TotalMode.EXACT.value else _LIST_COST_WITHOUT_COUNT
+    if operation_id in _BATCH_OPERATIONS:
+        # FastAPI уже прочитал тело (body() кешируется в Request) — считаем элементы.
+        try:
+            body = await request.json()
+        except ValueError:
+            return 1
+        items = body.get("items") if isinstance(body, dict) else None
+        return max(1, len(items)) if isinstance(items, list) else 1
+    return 1
+
+
+def _charge(user: User, cost: int) -> None:
+    quota = _role_quota(user.role)
+    cost = min(cost, quota.amount)
+    strategy = limiter.limiter
+    if strategy.hit(quota, "quota", str(user.id), cost=cost):
+        return
+    reset_at = strategy.get_window_stats(quota, "quota", str(user.id)).reset_time
+    _log.warning("rate_limit_quota_exceeded", user_id=user.id, role=user.role.value, cost=cost)
+    raise QuotaExceeded(
+        retry_after=max(1, math.ceil(reset_at - time.time())),
+        details={"quota": str(quota), "cost": cost},
+    )
+
+
+async def charge_quota(request: Request, user: User = Depends(get_current_user)) -> None:
+    """Зависимость роутера: списывает вес операции из квоты роли пользователя.
+
+    hit() storage синхронный и при RATE_LIMIT_STORAGE=redis может ходить в
+    сеть — списание уходит в threadpool, event loop его не ждёт.
+    """
+    cost = await _operation_cost(request)
+    await run_in_threadpool(_charge, user, cost)
+
+
+async def charge_quota_async(
+    request: Request, user: User = Depends(get_current_user_async)
+) -> None:
+    cost = await _operation_cost(request)
+    await run_in_threadpool(_charge, user, cost)
 
 
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
@@ -57,7 +177,7 @@ async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded)
     if rid:
         payload["request_id"] = rid
 
-    response = JSONResponse(
+    response = default_response_class()(
         status_code=429,
         content=payload,
         media_type="application/problem+json",
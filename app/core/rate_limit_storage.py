@@ -0,0 +1,207 @@
+"""Распределённые счётчики rate limit: Redis + локальная предпроверка.
+
+Storage для limits/slowapi (fixed window) со схемой batched+redis://.
+Каждый процесс держит по ключу локальный срез окна:
+
+    synced  — глобальный счётчик окна на момент последней синхронизации;
+    pending — свои хиты, ещё не отправленные в Redis.
+
+incr() отвечает из памяти (synced + pending) и ходит в Redis, только когда
+накопилось RATE_LIMIT_SYNC_BATCH хитов, прошло RATE_LIMIT_SYNC_INTERVAL_SECONDS
+с прошлой синхронизации или началось новое окно. Синхронизация — один
+Lua-скрипт: INCRBY накопленного, TTL окна при создании ключа, в ответ —
+глобальный счётчик и остаток окна. Окно задаёт Redis: все процессы
+сбрасывают его одновременно.
+
+Поход в Redis идёт без блокировки: под lock'ом pending переносится в
+in_flight, запрос выполняется вне его, результат сливается обратно. Пока
+ключ синхронизируется, остальные вызовы продолжают считать локально и не
+ждут сеть; второй синхронизации того же ключа параллельно не бывает.
+Round-trip платит тот вызов, что запустил синхронизацию (первый хит окна,
+каждый RATE_LIMIT_SYNC_BATCH-й или первый после интервала): он ждёт Redis
+inline, до socket_timeout (0.5 с). Для slowapi-middleware это ожидание
+в event loop — один такой хит на синхронизацию ключа.
+
+Точность: между синхронизациями процесс не видит чужих хитов, поэтому
+лимит может быть превышен не больше чем на (число процессов) ×
+RATE_LIMIT_SYNC_BATCH за окно. Redis недоступен — процесс считает локально
+(как memory://) и не ходит в Redis RATE_LIMIT_SYNC_INTERVAL_SECONDS после
+сбоя, чтобы таймауты не копились на каждом ключе.
+
+Локальная предпроверка — срез fixed window, а не token bucket: limits и
+slowapi считают лимиты окнами (storage не знает ни ёмкости, ни скорости
+пополнения), а срез окна даёт ту же экономию походов в Redis.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import redis
+from limits.storage import Storage
+
+from app.core.logging import get_logger
+
+_log = get_logger("ratelimit")
+
+_PREFIX = "sf:rl:"
+# Не чаще одного прохода очистки истёкших окон на столько incr().
+_SWEEP_EVERY = 1_000
+
+_SYNC_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    ttl = tonumber(ARGV[2])
+end
+return {count, ttl}
+"""
+
+
+@dataclass(slots=True)
+class _Window:
+    ends_at: float
+    synced: int = 0
+    pending: int = 0
+    # Хиты, которые прямо сейчас отправляются в Redis (синхронизация идёт).
+    in_flight: int = 0
+    syncing: bool = False
+    synced_at: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.synced + self.in_flight + self.pending
+
+
+class BatchedRedisStorage(Storage):
+    # Схемы URI, по которым limits находит этот класс (storage_from_string).
+    STORAGE_SCHEME = ["batched+redis", "batched+rediss"]  # noqa: RUF012
+
+    def __init__(
+        self,
+        uri: str | None = None,
+        wrap_exceptions: bool = False,
+        *,
+        sync_batch: int | str = 10,
+        sync_interval: float | str = 1.0,
+        client: redis.Redis | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        **options: float | str | bool,
+    ) -> None:
+        super().__init__(uri, wrap_exceptions, **options)
+        self._url = (uri or "batched+redis://localhost:6379/0").removeprefix("batched+")
+        self._client = client
+        self._sync_batch = max(1, int(sync_batch))
+        self._sync_interval = float(sync_interval)
+        self._clock = clock
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._script = None
+        # До этого момента (по clock) Redis считаем недоступным.
+        self._down_until = 0.0
+
+    @property
+    def base_exceptions(self) -> type[Exception] | tuple[type[Exception], ...]:
+        return redis.RedisError
+
+    @property
+    def _redis(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._url, socket_timeout=0.5)
+        return self._client
+
+    # ---------- limits.Storage ----------
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        with self._lock:
+            now = self._clock()
+            self._calls += 1
+            if self._calls % _SWEEP_EVERY == 0:
+                self._sweep(now)
+            window = self._windows.get(key)
+            fresh = window is None or window.ends_at <= now
+            if window is None or fresh:
+                # Новое окно: чужие хиты неизвестны — сразу в Redis.
+                window = self._windows[key] = _Window(ends_at=now + expiry)
+            window.pending += amount
+            due = (
+                fresh
+                or window.pending >= self._sync_batch
+                or now - window.synced_at >= self._sync_interval
+            )
+            if window.syncing or not due or now < self._down_until:
+                return window.count
+            sent, window.in_flight, window.pending = window.pending, window.pending, 0
+            window.syncing, window.synced_at = True, now
+
+        # Сеть — в потоке вызывающего: этот хит ждёт Redis, остальные нет.
+        result = self._push(key, sent, expiry)
+
+        with self._lock:
+            window.syncing = False
+            window.in_flight = 0
+            if result is None:
+                # pending уйдёт со следующей синхронизацией.
+                window.pending += sent
+                self._down_until = self._clock() + self._sync_interval
+            else:
+                count, ttl_ms = result
+                window.synced = count
+                window.ends_at = self._clock() + ttl_ms / 1000
+            return window.count
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.ends_at <= self._clock():
+                return 0
+            return window.count
+
+    def get_expiry(self, key: str) -> float:
+        """Конец окна в unix-времени (как у остальных storage limits)."""
+        with self._lock:
+            now = self._clock()
+            window = self._windows.get(key)
+            remaining = 0.0 if window is None else max(0.0, window.ends_at - now)
+        return time.time() + remaining
+
+    def check(self) -> bool:
+        try:
+            return bool(self._redis.ping())
+        except redis.RedisError:
+            return False
+
+    def reset(self) -> int | None:
+        with self._lock:
+            self._windows.clear()
+        keys = list(self._redis.scan_iter(match=f"{_PREFIX}*"))
+        return self._redis.delete(*keys) if keys else 0
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+        self._redis.delete(_PREFIX + key)
+
+    # ---------- синхронизация ----------
+
+    def _push(self, key: str, amount: int, expiry: int) -> tuple[int, int] | None:
+        """INCRBY накопленного в Redis; (глобальный счётчик, остаток окна в мс) или None."""
+        try:
+            if self._script is None:
+                self._script = self._redis.register_script(_SYNC_SCRIPT)
+            count, ttl_ms = self._script(keys=[_PREFIX + key], args=[amount, expiry * 1000])
+        except redis.RedisError as exc:
+            # Считаем локально, пока Redis не вернётся.
+            _log.warning("rate_limit_sync_failed", error=str(exc))
+            return None
+        return int(count), int(ttl_ms)
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, window in self._windows.items() if window.ends_at <= now]
+        for key in expired:
+            del self._windows[key]
@@ -0,0 +1,35 @@
+"""Общий Redis-клиент приложения (REDIS_URL).
+
+Клиенты создаются лениво, при первом обращении: пока Redis-бэкенды
+выключены (IDEMPOTENCY_BACKEND=postgres), API к Redis не подключается.
+Пул соединений живёт внутри клиента redis-py — один клиент на процесс.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> aioredis.Redis:
+    return aioredis.Redis.from_url(settings.REDIS_URL)
+
+
+async def close_redis() -> None:
+    """Закрывает созданные клиенты (lifespan shutdown); несозданные не трогает."""
+    if get_redis.cache_info().currsize:
+        get_redis().close()
+        get_redis.cache_clear()
+    if get_async_redis.cache_info().currsize:
+        await get_async_redis().aclose()
+        get_async_redis.cache_clear()
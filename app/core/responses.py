@@ -0,0 +1,62 @@
+"""Классы JSON-ответов API.
+
+Путь ответа FastAPI по умолчанию: response_model → dump в python-объекты
+→ stdlib json.dumps. На страницах `/requests` это главный потребитель CPU.
+
+- default_response_class() — ORJSONResponse (JSON_RESPONSE=orjson и orjson
+  установлен) или стандартный JSONResponse; им же строятся problem+json.
+- ModelResponse — уже готовая pydantic-модель (Page[RequestRead], DTO)
+  сериализуется pydantic-core напрямую через model_dump_json, без прохода
+  по response_model и без промежуточных dict. exclude — проекция полей.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import cache
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from pydantic.main import IncEx
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+_log = get_logger("responses")
+
+
+@cache
+def default_response_class() -> type[JSONResponse]:
+    if settings.JSON_RESPONSE == "std":
+        return JSONResponse
+    try:
+        import orjson  # noqa: F401
+    except ImportError as exc:
+        _log.warning("orjson_missing", error=str(exc))
+        return JSONResponse
+    return ORJSONResponse
+
+
+class ModelResponse(Response):
+    """JSON-ответ из pydantic-модели: model_dump_json → bytes."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: BaseModel,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        background: BackgroundTask | None = None,
+        exclude: IncEx | None = None,
+    ) -> None:
+        # render() вызывается из super().__init__ — exclude нужен до него.
+        self._exclude = exclude
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        return content.model_dump_json(exclude=self._exclude).encode("utf-8")
@@ -1,11 +1,17 @@
-"""Аутентификация и авторизация по API-ключу через UoW."""
+"""Аутентификация и авторизация по API-ключу через UoW.
+
+*_async-зависимости — то же самое для DB_STACK=async (AsyncSqlAlchemyUnitOfWork).
+argon2 в обоих стеках идёт через app.core.argon2_pool.
+"""
 
 from __future__ import annotations
 
 from fastapi import Depends
 from fastapi.security import APIKeyHeader
 
-from app.core.deps import get_uow
+from app.core.argon2_pool import argon2_pool
+from app.core.auth_cache import verified_key_cache
+from app.core.deps import get_async_uow, get_uow
 from app.core.enums import UserRole
 from app.core.exceptions import (
     AdminOnly,
@@ -22,34 +28,63 @@ from app.core.hashing import (
 )
 from app.core.logging import get_logger, user_id_ctx
 from app.models.user import User
-from app.uow import SqlAlchemyUnitOfWork
+from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
 
 api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 _log = get_logger("auth")
 
 
 def _authenticate(uow: SqlAlchemyUnitOfWork, raw_key: str) -> User | None:
-    """Находит пользователя по сырому API-ключу через prefix + argon2.verify."""
+    """Находит пользователя по сырому API-ключу через prefix + argon2.verify.
+
+    Ранее проверенные ключи берутся из verified_key_cache: пользователь
+    читается по PK, argon2 пропускается, если хеш в БД не менялся.
+    """
+    cached = verified_key_cache.get(raw_key)
+    if cached is not None:
+        user_id, key_hash = cached
+        user = uow.users.get(user_id)
+        if user is not None and user.api_key_hash == key_hash:
+            return user
+        verified_key_cache.discard(raw_key)
+
     prefix = extract_prefix(raw_key)
     candidates = uow.users.get_by_api_key_prefix(prefix)
 
     for user in candidates:
-        if verify_api_key(raw_key, user.api_key_hash):
-            if needs_rehash(user.api_key_hash):
-                user.api_key_hash = hash_api_key(raw_key)
+        if argon2_pool.run("verify", verify_api_key, raw_key, user.api_key_hash):
+            # Read-only UoW (GET на реплике) не пишет: rehash дождётся записи.
+            if needs_rehash(user.api_key_hash) and not uow.read_only:
+                user.api_key_hash = argon2_pool.run("rehash", hash_api_key, raw_key)
                 uow.commit()
+            verified_key_cache.put(raw_key, user_id=user.id, api_key_hash=user.api_key_hash)
             return user
     return None
 
 
-def get_current_user(
-    uow: SqlAlchemyUnitOfWork = Depends(get_uow),
-    api_key: str | None = Depends(api_key_scheme),
-) -> User:
-    if not api_key:
-        raise MissingApiKey()
+async def _authenticate_async(uow: AsyncSqlAlchemyUnitOfWork, raw_key: str) -> User | None:
+    cached = verified_key_cache.get(raw_key)
+    if cached is not None:
+        user_id, key_hash = cached
+        user = await uow.users.get(user_id)
+        if user is not None and user.api_key_hash == key_hash:
+            return user
+        verified_key_cache.discard(raw_key)
+
+    prefix = extract_prefix(raw_key)
+    candidates = await uow.users.get_by_api_key_prefix(prefix)
 
-    user = _authenticate(uow, api_key)
+    for user in candidates:
+        if await argon2_pool.arun("verify", verify_api_key, raw_key, user.api_key_hash):
+            if needs_rehash(user.api_key_hash) and not uow.read_only:
+                user.api_key_hash = await argon2_pool.arun("rehash", hash_api_key, raw_key)
+                await uow.commit()
+            verified_key_cache.put(raw_key, user_id=user.id, api_key_hash=user.api_key_hash)
+            return user
+    return None
+
+
+def _accept(user: User | None) -> User:
     if user is None:
         _log.warning("invalid_api_key_attempt")
         raise InvalidApiKey()
@@ -61,16 +96,52 @@ def get_current_user(
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role != UserRole.ADMIN:
+def _require_admin(user: User) -> User:
+    if user.role != UserRole.ADMIN:
         raise AdminOnly()
-    return current_user
+    return user
 
 
-def require_agent_or_admin(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role not in {UserRole.ADMIN, UserRole.AGENT}:
+def _require_agent_or_admin(user: User) -> User:
+    if user.role not in {UserRole.ADMIN, UserRole.AGENT}:
         raise AgentOrAdminOnly()
-    return current_user
+    return user
+
+
+def get_current_user(
+    uow: SqlAlchemyUnitOfWork = Depends(get_uow),
+    api_key: str | None = Depends(api_key_scheme),
+) -> User:
+    if not api_key:
+        raise MissingApiKey()
+    return _accept(_authenticate(uow, api_key))
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    return _require_admin(current_user)
+
+
+def require_agent_or_admin(current_user: User = Depends(get_current_user)) -> User:
+    return _require_agent_or_admin(current_user)
+
+
+async def get_current_user_async(
+    uow: AsyncSqlAlchemyUnitOfWork = Depends(get_async_uow),
+    api_key: str | None = Depends(api_key_scheme),
+) -> User:
+    if not api_key:
+        raise MissingApiKey()
+    return _accept(await _authenticate_async(uow, api_key))
+
+
+async def require_admin_async(current_user: User = Depends(get_current_user_async)) -> User:
+    return _require_admin(current_user)
+
+
+async def require_agent_or_admin_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    return _require_agent_or_admin(current_user)
 
 
 # Обратная совместимость: код, которому нужна просто Session (например, роуты,
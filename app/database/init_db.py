@@ -1,7 +1,9 @@
 from app.database.base import Base  # noqa
 from app.models.idempotency import IdempotencyKey  # noqa: F401
 from app.models.outbox import OutboxEvent  # noqa: F401
+from app.models.outbox_dead_letter import OutboxDeadLetter  # noqa: F401
 from app.models.request import ServiceRequest  # noqa: F401
+from app.models.request_counter import RequestCounter  # noqa: F401
 from app.models.request_log import RequestLog  # noqa: F401
 from app.models.user import User  # noqa: F401
 
@@ -0,0 +1,190 @@
+"""Декларативное партиционирование по времени (RANGE по timestamp-колонке).
+
+Таблица заранее разбита на партиции по дням/неделям/месяцам; воркер
+периодически:
+    - создаёт партиции на несколько периодов вперёд (create_partitions);
+    - отцепляет и удаляет партиции, целиком ушедшие за окно хранения
+      (drop_expired_partitions).
+
+Удаление старых данных — DROP партиции вместо DELETE + VACUUM по
+большой таблице: ни мёртвых кортежей, ни раздувания индексов.
+
+Имя партиции — <table>_pYYYYMMDD (начало периода). Верхнюю границу
+читаем из каталога (pg_get_expr(relpartbound)), а не из имени, — так
+же обрабатывается и legacy-партиция, оставшаяся после онлайн-миграции.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.logging import get_logger
+
+_log = get_logger("partitioning")
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+class PartitionInterval(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionRange:
+    name: str
+    start: date
+    end: date
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionInfo:
+    name: str
+    upper: datetime | None  # None — DEFAULT или TO (MAXVALUE)
+    is_default: bool = False
+
+
+def period_start(day: date, interval: PartitionInterval) -> date:
+    if interval is PartitionInterval.WEEK:
+        return day - timedelta(days=day.weekday())
+    if interval is PartitionInterval.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, interval: PartitionInterval) -> date:
+    if interval is PartitionInterval.WEEK:
+        return start + timedelta(days=7)
+    if interval is PartitionInterval.MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(table: str, start: date) -> str:
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def planned_partitions(
+    table: str, interval: PartitionInterval, today: date, ahead: int
+) -> list[PartitionRange]:
+    """Текущий период и ahead следующих — то, что должно существовать."""
+    ranges = []
+    start = period_start(today, interval)
+    for _ in range(ahead + 1):
+        end = next_period(start, interval)
+        ranges.append(PartitionRange(partition_name(table, start), start, end))
+        start = end
+    return ranges
+
+
+def parse_upper_bound(bound: str) -> datetime | None:
+    """Верхняя граница из pg_get_expr(relpartbound): "FOR VALUES FROM (...) TO ('...')"."""
+    match = _UPPER_BOUND.search(bound)
+    return datetime.fromisoformat(match.group(1)) if match else None
+
+
+def list_partitions(conn: Connection, table: str) -> list[PartitionInfo]:
+    rows = conn.execute(
+        text(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:table AS regclass)
+            ORDER BY c.relname
+            """
+        ),
+        {"table": table},
+    ).all()
+    return [
+        PartitionInfo(name, parse_upper_bound(bound), is_default=bound == "DEFAULT")
+        for name, bound in rows
+    ]
+
+
+def create_partitions(
+    conn: Connection,
+    table: str,
+    *,
+    interval: PartitionInterval,
+    today: date,
+    ahead: int,
+) -> list[str]:
+    """Создаёт недостающие партиции; возвращает имена созданных.
+
+    Периоды, начинающиеся раньше верхней границы уже существующих
+    партиций (например, legacy-партиции после миграции), пропускаются —
+    их строки лежат там или в DEFAULT. Если диапазон уже занят строками
+    в DEFAULT, партиция не создаётся: ошибка логируется, остальные
+    продолжают создаваться.
+    """
+    partitions = list_partitions(conn, table)
+    existing = {p.name for p in partitions}
+    covered_until = max((p.upper for p in partitions if p.upper is not None), default=None)
+    created = []
+    for part in planned_partitions(table, interval, today, ahead):
+        if part.name in existing:
+            continue
+        if covered_until is not None and datetime.combine(part.start, time()) < covered_until:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(
+                    text(
+                        f'CREATE TABLE "{part.name}" PARTITION OF "{table}" '
+                        f"FOR VALUES FROM ('{part.start.isoformat()}') TO ('{part.end.isoformat()}')"
+                    )
+                )
+        except DBAPIError as exc:
+            _log.warning("partition_create_failed", partition=part.name, error=str(exc.orig))
+            continue
+        created.append(part.name)
+    return created
+
+
+def drop_expired_partitions(
+    conn: Connection,
+    table: str,
+    *,
+    column: str,
+    before: datetime,
+    keep_if: str | None = None,
+) -> list[str]:
+    """DETACH + DROP партиций, чья верхняя граница не позже before.
+
+    keep_if — SQL-условие: если в партиции есть хоть одна такая строка
+    (например, «processed_at IS NULL»), партиция остаётся до следующего раза.
+    Из DEFAULT-партиции (туда попадает то, на что не нашлось партиции)
+    просроченные строки удаляются DELETE'ом — обычно она пуста.
+    """
+    # Имена партиций — из pg_catalog, column/keep_if — константы вызывающего
+    # кода, не пользовательский ввод; отсюда f-строки в SQL.
+    dropped = []
+    for part in list_partitions(conn, table):
+        if part.is_default:
+            keep = f" AND NOT ({keep_if})" if keep_if is not None else ""
+            conn.execute(
+                text(f'DELETE FROM "{part.name}" WHERE "{column}" < :before{keep}'),  # noqa: S608
+                {"before": before},
+            )
+            continue
+        if part.upper is None or part.upper > before:
+            continue
+        if keep_if is not None:
+            pending = conn.execute(
+                text(f'SELECT EXISTS (SELECT 1 FROM "{part.name}" WHERE {keep_if})')  # noqa: S608
+            ).scalar_one()
+            if pending:
+                _log.info("partition_kept", partition=part.name, reason=keep_if)
+                continue
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{part.name}"'))
+        conn.execute(text(f'DROP TABLE "{part.name}"'))
+        dropped.append(part.name)
+    return dropped
@@ -0,0 +1,140 @@
+"""Маршрутизация чтений на реплику с read-your-writes по LSN.
+
+GET/HEAD получают read-only Unit of Work (app.core.deps): на реплике, если
+задан DATABASE_URL_REPLICA, иначе — на primary в READ ONLY транзакции.
+
+Staleness guard. После commit пишущего запроса клиент получает LSN primary
+(pg_current_wal_lsn): заголовок X-DB-LSN и cookie sf_lsn на
+REPLICA_READ_YOUR_WRITES_SECONDS. Чтение, пришедшее с этим LSN (заголовком
+или cookie), идёт в реплику, только если она уже проиграла WAL до него,
+иначе — в primary. Без LSN (давно не писал, другой клиент) — сразу в реплику.
+
+Одна БД, указанная и как primary, и как реплика, — рабочая конфигурация:
+pg_is_in_recovery() = false, и LSN сравнивается с pg_current_wal_lsn().
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import db_read_route_total
+from app.database.session import (
+    AsyncReadOnlySessionLocal,
+    AsyncReplicaSessionLocal,
+    ReadOnlySessionLocal,
+    ReplicaSessionLocal,
+    async_replica_engine,
+    replica_engine,
+)
+
+_log = get_logger("replica")
+
+F = TypeVar("F")
+
+LSN_HEADER = "X-DB-LSN"
+LSN_COOKIE = "sf_lsn"
+
+_READ_METHODS = frozenset({"GET", "HEAD"})
+# Текстовый pg_lsn: два hex-числа до 32 бит через «/».
+_LSN_RE = re.compile(r"[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}")
+
+CURRENT_LSN = text("SELECT pg_current_wal_lsn()::text")
+_CAUGHT_UP = text(
+    "SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() "
+    "ELSE pg_current_wal_lsn() END >= CAST(:lsn AS pg_lsn)"
+)
+
+
+def is_read_request(request: Request) -> bool:
+    return request.method in _READ_METHODS
+
+
+def client_lsn(request: Request) -> str | None:
+    """LSN последней записи клиента: заголовок приоритетнее cookie; мусор игнорируем."""
+    raw = request.headers.get(LSN_HEADER) or request.cookies.get(LSN_COOKIE)
+    if raw and _LSN_RE.fullmatch(raw.strip()):
+        return raw.strip()
+    return None
+
+
+def remember_lsn(response: Response, lsn: str) -> None:
+    response.headers[LSN_HEADER] = lsn
+    response.set_cookie(
+        LSN_COOKIE,
+        lsn,
+        max_age=settings.REPLICA_READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite="lax",
+        secure=settings.is_prod,
+    )
+
+
+def lsn_tracker(response: Response) -> Callable[[Session], None] | None:
+    """after_commit-хук пишущего UoW: отдаёт клиенту LSN primary. Без реплики — не нужен."""
+    if replica_engine is None:
+        return None
+
+    def track(session: Session) -> None:
+        remember_lsn(response, session.execute(CURRENT_LSN).scalar_one())
+
+    return track
+
+
+def async_lsn_tracker(response: Response) -> Callable[[AsyncSession], Awaitable[None]] | None:
+    if async_replica_engine is None:
+        return None
+
+    async def track(session: AsyncSession) -> None:
+        remember_lsn(response, (await session.execute(CURRENT_LSN)).scalar_one())
+
+    return track
+
+
+def read_session_factory(lsn: str | None) -> sessionmaker:
+    """Фабрика read-only сессий: реплика, если она догнала LSN клиента."""
+    if ReplicaSessionLocal is None or replica_engine is None:
+        return ReadOnlySessionLocal
+    if lsn is None:
+        db_read_route_total.labels(target="replica", reason="no_lsn").inc()
+        return ReplicaSessionLocal
+    try:
+        with replica_engine.connect() as conn:
+            caught_up = bool(conn.execute(_CAUGHT_UP, {"lsn": lsn}).scalar())
+    except SQLAlchemyError as exc:
+        _log.warning("replica_lag_check_failed", error=str(exc))
+        caught_up = False
+    return _route(caught_up, ReplicaSessionLocal, ReadOnlySessionLocal)
+
+
+async def async_read_session_factory(lsn: str | None) -> async_sessionmaker:
+    if AsyncReplicaSessionLocal is None or async_replica_engine is None:
+        return AsyncReadOnlySessionLocal
+    if lsn is None:
+        db_read_route_total.labels(target="replica", reason="no_lsn").inc()
+        return AsyncReplicaSessionLocal
+    try:
+        async with async_replica_engine.connect() as conn:
+            caught_up = bool((await conn.execute(_CAUGHT_UP, {"lsn": lsn})).scalar())
+    except SQLAlchemyError as exc:
+        _log.warning("replica_lag_check_failed", error=str(exc))
+        caught_up = False
+    return _route(caught_up, AsyncReplicaSessionLocal, AsyncReadOnlySessionLocal)
+
+
+def _route(caught_up: bool, replica: F, primary: F) -> F:
+    if caught_up:
+        db_read_route_total.labels(target="replica", reason="caught_up").inc()
+        return replica
+    db_read_route_total.labels(target="primary", reason="stale").inc()
+    return primary
@@ -5,24 +5,78 @@
     pool_pre_ping=True — отсеивает мёртвые коннекты после простоя/рестартов БД;
     pool_recycle=1800 — защита от idle-timeout у Postgres/pgbouncer (часто 30–60 мин);
     pool_timeout=10 — быстрый fail вместо длинного ожидания.
+
+async_engine — та же БД (psycopg 3 умеет и sync, и asyncio) и те же
+параметры пула; используется при DB_STACK=async. Пулы независимы, но
+соединения открываются лениво — неиспользуемый стек их не держит.
+expire_on_commit=False: в async обращение к «протухшему» атрибуту после
+commit — неявный IO (MissingGreenlet), поэтому после commit объекты
+обновляем явно через refresh().
+
+Read-only фабрики — для GET/HEAD (см. app.database.replica). Транзакции
+открываются как READ ONLY (postgresql_readonly), так что запись из
+обработчика чтения падает сразу, а не уходит на реплику. replica_engine
+и Replica*SessionLocal есть, только если задан DATABASE_URL_REPLICA;
+иначе чтения идут в primary через ReadOnly*SessionLocal.
 """
 
 from __future__ import annotations
 
+from typing import Any
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(
-    settings.db_url,
-    echo=False,
-    pool_size=10,
-    max_overflow=10,
-    pool_pre_ping=True,
-    pool_recycle=1800,
-    pool_timeout=10,
-    future=True,
-)
+_POOL: dict[str, Any] = {
+    "pool_size": 10,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "pool_timeout": 10,
+}
+_READ_ONLY: dict[str, Any] = {"postgresql_readonly": True}
+
+engine = create_engine(settings.db_url, echo=False, future=True, **_POOL)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReadOnlySessionLocal = sessionmaker(
+    bind=engine.execution_options(**_READ_ONLY), autoflush=False, autocommit=False
+)
+
+async_engine = create_async_engine(settings.async_db_url, echo=False, **_POOL)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadOnlySessionLocal = async_sessionmaker(
+    bind=async_engine.execution_options(**_READ_ONLY), autoflush=False, expire_on_commit=False
+)
+
+replica_engine = (
+    create_engine(settings.replica_db_url, echo=False, future=True, **_POOL)
+    if settings.replica_db_url
+    else None
+)
+ReplicaSessionLocal = (
+    sessionmaker(
+        bind=replica_engine.execution_options(**_READ_ONLY), autoflush=False, autocommit=False
+    )
+    if replica_engine is not None
+    else None
+)
+
+async_replica_engine = (
+    create_async_engine(settings.async_replica_db_url, echo=False, **_POOL)
+    if settings.async_replica_db_url
+    else None
+)
+AsyncReplicaSessionLocal = (
+    async_sessionmaker(
+        bind=async_replica_engine.execution_options(**_READ_ONLY),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    if async_replica_engine is not None
+    else None
+)
@@ -0,0 +1,111 @@
+"""Денормализованные счётчики заявок: какие ключи затрагивает заявка.
+
+Очередь, «назначенные на меня» и фильтр по статусу поллятся фронтом
+постоянно; COUNT(*) по индексу на каждом поллинге — лишняя нагрузка.
+Поэтому сервис в той же транзакции, что и бизнес-изменение, двигает
+счётчики в таблице request_counters, а репозиторий читает их за O(1).
+
+Модуль чистый: по снимку заявки «до» и «после» он считает, какие
+счётчики и на сколько изменить. Никакого I/O — гоняется юнит-тестами.
+
+Ключ счётчика — пара (scope, scope_key):
+    ("all", "")              — все заявки
+    ("status", "<STATUS>")   — заявки в статусе
+    ("assignee", "<id>")     — заявки, назначенные на пользователя
+    ("creator", "<id>")      — заявки, созданные пользователем
+    ("queue", "")            — очередь: NEW без исполнителя
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+
+from app.core.enums import RequestStatus
+
+
+class CounterScope(str, Enum):
+    ALL = "all"
+    STATUS = "status"
+    ASSIGNEE = "assignee"
+    CREATOR = "creator"
+    QUEUE = "queue"
+
+
+CounterKey = tuple[str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class RequestSnapshot:
+    """Поля заявки, от которых зависят счётчики."""
+
+    status: RequestStatus
+    created_by_user_id: int
+    assigned_to_user_id: int | None
+
+
+def counter_key(scope: CounterScope, scope_key: object = "") -> CounterKey:
+    if isinstance(scope_key, Enum):
+        scope_key = scope_key.value
+    return scope.value, str(scope_key)
+
+
+def counter_keys(snapshot: RequestSnapshot) -> set[CounterKey]:
+    """Все счётчики, в которые входит заявка в данном состоянии."""
+    keys = {
+        counter_key(CounterScope.ALL),
+        counter_key(CounterScope.STATUS, snapshot.status),
+        counter_key(CounterScope.CREATOR, snapshot.created_by_user_id),
+    }
+    if snapshot.assigned_to_user_id is not None:
+        keys.add(counter_key(CounterScope.ASSIGNEE, snapshot.assigned_to_user_id))
+    elif snapshot.status == RequestStatus.NEW:
+        keys.add(counter_key(CounterScope.QUEUE))
+    return keys
+
+
+def counter_deltas(
+    before: RequestSnapshot | None, after: RequestSnapshot | None
+) -> dict[CounterKey, int]:
+    """Изменения счётчиков при переходе заявки из before в after.
+
+    before=None — заявка создаётся, after=None — удаляется.
+    Ключи с нулевой дельтой в результат не попадают.
+    """
+    deltas: Counter[CounterKey] = Counter()
+    if after is not None:
+        deltas.update(counter_keys(after))
+    if before is not None:
+        deltas.subtract(counter_keys(before))
+    return {key: delta for key, delta in deltas.items() if delta != 0}
+
+
+def counter_key_for_filters(
+    *,
+    status: RequestStatus | None = None,
+    created_by_id: int | None = None,
+    assigned_to_id: int | None = None,
+    has_date_filter: bool = False,
+) -> CounterKey | None:
+    """Счётчик, который точно отвечает на COUNT с такими фильтрами.
+
+    Счётчики одномерные: комбинацию фильтров или диапазон дат они не
+    покрывают — тогда None, и репозиторий идёт честным COUNT(*).
+    """
+    if has_date_filter:
+        return None
+    filters = [
+        (scope, value)
+        for scope, value in (
+            (CounterScope.STATUS, status),
+            (CounterScope.CREATOR, created_by_id),
+            (CounterScope.ASSIGNEE, assigned_to_id),
+        )
+        if value is not None
+    ]
+    if not filters:
+        return counter_key(CounterScope.ALL)
+    if len(filters) == 1:
+        return counter_key(*filters[0])
+    return None
@@ -8,8 +8,9 @@ from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from slowapi.middleware import SlowAPIASGIMiddleware
 
+from app.core.argon2_pool import argon2_pool
 from app.core.config import settings
 from app.core.errors import (
     domain_exception_handler,
@@ -23,12 +24,14 @@ from app.core.logging import configure_logging, get_logger
 from app.core.metrics import build_instrumentator
 from app.core.middleware import RequestContextMiddleware, SecurityHeadersMiddleware
 from app.core.rate_limit import limiter, rate_limit_exceeded_handler
+from app.core.redis import close_redis
+from app.core.responses import default_response_class
 from app.core.tracing import setup_tracing
 from app.database.init_db import init_db
-from app.database.session import engine
+from app.database.replica import LSN_HEADER
+from app.database.session import async_engine, async_replica_engine, engine, replica_engine
+from app.routers import requests, requests_async, users, users_async
 from app.routers.health import router as health_router
-from app.routers.requests import router as requests_router
-from app.routers.users import router as users_router
 
 configure_logging()
 _log = get_logger("startup")
@@ -39,9 +42,18 @@ async def lifespan(app: FastAPI):
     _log.info("app_starting", app_name=settings.APP_NAME)
     wait_for_database()
     init_db()
-    _log.info("app_ready")
+    _log.info(
+        "app_ready", db_stack=settings.DB_STACK, read_replica=settings.replica_db_url is not None
+    )
     yield
     _log.info("app_stopping")
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+    if replica_engine is not None:
+        replica_engine.dispose()
+    argon2_pool.shutdown()
+    await close_redis()
 
 
 _DESCRIPTION = """
@@ -73,6 +85,7 @@ app = FastAPI(
     contact={"name": "ServiceFlow Team", "email": "ops@serviceflow.local"},
     license_info={"name": "MIT"},
     lifespan=lifespan,
+    default_response_class=default_response_class(),
     docs_url="/docs" if settings.docs_enabled else None,
     redoc_url="/redoc" if settings.docs_enabled else None,
     openapi_url="/openapi.json" if settings.docs_enabled else None,
@@ -93,11 +106,13 @@ app.add_middleware(
         "X-Bootstrap-Key",
         "Idempotency-Key",
         "If-Match",
+        "If-None-Match",
+        LSN_HEADER,
     ],
-    expose_headers=["X-Request-ID", "ETag"],
+    expose_headers=["X-Request-ID", "ETag", LSN_HEADER],
     max_age=600,
 )
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(SlowAPIASGIMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RequestContextMiddleware)
 
@@ -117,9 +132,15 @@ app.include_router(health_router)
 # Доменные роуты — под /api/v1. Будущая v2 сможет жить параллельно.
 from fastapi import APIRouter  # noqa: E402
 
+# DB_STACK выбирает реализацию доменных роутов: sync (def + Session в
+# threadpool) или async (async def + AsyncSession). Контракт API один.
 api_v1 = APIRouter(prefix="/api/v1")
-api_v1.include_router(users_router)
-api_v1.include_router(requests_router)
+if settings.DB_STACK == "async":
+    api_v1.include_router(users_async.router)
+    api_v1.include_router(requests_async.router)
+else:
+    api_v1.include_router(users.router)
+    api_v1.include_router(requests.router)
 app.include_router(api_v1)
 
 # Prometheus /metrics
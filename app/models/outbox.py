@@ -1,31 +1,56 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Index, String
+from sqlalchemy import DateTime, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database.base import Base
 
+# Канал Postgres NOTIFY: вставка события будит воркер без поллинга.
+OUTBOX_NOTIFY_CHANNEL = "outbox_events"
+
 
 class OutboxEvent(Base):
     """Outbox — атомарно пишется в транзакции с бизнес-операцией.
 
     Воркер отдельным процессом забирает processed_at IS NULL,
-    публикует наружу и помечает.
+    публикует наружу и помечает. Неудачная публикация откладывает событие
+    до next_attempt_at (экспоненциальный backoff); после
+    OUTBOX_MAX_ATTEMPTS попыток оно уходит в outbox_dead_letters.
+
+    Таблица партиционирована по created_at (RANGE, см.
+    app.database.partitioning): старые обработанные события удаляются
+    DROP'ом партиции, поэтому created_at входит в первичный ключ.
     """
 
     __tablename__ = "outbox_events"
     __table_args__ = (
-        # Под горячий запрос воркера: processed_at IS NULL ORDER BY created_at.
+        # Под горячий запрос воркера: processed_at IS NULL ORDER BY created_at;
+        # next_attempt_at в ключе — фильтр отложенных событий прямо по индексу.
         Index(
             "ix_outbox_events_pending",
             "created_at",
+            "next_attempt_at",
             postgresql_where="processed_at IS NULL",
         ),
+        # Маленький индекс только по отложенным событиям: по нему fetch_pending
+        # проверяет, не ждёт ли ретрая более раннее событие той же заявки.
+        Index(
+            "ix_outbox_events_retrying_request",
+            text("(payload ->> 'request_id')"),
+            "created_at",
+            postgresql_where="processed_at IS NULL AND next_attempt_at IS NOT NULL",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     event_type: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow, nullable=False
+    )
     processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.base import Base
+
+
+class RequestCounter(Base):
+    """Денормализованные счётчики заявок (см. app.domain.request_counters).
+
+    Каждый логический счётчик (scope, scope_key) разбит на несколько
+    слотов: конкурентные транзакции инкрементят случайный слот, а не одну
+    горячую строку, — так не выстраиваются в очередь на row-lock'е.
+    Значение счётчика — сумма value по слотам.
+    """
+
+    __tablename__ = "request_counters"
+
+    scope: Mapped[str] = mapped_column(String(20), primary_key=True)
+    scope_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    slot: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,15 +1,27 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database.base import Base
 
 
 class RequestLog(Base):
+    """Журнал заявки: строка на создание и на каждое изменение.
+
+    Таблица партиционирована помесячно по timestamp (RANGE, см.
+    app.database.partitioning): партиции вперёд создаёт воркер, поэтому
+    timestamp входит в первичный ключ.
+    """
+
     __tablename__ = "request_logs"
+    __table_args__ = (
+        # История заявки: request_id + seek по timestamp внутри каждой партиции.
+        Index("ix_request_logs_request_timestamp", "request_id", "timestamp"),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     request_id: Mapped[int] = mapped_column(ForeignKey("service_requests.id"), nullable=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -22,7 +34,9 @@ class RequestLog(Base):
     comment: Mapped[str | None] = mapped_column(String(500), nullable=True)
     source: Mapped[str] = mapped_column(String(20), nullable=False, default="API")
 
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow, nullable=False
+    )
 
     request = relationship("ServiceRequest")
     user = relationship("User")
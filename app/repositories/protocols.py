@@ -7,10 +7,14 @@
 
 from __future__ import annotations
 
+from collections.abc import Collection
 from datetime import datetime
-from typing import Protocol, runtime_checkable
+from typing import Any, Protocol, runtime_checkable
+
+from sqlalchemy import Row
 
 from app.core.enums import RequestStatus
+from app.domain.request_counters import CounterKey
 from app.models.request import ServiceRequest
 from app.models.request_log import RequestLog
 from app.models.user import User
@@ -24,12 +28,15 @@ class UserRepository(Protocol):
     def list(self, *, limit: int, offset: int) -> list[User]: ...
     def count(self) -> int: ...
     def any_admin(self) -> bool: ...
+    def existing_ids(self, user_ids: Collection[int]) -> set[int]: ...
     def add(self, user: User) -> User: ...
 
 
 @runtime_checkable
 class RequestRepository(Protocol):
     def get(self, request_id: int) -> ServiceRequest | None: ...
+    def get_for_update(self, request_id: int) -> ServiceRequest | None: ...
+    def get_many_for_update(self, request_ids: Collection[int]) -> dict[int, ServiceRequest]: ...
     def list(
         self,
         *,
@@ -40,15 +47,37 @@ class RequestRepository(Protocol):
         date_to: datetime | None = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[ServiceRequest]: ...
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
     def list_by_creator(
-        self, creator_id: int, *, limit: int, offset: int
-    ) -> list[ServiceRequest]: ...
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
     def list_by_assignee(
-        self, assignee_id: int, *, limit: int, offset: int
-    ) -> list[ServiceRequest]: ...
-    def list_queue(self, *, limit: int, offset: int) -> list[ServiceRequest]: ...
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
+    def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
     def add(self, request: ServiceRequest) -> ServiceRequest: ...
+    def add_many(self, values: list[dict[str, Any]]) -> list[Row[Any]]: ...
     def count(
         self,
         *,
@@ -57,13 +86,129 @@ class RequestRepository(Protocol):
         assigned_to_id: int | None = None,
         date_from: datetime | None = None,
         date_to: datetime | None = None,
+        estimate: bool = False,
     ) -> int: ...
-    def count_by_creator(self, creator_id: int) -> int: ...
-    def count_by_assignee(self, assignee_id: int) -> int: ...
-    def count_queue(self) -> int: ...
+    def count_by_creator(self, creator_id: int, *, estimate: bool = False) -> int: ...
+    def count_by_assignee(self, assignee_id: int, *, estimate: bool = False) -> int: ...
+    def count_queue(self, *, estimate: bool = False) -> int: ...
+
+
+@runtime_checkable
+class RequestCounterRepository(Protocol):
+    def apply(self, deltas: dict[CounterKey, int]) -> None: ...
+    def snapshot(self) -> dict[CounterKey, int]: ...
+    def rebuild(self) -> dict[CounterKey, int]: ...
 
 
 @runtime_checkable
 class RequestLogRepository(Protocol):
     def add(self, log: RequestLog) -> RequestLog: ...
-    def list_for_request(self, request_id: int) -> list[RequestLog]: ...
+    def add_many(self, values: list[dict[str, Any]]) -> None: ...
+    def list_for_request(
+        self,
+        request_id: int,
+        *,
+        since: datetime,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[RequestLog]: ...
+
+
+# Async-контракты — для AsyncSqlAlchemyUnitOfWork (DB_STACK=async).
+# Сигнатуры те же, методы — корутины.
+
+
+@runtime_checkable
+class AsyncUserRepository(Protocol):
+    async def get(self, user_id: int) -> User | None: ...
+    async def get_by_email(self, email: str) -> User | None: ...
+    async def get_by_api_key_prefix(self, prefix: str) -> list[User]: ...
+    async def list(self, *, limit: int, offset: int) -> list[User]: ...
+    async def count(self) -> int: ...
+    async def any_admin(self) -> bool: ...
+    async def existing_ids(self, user_ids: Collection[int]) -> set[int]: ...
+    async def add(self, user: User) -> User: ...
+
+
+@runtime_checkable
+class AsyncRequestRepository(Protocol):
+    async def get(self, request_id: int) -> ServiceRequest | None: ...
+    async def get_for_update(self, request_id: int) -> ServiceRequest | None: ...
+    async def get_many_for_update(
+        self, request_ids: Collection[int]
+    ) -> dict[int, ServiceRequest]: ...
+    async def list(
+        self,
+        *,
+        status: RequestStatus | None = None,
+        created_by_id: int | None = None,
+        assigned_to_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
+    async def list_by_creator(
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
+    async def list_by_assignee(
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
+    async def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]: ...
+    async def add(self, request: ServiceRequest) -> ServiceRequest: ...
+    async def add_many(self, values: list[dict[str, Any]]) -> list[Row[Any]]: ...
+    async def count(
+        self,
+        *,
+        status: RequestStatus | None = None,
+        created_by_id: int | None = None,
+        assigned_to_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        estimate: bool = False,
+    ) -> int: ...
+    async def count_by_creator(self, creator_id: int, *, estimate: bool = False) -> int: ...
+    async def count_by_assignee(self, assignee_id: int, *, estimate: bool = False) -> int: ...
+    async def count_queue(self, *, estimate: bool = False) -> int: ...
+
+
+@runtime_checkable
+class AsyncRequestCounterRepository(Protocol):
+    async def apply(self, deltas: dict[CounterKey, int]) -> None: ...
+    async def snapshot(self) -> dict[CounterKey, int]: ...
+    async def rebuild(self) -> dict[CounterKey, int]: ...
+
+
+@runtime_checkable
+class AsyncRequestLogRepository(Protocol):
+    async def add(self, log: RequestLog) -> RequestLog: ...
+    async def add_many(self, values: list[dict[str, Any]]) -> None: ...
+    async def list_for_request(
+        self,
+        request_id: int,
+        *,
+        since: datetime,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[RequestLog]: ...
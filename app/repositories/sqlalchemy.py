@@ -2,23 +2,69 @@
 
 Никаких commit/rollback здесь — транзакция управляется Unit of Work.
 Все репозитории работают в рамках переданной Session.
+
+add() не делает flush: объекты уходят в БД одним flush'ем при commit
+(INSERT'ы одной таблицы ORM склеивает в пачку). Кому нужен id сразу —
+берут его из INSERT ... RETURNING (add_many), а не из промежуточного flush.
+
+Построение запросов вынесено в модульные функции (_filter_requests,
+_counter_upsert, ...): их же использует async-реализация в
+app.repositories.sqlalchemy_async, так что SQL у двух стеков один.
 """
 
 from __future__ import annotations
 
+import random
+from collections.abc import Collection
 from datetime import datetime
-
-from sqlalchemy import desc, func, select
-from sqlalchemy.orm import Session
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Row,
+    Select,
+    String,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Dialect
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql.dml import Delete, ReturningInsert, ReturningUpdate, Update
 
 from app.core.enums import RequestStatus, UserRole
+from app.domain.request_counters import (
+    CounterKey,
+    CounterScope,
+    counter_key,
+    counter_key_for_filters,
+)
 from app.models.idempotency import IdempotencyKey
-from app.models.outbox import OutboxEvent
+from app.models.outbox import OUTBOX_NOTIFY_CHANNEL, OutboxEvent
+from app.models.outbox_dead_letter import OutboxDeadLetter
 from app.models.request import ServiceRequest
+from app.models.request_counter import RequestCounter
 from app.models.request_log import RequestLog
 from app.models.user import User
 
 
+def _existing_user_ids(user_ids: Collection[int]) -> Select[tuple[int]]:
+    return select(User.id).where(User.id.in_(user_ids))
+
+
 class SqlAlchemyUserRepository:
     def __init__(self, session: Session) -> None:
         self._s = session
@@ -45,12 +91,118 @@ class SqlAlchemyUserRepository:
         stmt = select(User.id).where(User.role == UserRole.ADMIN).limit(1)
         return self._s.execute(stmt).first() is not None
 
+    def existing_ids(self, user_ids: Collection[int]) -> set[int]:
+        """Какие из user_ids существуют — одним запросом (проверка исполнителей пачки)."""
+        if not user_ids:
+            return set()
+        return set(self._s.scalars(_existing_user_ids(user_ids)))
+
     def add(self, user: User) -> User:
         self._s.add(user)
-        self._s.flush()
         return user
 
 
+# Колонки read-модели заявки (поля RequestRead). Списки выбирают их в Row —
+# без ORM-сущностей: ни identity map, ни отслеживания изменений.
+_REQUEST_ROW_COLUMNS = (
+    ServiceRequest.id,
+    ServiceRequest.public_id,
+    ServiceRequest.title,
+    ServiceRequest.description,
+    ServiceRequest.status,
+    ServiceRequest.created_by_user_id,
+    ServiceRequest.assigned_to_user_id,
+    ServiceRequest.created_at,
+    ServiceRequest.updated_at,
+)
+# Без них страница не собирается: keyset-курсор (created_at, id) и ETag (id, updated_at).
+_PAGE_KEY_COLUMNS = frozenset({"id", "created_at", "updated_at"})
+
+
+def _request_rows(fields: Collection[str] | None) -> Select[Any]:
+    """SELECT только запрошенных колонок заявки (None — всех полей RequestRead)."""
+    if fields is None:
+        return select(*_REQUEST_ROW_COLUMNS)
+    return select(
+        *(c for c in _REQUEST_ROW_COLUMNS if c.key in fields or c.key in _PAGE_KEY_COLUMNS)
+    )
+
+
+def _insert_requests_returning() -> ReturningInsert[Any]:
+    # sort_by_parameter_order: строки RETURNING в порядке входных values —
+    # при insertmanyvalues (несколько VALUES-пачек) порядок иначе не гарантирован.
+    return insert(ServiceRequest).returning(*_REQUEST_ROW_COLUMNS, sort_by_parameter_order=True)
+
+
+def _requests_for_update(request_ids: Collection[int]) -> Select[tuple[ServiceRequest]]:
+    # Блокировки — в порядке id: две пачки с пересекающимися заявками не
+    # ловят deadlock. populate_existing — свежие значения поверх identity map.
+    return (
+        select(ServiceRequest)
+        .where(ServiceRequest.id.in_(request_ids))
+        .order_by(ServiceRequest.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _newest_first(stmt: Select[Any], after: tuple[datetime, int] | None) -> Select[Any]:
+    """Сортировка «новые сверху» + keyset-seek после позиции (created_at, id).
+
+    id — тай-брейкер для заявок с одинаковым created_at: без него курсор
+    мог бы пропускать или дублировать строки на границе страниц.
+    """
+    if after is not None:
+        stmt = stmt.where(tuple_(ServiceRequest.created_at, ServiceRequest.id) < tuple_(*after))
+    return stmt.order_by(ServiceRequest.created_at.desc(), ServiceRequest.id.desc())
+
+
+def _filter_requests(
+    stmt: Select[Any],
+    *,
+    status: RequestStatus | None,
+    created_by_id: int | None,
+    assigned_to_id: int | None,
+    date_from: datetime | None,
+    date_to: datetime | None,
+) -> Select[Any]:
+    if status is not None:
+        stmt = stmt.where(ServiceRequest.status == status)
+    if created_by_id is not None:
+        stmt = stmt.where(ServiceRequest.created_by_user_id == created_by_id)
+    if assigned_to_id is not None:
+        stmt = stmt.where(ServiceRequest.assigned_to_user_id == assigned_to_id)
+    if date_from is not None:
+        stmt = stmt.where(ServiceRequest.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(ServiceRequest.created_at <= date_to)
+    return stmt
+
+
+def _queue_filter() -> tuple[ColumnElement[bool], ...]:
+    return (
+        ServiceRequest.status == RequestStatus.NEW,
+        ServiceRequest.assigned_to_user_id.is_(None),
+    )
+
+
+def _counter_value(key: CounterKey) -> Select[tuple[int]]:
+    scope, scope_key = key
+    return select(func.coalesce(func.sum(RequestCounter.value), 0)).where(
+        RequestCounter.scope == scope,
+        RequestCounter.scope_key == scope_key,
+    )
+
+
+def _explain(stmt: Select[tuple[int]], dialect: Dialect) -> str:
+    compiled = stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return f"EXPLAIN (FORMAT JSON) {compiled}"
+
+
+def _plan_rows(plan: Any) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
 class SqlAlchemyRequestRepository:
     def __init__(self, session: Session) -> None:
         self._s = session
@@ -58,6 +210,16 @@ class SqlAlchemyRequestRepository:
     def get(self, request_id: int) -> ServiceRequest | None:
         return self._s.get(ServiceRequest, request_id)
 
+    def get_for_update(self, request_id: int) -> ServiceRequest | None:
+        """Заявка под SELECT ... FOR UPDATE: конкурентные смены ждут commit."""
+        return self.get_many_for_update((request_id,)).get(request_id)
+
+    def get_many_for_update(self, request_ids: Collection[int]) -> dict[int, ServiceRequest]:
+        """Заявки по id одним SELECT ... FOR UPDATE (до конца транзакции)."""
+        if not request_ids:
+            return {}
+        return {req.id: req for req in self._s.scalars(_requests_for_update(request_ids))}
+
     def list(
         self,
         *,
@@ -68,63 +230,68 @@ class SqlAlchemyRequestRepository:
         date_to: datetime | None = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[ServiceRequest]:
-        stmt = select(ServiceRequest)
-
-        if status is not None:
-            stmt = stmt.where(ServiceRequest.status == status)
-        if created_by_id is not None:
-            stmt = stmt.where(ServiceRequest.created_by_user_id == created_by_id)
-        if assigned_to_id is not None:
-            stmt = stmt.where(ServiceRequest.assigned_to_user_id == assigned_to_id)
-        if date_from is not None:
-            stmt = stmt.where(ServiceRequest.created_at >= date_from)
-        if date_to is not None:
-            stmt = stmt.where(ServiceRequest.created_at <= date_to)
-
-        stmt = stmt.order_by(ServiceRequest.created_at.desc()).offset(offset).limit(limit)
-        return list(self._s.scalars(stmt).all())
-
-    def list_by_creator(self, creator_id: int, *, limit: int, offset: int) -> list[ServiceRequest]:
-        stmt = (
-            select(ServiceRequest)
-            .where(ServiceRequest.created_by_user_id == creator_id)
-            .order_by(desc(ServiceRequest.id))
-            .offset(offset)
-            .limit(limit)
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _filter_requests(
+            _request_rows(fields),
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            date_from=date_from,
+            date_to=date_to,
         )
-        return list(self._s.scalars(stmt).all())
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(self._s.execute(stmt))
 
-    def list_by_assignee(
-        self, assignee_id: int, *, limit: int, offset: int
-    ) -> list[ServiceRequest]:
-        stmt = (
-            select(ServiceRequest)
-            .where(ServiceRequest.assigned_to_user_id == assignee_id)
-            .order_by(desc(ServiceRequest.created_at))
-            .offset(offset)
-            .limit(limit)
-        )
-        return list(self._s.scalars(stmt).all())
+    def list_by_creator(
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(ServiceRequest.created_by_user_id == creator_id)
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(self._s.execute(stmt))
 
-    def list_queue(self, *, limit: int, offset: int) -> list[ServiceRequest]:
-        stmt = (
-            select(ServiceRequest)
-            .where(
-                ServiceRequest.status == RequestStatus.NEW,
-                ServiceRequest.assigned_to_user_id.is_(None),
-            )
-            .order_by(desc(ServiceRequest.created_at))
-            .offset(offset)
-            .limit(limit)
-        )
-        return list(self._s.scalars(stmt).all())
+    def list_by_assignee(
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(ServiceRequest.assigned_to_user_id == assignee_id)
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(self._s.execute(stmt))
+
+    def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(*_queue_filter())
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(self._s.execute(stmt))
 
     def add(self, request: ServiceRequest) -> ServiceRequest:
         self._s.add(request)
-        self._s.flush()
         return request
 
+    def add_many(self, values: list[dict[str, Any]]) -> list[Row[Any]]:
+        """Multi-row INSERT ... RETURNING колонок read-модели, в порядке values."""
+        if not values:
+            return []
+        return list(self._s.execute(_insert_requests_returning(), values))
+
     def count(
         self,
         *,
@@ -133,38 +300,173 @@ class SqlAlchemyRequestRepository:
         assigned_to_id: int | None = None,
         date_from: datetime | None = None,
         date_to: datetime | None = None,
+        estimate: bool = False,
     ) -> int:
-        stmt = select(func.count(ServiceRequest.id))
-        if status is not None:
-            stmt = stmt.where(ServiceRequest.status == status)
-        if created_by_id is not None:
-            stmt = stmt.where(ServiceRequest.created_by_user_id == created_by_id)
-        if assigned_to_id is not None:
-            stmt = stmt.where(ServiceRequest.assigned_to_user_id == assigned_to_id)
-        if date_from is not None:
-            stmt = stmt.where(ServiceRequest.created_at >= date_from)
-        if date_to is not None:
-            stmt = stmt.where(ServiceRequest.created_at <= date_to)
-        return int(self._s.execute(stmt).scalar_one())
-
-    def count_by_creator(self, creator_id: int) -> int:
-        stmt = select(func.count(ServiceRequest.id)).where(
-            ServiceRequest.created_by_user_id == creator_id
+        key = counter_key_for_filters(
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            has_date_filter=date_from is not None or date_to is not None,
         )
-        return int(self._s.execute(stmt).scalar_one())
-
-    def count_by_assignee(self, assignee_id: int) -> int:
-        stmt = select(func.count(ServiceRequest.id)).where(
-            ServiceRequest.assigned_to_user_id == assignee_id
+        if key is not None:
+            return self._read_counter(key)
+
+        stmt = _filter_requests(
+            select(ServiceRequest.id),
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            date_from=date_from,
+            date_to=date_to,
         )
-        return int(self._s.execute(stmt).scalar_one())
+        return self._count(stmt, estimate=estimate)
+
+    # count_by_* читают денормализованные счётчики: они точные (двигаются
+    # в транзакции бизнес-операции) и стоят O(1) независимо от estimate.
+
+    def count_by_creator(self, creator_id: int, *, estimate: bool = False) -> int:
+        return self._read_counter(counter_key(CounterScope.CREATOR, creator_id))
+
+    def count_by_assignee(self, assignee_id: int, *, estimate: bool = False) -> int:
+        return self._read_counter(counter_key(CounterScope.ASSIGNEE, assignee_id))
+
+    def count_queue(self, *, estimate: bool = False) -> int:
+        return self._read_counter(counter_key(CounterScope.QUEUE))
+
+    def _read_counter(self, key: CounterKey) -> int:
+        return int(self._s.execute(_counter_value(key)).scalar_one())
+
+    def _count(self, stmt: Select[tuple[int]], *, estimate: bool) -> int:
+        if estimate:
+            return self._planner_rows(stmt)
+        counted = stmt.with_only_columns(func.count(ServiceRequest.id))
+        return int(self._s.execute(counted).scalar_one())
+
+    def _planner_rows(self, stmt: Select[tuple[int]]) -> int:
+        """Оценка числа строк по плану Postgres (EXPLAIN без ANALYZE).
+
+        Запрос не выполняется — планировщик отвечает по статистике таблицы
+        (reltuples + гистограммы), поэтому стоимость не зависит от размера
+        выборки. Точность — порядка статистики последнего ANALYZE.
+        """
+        sql = _explain(stmt, self._s.get_bind().dialect)
+        return _plan_rows(self._s.connection().exec_driver_sql(sql).scalar_one())
+
+
+# Число слотов на один логический счётчик: конкурентные инкременты
+# раскладываются по разным строкам и не ждут друг друга на row-lock'е.
+COUNTER_SLOTS = 8
+
+# Пересчёт счётчиков с нуля по service_requests. Ключи — те же, что
+# строит app.domain.request_counters.counter_keys.
+_REBUILD_COUNTERS_SQL = """
+INSERT INTO request_counters (scope, scope_key, slot, value)
+SELECT 'all', '', 0, count(*) FROM service_requests
+UNION ALL
+SELECT 'status', status::text, 0, count(*) FROM service_requests GROUP BY status
+UNION ALL
+SELECT 'creator', created_by_user_id::text, 0, count(*)
+FROM service_requests GROUP BY created_by_user_id
+UNION ALL
+SELECT 'assignee', assigned_to_user_id::text, 0, count(*)
+FROM service_requests WHERE assigned_to_user_id IS NOT NULL GROUP BY assigned_to_user_id
+UNION ALL
+SELECT 'queue', '', 0, count(*)
+FROM service_requests WHERE status = 'NEW' AND assigned_to_user_id IS NULL
+"""
 
-    def count_queue(self) -> int:
-        stmt = select(func.count(ServiceRequest.id)).where(
-            ServiceRequest.status == RequestStatus.NEW,
-            ServiceRequest.assigned_to_user_id.is_(None),
-        )
-        return int(self._s.execute(stmt).scalar_one())
+
+def _counter_upsert(deltas: dict[CounterKey, int]) -> Insert:
+    slot = random.randrange(COUNTER_SLOTS)
+    rows = [
+        {"scope": scope, "scope_key": scope_key, "slot": slot, "value": delta}
+        for (scope, scope_key), delta in sorted(deltas.items())
+    ]
+    stmt = pg_insert(RequestCounter).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[RequestCounter.scope, RequestCounter.scope_key, RequestCounter.slot],
+        set_={"value": RequestCounter.value + stmt.excluded.value},
+    )
+
+
+def _counter_totals() -> Select[tuple[str, str, int]]:
+    return select(
+        RequestCounter.scope,
+        RequestCounter.scope_key,
+        func.sum(RequestCounter.value),
+    ).group_by(RequestCounter.scope, RequestCounter.scope_key)
+
+
+_LOCK_COUNTERS_SQL = "LOCK TABLE request_counters IN EXCLUSIVE MODE"
+_REBUILD_COUNTERS_STEPS = (
+    "DELETE FROM request_counters",
+    _REBUILD_COUNTERS_SQL,
+)
+
+
+class SqlAlchemyRequestCounterRepository:
+    def __init__(self, session: Session) -> None:
+        self._s = session
+
+    def apply(self, deltas: dict[CounterKey, int]) -> None:
+        """Одним upsert'ом двигает все затронутые счётчики.
+
+        Ключи сортируются, чтобы конкурентные транзакции брали row-lock'и
+        в одном порядке и не ловили deadlock.
+        """
+        if deltas:
+            self._s.execute(_counter_upsert(deltas))
+
+    def snapshot(self) -> dict[CounterKey, int]:
+        rows = self._s.execute(_counter_totals())
+        return {(scope, key): int(value) for scope, key, value in rows}
+
+    def rebuild(self) -> dict[CounterKey, int]:
+        """Пересчитывает все счётчики по service_requests.
+
+        EXCLUSIVE-lock блокирует только писателей счётчиков (чтение идёт
+        дальше): транзакции, уже двинувшие счётчики, дожидаемся, а новые
+        ждут нас — так пересчёт не теряет и не задваивает их изменения.
+        Возвращает значения до пересчёта, снятые уже под блокировкой:
+        их разница с новыми — настоящий дрейф, без конкурентных изменений.
+        """
+        self._s.execute(text(_LOCK_COUNTERS_SQL))
+        before = self.snapshot()
+        for sql in _REBUILD_COUNTERS_STEPS:
+            self._s.execute(text(sql))
+        return before
+
+
+_OUTBOX_NOTIFY = select(func.pg_notify(OUTBOX_NOTIFY_CHANNEL, ""))
+
+
+def _outbox_request_key(event: type[OutboxEvent]) -> ColumnElement[str]:
+    # Ровно то выражение, что в ix_outbox_events_retrying_request: литерал,
+    # а не bind-параметр, иначе планировщик не сопоставит его с индексом.
+    return event.payload.op("->>")(literal_column("'request_id'"))
+
+
+# Класс advisory-lock'ов шардов drain (первый аргумент двухключевой формы):
+# не пересекается с другими advisory-lock'ами в той же БД.
+_OUTBOX_SHARD_LOCK_CLASS = 0x0B0C
+
+
+def _outbox_shard(event: type[OutboxEvent], shards: int) -> ColumnElement[int]:
+    """Шард события: hashtext(request_id) без знака по модулю shards.
+
+    События без request_id шардируются по id — порядок им не важен.
+    """
+    key = func.coalesce(_outbox_request_key(event), cast(event.id, String))
+    return func.hashtext(key).op("&")(0x7FFFFFFF) % shards
+
+
+def _outbox_claim_shards(shards: int) -> Select[tuple[int]]:
+    # pg_try_* не ждёт: шард, занятый другим воркером, просто пропускаем.
+    # xact-lock держится до commit пачки и снимается им же.
+    shard = func.generate_series(0, shards - 1).table_valued("value").render_derived("shard")
+    return select(shard.c.value).where(
+        func.pg_try_advisory_xact_lock(_OUTBOX_SHARD_LOCK_CLASS, shard.c.value)
+    )
 
 
 class SqlAlchemyOutboxRepository:
@@ -173,38 +475,365 @@ class SqlAlchemyOutboxRepository:
 
     def add(self, event: OutboxEvent) -> OutboxEvent:
         self._s.add(event)
-        self._s.flush()
+        self._notify()
         return event
 
-    def fetch_pending(self, limit: int = 50) -> list[OutboxEvent]:
+    def add_many(self, values: list[dict[str, Any]]) -> None:
+        if values:
+            self._s.execute(insert(OutboxEvent), values)
+            self._notify()
+
+    def _notify(self) -> None:
+        """NOTIFY для LISTEN-воркера — один раз на транзакцию.
+
+        Postgres доставляет уведомление только после COMMIT (после rollback
+        оно пропадает вместе с событиями), так что воркер не проснётся
+        раньше, чем строки станут видимы.
+        """
+        tx = self._s.get_transaction()
+        if tx is not None and self._s.info.get("outbox_notified_tx") is tx:
+            return
+        # Сам NOTIFY может открыть транзакцию: запоминаем её уже после.
+        self._s.execute(_OUTBOX_NOTIFY)
+        self._s.info["outbox_notified_tx"] = self._s.get_transaction()
+
+    def claim_shards(self, shards: int) -> list[int]:
+        """Шарды, чьи advisory-lock'и взяла текущая транзакция (до её конца)."""
+        return list(self._s.scalars(_outbox_claim_shards(shards)))
+
+    def fetch_pending(
+        self,
+        limit: int = 50,
+        *,
+        now: datetime | None = None,
+        shards: Collection[int] | None = None,
+        shard_count: int = 1,
+    ) -> list[OutboxEvent]:
+        """Пачка событий, готовых к публикации, в порядке created_at.
+
+        Отложенные (next_attempt_at в будущем) пропускаются, а вместе с ними —
+        более поздние события той же заявки: иначе подписчик увидит
+        status_changed раньше, чем created, который ещё ретраится.
+
+        shards — только события этих шардов (из claim_shards): все события
+        заявки лежат в одном шарде, и его публикует один процесс за раз.
+        """
+        now = now or datetime.utcnow()
+        earlier = aliased(OutboxEvent)
+        blocked_by_retry = (
+            select(earlier.id)
+            .where(
+                earlier.processed_at.is_(None),
+                earlier.next_attempt_at.is_not(None),
+                earlier.next_attempt_at > now,
+                _outbox_request_key(earlier) == _outbox_request_key(OutboxEvent),
+                tuple_(earlier.created_at, earlier.id)
+                < tuple_(OutboxEvent.created_at, OutboxEvent.id),
+            )
+            .exists()
+        )
         stmt = (
             select(OutboxEvent)
-            .where(OutboxEvent.processed_at.is_(None))
-            .order_by(OutboxEvent.created_at.asc())
+            .where(
+                OutboxEvent.processed_at.is_(None),
+                or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= now),
+                ~blocked_by_retry,
+            )
+            .order_by(OutboxEvent.created_at.asc(), OutboxEvent.id.asc())
             .limit(limit)
             .with_for_update(skip_locked=True)
         )
+        if shards is not None:
+            stmt = stmt.where(_outbox_shard(OutboxEvent, shard_count).in_(shards))
         return list(self._s.scalars(stmt).all())
 
+    def mark_processed(
+        self, ids: list[int], processed_at: datetime, *, created_from: datetime | None = None
+    ) -> None:
+        """Один set-based UPDATE на всю пачку вместо N грязных ORM-объектов.
+
+        created_from — минимальный created_at пачки: отсекает старые
+        партиции, иначе UPDATE по id заглядывает в индекс каждой.
+        """
+        if not ids:
+            return
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+            .values(processed_at=processed_at)
+            .execution_options(synchronize_session=False)
+        )
+        if created_from is not None:
+            stmt = stmt.where(OutboxEvent.created_at >= created_from)
+        self._s.execute(stmt)
+
+    def defer(self, event: OutboxEvent, *, error: str, next_attempt_at: datetime) -> None:
+        event.attempts += 1
+        event.last_error = error
+        event.next_attempt_at = next_attempt_at
+
+    def dead_letter(self, event: OutboxEvent, *, error: str, failed_at: datetime) -> None:
+        """Переносит событие в outbox_dead_letters и снимает его с ретраев."""
+        event.attempts += 1
+        event.last_error = error
+        event.processed_at = failed_at
+        self._s.add(
+            OutboxDeadLetter(
+                event_id=event.id,
+                event_type=event.event_type,
+                payload=event.payload,
+                created_at=event.created_at,
+                failed_at=failed_at,
+                attempts=event.attempts,
+                last_error=error,
+            )
+        )
+
+    def count_pending(self) -> int:
+        stmt = (
+            select(func.count()).select_from(OutboxEvent).where(OutboxEvent.processed_at.is_(None))
+        )
+        return int(self._s.execute(stmt).scalar_one())
+
+
+def _idempotency_lookup(
+    *, user_id: int, method: str, path: str, key: str
+) -> Select[tuple[IdempotencyKey]]:
+    return select(IdempotencyKey).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.method == method,
+        IdempotencyKey.path == path,
+        IdempotencyKey.key == key,
+    )
+
+
+def _idempotency_state(
+    *, user_id: int, method: str, path: str, key: str
+) -> Select[tuple[int, str, int | None, dict | None, datetime]]:
+    # Колонки, а не сущность: при ожидании брони сессия перечитывает строку
+    # в цикле, и identity map не должна отдавать закешированное состояние.
+    return select(
+        IdempotencyKey.id,
+        IdempotencyKey.request_hash,
+        IdempotencyKey.response_status,
+        IdempotencyKey.response_body,
+        IdempotencyKey.created_at,
+    ).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.method == method,
+        IdempotencyKey.path == path,
+        IdempotencyKey.key == key,
+    )
+
+
+def _idempotency_reserve(
+    *, user_id: int, method: str, path: str, key: str, request_hash: str, now: datetime
+) -> Insert:
+    return (
+        pg_insert(IdempotencyKey)
+        .values(
+            user_id=user_id,
+            method=method,
+            path=path,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+        )
+        .on_conflict_do_nothing(constraint="uq_idempotency_scope")
+        .returning(IdempotencyKey.id)
+    )
+
+
+def _idempotency_states(
+    *, user_id: int, method: str, path: str, keys: Collection[str]
+) -> Select[tuple[str, int, str, int | None, dict | None, datetime]]:
+    return select(
+        IdempotencyKey.key,
+        IdempotencyKey.id,
+        IdempotencyKey.request_hash,
+        IdempotencyKey.response_status,
+        IdempotencyKey.response_body,
+        IdempotencyKey.created_at,
+    ).where(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.method == method,
+        IdempotencyKey.path == path,
+        IdempotencyKey.key.in_(keys),
+    )
+
+
+def _idempotency_reserve_many(values: list[dict[str, Any]], now: datetime) -> Insert:
+    # Один multi-row INSERT: RETURNING отдаёт только выигранные ключи.
+    return (
+        pg_insert(IdempotencyKey)
+        .values([{**row, "created_at": now} for row in values])
+        .on_conflict_do_nothing(constraint="uq_idempotency_scope")
+        .returning(IdempotencyKey.key, IdempotencyKey.id)
+    )
+
+
+def _idempotency_take_over(
+    record_id: int,
+    *,
+    request_hash: str,
+    now: datetime,
+    stale_before: datetime,
+    expired_before: datetime,
+) -> ReturningUpdate[tuple[int]]:
+    # Условие повторяет решение вызывающего: из двух конкурентов, увидевших
+    # брошенную бронь, её перехватит только первый.
+    return (
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.id == record_id,
+            or_(
+                and_(
+                    IdempotencyKey.response_status.is_(None),
+                    IdempotencyKey.created_at < stale_before,
+                ),
+                IdempotencyKey.created_at < expired_before,
+            ),
+        )
+        .values(request_hash=request_hash, response_status=None, response_body=None, created_at=now)
+        .returning(IdempotencyKey.id)
+    )
+
+
+def _idempotency_complete(record_id: int, *, status: int, body: dict[str, Any]) -> Update:
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == record_id)
+        .values(response_status=status, response_body=body)
+    )
+
+
+def _idempotency_complete_many() -> Update:
+    # ORM bulk UPDATE по первичному ключу: executemany с (id, response_status,
+    # response_body) на каждую строку.
+    return update(IdempotencyKey)
+
+
+def _idempotency_release(record_id: int) -> Delete:
+    return delete(IdempotencyKey).where(
+        IdempotencyKey.id == record_id, IdempotencyKey.response_status.is_(None)
+    )
+
+
+def _idempotency_release_many(record_ids: Collection[int]) -> Delete:
+    return delete(IdempotencyKey).where(
+        IdempotencyKey.id.in_(record_ids), IdempotencyKey.response_status.is_(None)
+    )
+
+
+def _idempotency_purge(before: datetime, limit: int) -> Delete:
+    # Пачка по ix_idempotency_keys_created_at; SKIP LOCKED — не ждать строк,
+    # которые прямо сейчас перехватывает или завершает запрос.
+    expired = (
+        select(IdempotencyKey.id)
+        .where(IdempotencyKey.created_at < before)
+        .order_by(IdempotencyKey.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired))
+
 
 class SqlAlchemyIdempotencyRepository:
     def __init__(self, session: Session) -> None:
         self._s = session
 
     def get(self, *, user_id: int, method: str, path: str, key: str) -> IdempotencyKey | None:
-        stmt = select(IdempotencyKey).where(
-            IdempotencyKey.user_id == user_id,
-            IdempotencyKey.method == method,
-            IdempotencyKey.path == path,
-            IdempotencyKey.key == key,
-        )
+        stmt = _idempotency_lookup(user_id=user_id, method=method, path=path, key=key)
         return self._s.execute(stmt).scalar_one_or_none()
 
     def add(self, record: IdempotencyKey) -> IdempotencyKey:
         self._s.add(record)
-        self._s.flush()
         return record
 
+    def state(self, *, user_id: int, method: str, path: str, key: str) -> Row[Any] | None:
+        stmt = _idempotency_state(user_id=user_id, method=method, path=path, key=key)
+        return self._s.execute(stmt).first()
+
+    def states(
+        self, *, user_id: int, method: str, path: str, keys: Collection[str]
+    ) -> dict[str, Row[Any]]:
+        stmt = _idempotency_states(user_id=user_id, method=method, path=path, keys=keys)
+        return {row.key: row for row in self._s.execute(stmt)}
+
+    def reserve(
+        self, *, user_id: int, method: str, path: str, key: str, request_hash: str, now: datetime
+    ) -> int | None:
+        """Бронь ключа: id новой строки или None, если ключ уже есть."""
+        stmt = _idempotency_reserve(
+            user_id=user_id, method=method, path=path, key=key, request_hash=request_hash, now=now
+        )
+        return self._s.execute(stmt).scalar_one_or_none()
+
+    def reserve_many(self, values: list[dict[str, Any]], *, now: datetime) -> dict[str, int]:
+        """Бронь пачки ключей одним INSERT: {key: id} только для выигранных."""
+        if not values:
+            return {}
+        stmt = _idempotency_reserve_many(values, now)
+        return {key: record_id for key, record_id in self._s.execute(stmt)}
+
+    def take_over(
+        self,
+        record_id: int,
+        *,
+        request_hash: str,
+        now: datetime,
+        stale_before: datetime,
+        expired_before: datetime,
+    ) -> bool:
+        stmt = _idempotency_take_over(
+            record_id,
+            request_hash=request_hash,
+            now=now,
+            stale_before=stale_before,
+            expired_before=expired_before,
+        )
+        return self._s.execute(stmt).first() is not None
+
+    def complete(self, record_id: int, *, status: int, body: dict[str, Any]) -> None:
+        self._s.execute(_idempotency_complete(record_id, status=status, body=body))
+
+    def complete_many(self, values: list[dict[str, Any]]) -> None:
+        """Ответы пачки: bulk UPDATE по первичному ключу (id, status, body)."""
+        if values:
+            self._s.execute(_idempotency_complete_many(), values)
+
+    def release(self, record_id: int) -> None:
+        self._s.execute(_idempotency_release(record_id))
+
+    def release_many(self, record_ids: Collection[int]) -> None:
+        if record_ids:
+            self._s.execute(_idempotency_release_many(record_ids))
+
+    def purge(self, before: datetime, *, limit: int) -> int:
+        """Удаляет до limit ключей старше before; возвращает число удалённых."""
+        return self._s.execute(_idempotency_purge(before, limit)).rowcount
+
+
+def _request_history(
+    request_id: int, *, since: datetime, limit: int, after: tuple[datetime, int] | None
+) -> Select[tuple[RequestLog]]:
+    """История по времени + keyset-seek после позиции (timestamp, id).
+
+    request_logs партиционирована по timestamp: since и отдельное
+    timestamp >= курсора — простые условия по ключу партиционирования, по
+    ним планировщик отбрасывает месяцы вне диапазона (сравнение кортежей
+    он для pruning не использует).
+    """
+    stmt = select(RequestLog).where(
+        RequestLog.request_id == request_id, RequestLog.timestamp >= since
+    )
+    if after is not None:
+        stmt = stmt.where(
+            RequestLog.timestamp >= after[0],
+            tuple_(RequestLog.timestamp, RequestLog.id) > tuple_(*after),
+        )
+    return stmt.order_by(RequestLog.timestamp.asc(), RequestLog.id.asc()).limit(limit)
+
 
 class SqlAlchemyRequestLogRepository:
     def __init__(self, session: Session) -> None:
@@ -212,13 +841,19 @@ class SqlAlchemyRequestLogRepository:
 
     def add(self, log: RequestLog) -> RequestLog:
         self._s.add(log)
-        self._s.flush()
         return log
 
-    def list_for_request(self, request_id: int) -> list[RequestLog]:
-        stmt = (
-            select(RequestLog)
-            .where(RequestLog.request_id == request_id)
-            .order_by(RequestLog.timestamp.asc())
-        )
+    def add_many(self, values: list[dict[str, Any]]) -> None:
+        if values:
+            self._s.execute(insert(RequestLog), values)
+
+    def list_for_request(
+        self,
+        request_id: int,
+        *,
+        since: datetime,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[RequestLog]:
+        stmt = _request_history(request_id, since=since, limit=limit, after=after)
         return list(self._s.scalars(stmt).all())
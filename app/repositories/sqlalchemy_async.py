@@ -0,0 +1,371 @@
+"""Async-реализация репозиториев поверх AsyncSession.
+
+Зеркало app.repositories.sqlalchemy: те же методы и тот же SQL (запросы
+строят общие модульные функции), отличаются только await'ы. Транзакцией,
+как и в sync-версии, управляет Unit of Work (AsyncSqlAlchemyUnitOfWork).
+
+Outbox здесь — только запись событий: воркер публикации остаётся на
+sync-стеке и этого репозитория не использует.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Row, Select, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import RequestStatus, UserRole
+from app.domain.request_counters import (
+    CounterKey,
+    CounterScope,
+    counter_key,
+    counter_key_for_filters,
+)
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxEvent
+from app.models.request import ServiceRequest
+from app.models.request_log import RequestLog
+from app.models.user import User
+from app.repositories.sqlalchemy import (
+    _LOCK_COUNTERS_SQL,
+    _OUTBOX_NOTIFY,
+    _REBUILD_COUNTERS_STEPS,
+    _counter_totals,
+    _counter_upsert,
+    _counter_value,
+    _existing_user_ids,
+    _explain,
+    _filter_requests,
+    _idempotency_complete,
+    _idempotency_complete_many,
+    _idempotency_lookup,
+    _idempotency_release,
+    _idempotency_release_many,
+    _idempotency_reserve,
+    _idempotency_reserve_many,
+    _idempotency_state,
+    _idempotency_states,
+    _idempotency_take_over,
+    _insert_requests_returning,
+    _newest_first,
+    _plan_rows,
+    _queue_filter,
+    _request_history,
+    _request_rows,
+    _requests_for_update,
+)
+
+
+class AsyncSqlAlchemyUserRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def get(self, user_id: int) -> User | None:
+        return await self._s.get(User, user_id)
+
+    async def get_by_email(self, email: str) -> User | None:
+        stmt = select(User).where(User.email == email)
+        return (await self._s.execute(stmt)).scalar_one_or_none()
+
+    async def get_by_api_key_prefix(self, prefix: str) -> list[User]:
+        stmt = select(User).where(User.api_key_prefix == prefix)
+        return list((await self._s.scalars(stmt)).all())
+
+    async def list(self, *, limit: int, offset: int) -> list[User]:
+        stmt = select(User).order_by(User.id).offset(offset).limit(limit)
+        return list((await self._s.scalars(stmt)).all())
+
+    async def count(self) -> int:
+        return int((await self._s.execute(select(func.count(User.id)))).scalar_one())
+
+    async def any_admin(self) -> bool:
+        stmt = select(User.id).where(User.role == UserRole.ADMIN).limit(1)
+        return (await self._s.execute(stmt)).first() is not None
+
+    async def existing_ids(self, user_ids: Collection[int]) -> set[int]:
+        if not user_ids:
+            return set()
+        return set(await self._s.scalars(_existing_user_ids(user_ids)))
+
+    async def add(self, user: User) -> User:
+        self._s.add(user)
+        return user
+
+
+class AsyncSqlAlchemyRequestRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def get(self, request_id: int) -> ServiceRequest | None:
+        return await self._s.get(ServiceRequest, request_id)
+
+    async def get_for_update(self, request_id: int) -> ServiceRequest | None:
+        return (await self.get_many_for_update((request_id,))).get(request_id)
+
+    async def get_many_for_update(self, request_ids: Collection[int]) -> dict[int, ServiceRequest]:
+        if not request_ids:
+            return {}
+        rows = await self._s.scalars(_requests_for_update(request_ids))
+        return {req.id: req for req in rows}
+
+    async def list(
+        self,
+        *,
+        status: RequestStatus | None = None,
+        created_by_id: int | None = None,
+        assigned_to_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _filter_requests(
+            _request_rows(fields),
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(await self._s.execute(stmt))
+
+    async def list_by_creator(
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(ServiceRequest.created_by_user_id == creator_id)
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(await self._s.execute(stmt))
+
+    async def list_by_assignee(
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(ServiceRequest.assigned_to_user_id == assignee_id)
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(await self._s.execute(stmt))
+
+    async def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None = None,
+        fields: Collection[str] | None = None,
+    ) -> list[Row[Any]]:
+        stmt = _request_rows(fields).where(*_queue_filter())
+        stmt = _newest_first(stmt, after).offset(offset).limit(limit)
+        return list(await self._s.execute(stmt))
+
+    async def add(self, request: ServiceRequest) -> ServiceRequest:
+        self._s.add(request)
+        return request
+
+    async def add_many(self, values: list[dict[str, Any]]) -> list[Row[Any]]:
+        if not values:
+            return []
+        return list(await self._s.execute(_insert_requests_returning(), values))
+
+    async def count(
+        self,
+        *,
+        status: RequestStatus | None = None,
+        created_by_id: int | None = None,
+        assigned_to_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        estimate: bool = False,
+    ) -> int:
+        key = counter_key_for_filters(
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            has_date_filter=date_from is not None or date_to is not None,
+        )
+        if key is not None:
+            return await self._read_counter(key)
+
+        stmt = _filter_requests(
+            select(ServiceRequest.id),
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return await self._count(stmt, estimate=estimate)
+
+    async def count_by_creator(self, creator_id: int, *, estimate: bool = False) -> int:
+        return await self._read_counter(counter_key(CounterScope.CREATOR, creator_id))
+
+    async def count_by_assignee(self, assignee_id: int, *, estimate: bool = False) -> int:
+        return await self._read_counter(counter_key(CounterScope.ASSIGNEE, assignee_id))
+
+    async def count_queue(self, *, estimate: bool = False) -> int:
+        return await self._read_counter(counter_key(CounterScope.QUEUE))
+
+    async def _read_counter(self, key: CounterKey) -> int:
+        return int((await self._s.execute(_counter_value(key))).scalar_one())
+
+    async def _count(self, stmt: Select[tuple[int]], *, estimate: bool) -> int:
+        if estimate:
+            return await self._planner_rows(stmt)
+        counted = stmt.with_only_columns(func.count(ServiceRequest.id))
+        return int((await self._s.execute(counted)).scalar_one())
+
+    async def _planner_rows(self, stmt: Select[tuple[int]]) -> int:
+        conn = await self._s.connection()
+        result = await conn.exec_driver_sql(_explain(stmt, conn.dialect))
+        return _plan_rows(result.scalar_one())
+
+
+class AsyncSqlAlchemyRequestCounterRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def apply(self, deltas: dict[CounterKey, int]) -> None:
+        if deltas:
+            await self._s.execute(_counter_upsert(deltas))
+
+    async def snapshot(self) -> dict[CounterKey, int]:
+        rows = await self._s.execute(_counter_totals())
+        return {(scope, key): int(value) for scope, key, value in rows}
+
+    async def rebuild(self) -> dict[CounterKey, int]:
+        await self._s.execute(text(_LOCK_COUNTERS_SQL))
+        before = await self.snapshot()
+        for sql in _REBUILD_COUNTERS_STEPS:
+            await self._s.execute(text(sql))
+        return before
+
+
+class AsyncSqlAlchemyOutboxRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def add(self, event: OutboxEvent) -> OutboxEvent:
+        self._s.add(event)
+        await self._notify()
+        return event
+
+    async def add_many(self, values: list[dict[str, Any]]) -> None:
+        if values:
+            await self._s.execute(insert(OutboxEvent), values)
+            await self._notify()
+
+    async def _notify(self) -> None:
+        # См. SqlAlchemyOutboxRepository._notify: один NOTIFY на транзакцию.
+        tx = self._s.get_transaction()
+        if tx is not None and self._s.info.get("outbox_notified_tx") is tx:
+            return
+        await self._s.execute(_OUTBOX_NOTIFY)
+        self._s.info["outbox_notified_tx"] = self._s.get_transaction()
+
+
+class AsyncSqlAlchemyIdempotencyRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def get(self, *, user_id: int, method: str, path: str, key: str) -> IdempotencyKey | None:
+        stmt = _idempotency_lookup(user_id=user_id, method=method, path=path, key=key)
+        return (await self._s.execute(stmt)).scalar_one_or_none()
+
+    async def add(self, record: IdempotencyKey) -> IdempotencyKey:
+        self._s.add(record)
+        return record
+
+    async def state(self, *, user_id: int, method: str, path: str, key: str) -> Row[Any] | None:
+        stmt = _idempotency_state(user_id=user_id, method=method, path=path, key=key)
+        return (await self._s.execute(stmt)).first()
+
+    async def states(
+        self, *, user_id: int, method: str, path: str, keys: Collection[str]
+    ) -> dict[str, Row[Any]]:
+        stmt = _idempotency_states(user_id=user_id, method=method, path=path, keys=keys)
+        return {row.key: row for row in await self._s.execute(stmt)}
+
+    async def reserve(
+        self, *, user_id: int, method: str, path: str, key: str, request_hash: str, now: datetime
+    ) -> int | None:
+        stmt = _idempotency_reserve(
+            user_id=user_id, method=method, path=path, key=key, request_hash=request_hash, now=now
+        )
+        return (await self._s.execute(stmt)).scalar_one_or_none()
+
+    async def reserve_many(self, values: list[dict[str, Any]], *, now: datetime) -> dict[str, int]:
+        if not values:
+            return {}
+        rows = await self._s.execute(_idempotency_reserve_many(values, now))
+        return {key: record_id for key, record_id in rows}
+
+    async def take_over(
+        self,
+        record_id: int,
+        *,
+        request_hash: str,
+        now: datetime,
+        stale_before: datetime,
+        expired_before: datetime,
+    ) -> bool:
+        stmt = _idempotency_take_over(
+            record_id,
+            request_hash=request_hash,
+            now=now,
+            stale_before=stale_before,
+            expired_before=expired_before,
+        )
+        return (await self._s.execute(stmt)).first() is not None
+
+    async def complete(self, record_id: int, *, status: int, body: dict[str, Any]) -> None:
+        await self._s.execute(_idempotency_complete(record_id, status=status, body=body))
+
+    async def complete_many(self, values: list[dict[str, Any]]) -> None:
+        if values:
+            await self._s.execute(_idempotency_complete_many(), values)
+
+    async def release(self, record_id: int) -> None:
+        await self._s.execute(_idempotency_release(record_id))
+
+    async def release_many(self, record_ids: Collection[int]) -> None:
+        if record_ids:
+            await self._s.execute(_idempotency_release_many(record_ids))
+
+
+class AsyncSqlAlchemyRequestLogRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._s = session
+
+    async def add(self, log: RequestLog) -> RequestLog:
+        self._s.add(log)
+        return log
+
+    async def add_many(self, values: list[dict[str, Any]]) -> None:
+        if values:
+            await self._s.execute(insert(RequestLog), values)
+
+    async def list_for_request(
+        self,
+        request_id: int,
+        *,
+        since: datetime,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[RequestLog]:
+        stmt = _request_history(request_id, since=since, limit=limit, after=after)
+        return list((await self._s.scalars(stmt)).all())
@@ -2,28 +2,75 @@
 
 from __future__ import annotations
 
+from collections.abc import Sized
 from datetime import datetime
+from typing import Any, TypeVar
 
 from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from pydantic import BaseModel
+from pydantic.main import IncEx
 
+from app.core.config import settings
 from app.core.deps import get_uow
 from app.core.enums import RequestStatus, UserRole
 from app.core.exceptions import (
-    IdempotencyKeyConflict,
+    BatchTooLarge,
+    InvalidFields,
     OptimisticLockFailed,
     PermissionDenied,
 )
 from app.core.idempotency import compute_body_hash, validate_key
+from app.core.rate_limit import charge_quota
+from app.core.responses import ModelResponse
 from app.core.security import get_current_user
-from app.models.idempotency import IdempotencyKey
 from app.models.user import User
 from app.policies.request_policy import RequestPolicy
-from app.schemas.common import COMMON_ERROR_RESPONSES, Page, compute_etag
-from app.schemas.request import RequestCreate, RequestRead, RequestStatusUpdate
+from app.schemas.common import (
+    COMMON_ERROR_RESPONSES,
+    NOT_MODIFIED_RESPONSES,
+    Page,
+    TotalMode,
+    compute_etag,
+    etag_matches,
+    page_etag,
+)
+from app.schemas.request import (
+    RequestBatchCreate,
+    RequestBatchResult,
+    RequestBulkStatusResult,
+    RequestBulkStatusUpdate,
+    RequestCreate,
+    RequestLogRead,
+    RequestRead,
+    RequestStatusUpdate,
+)
+from app.services.idempotency_service import IdempotencyService
+from app.services.idempotency_store import (
+    IdempotencyScope,
+    Reservation,
+    StoredResponse,
+    build_idempotency_store,
+)
 from app.services.request_service import RequestService
 from app.uow import SqlAlchemyUnitOfWork
 
-router = APIRouter(prefix="/requests", tags=["requests"])
+# Квота роли списывается до обработчика: вес операции — см. app.core.rate_limit.
+router = APIRouter(prefix="/requests", tags=["requests"], dependencies=[Depends(charge_quota)])
+
+_CURSOR_DESCRIPTION = (
+    "Keyset-курсор из `next_cursor` предыдущей страницы. Если задан, `offset` игнорируется."
+)
+_HISTORY_CURSOR_DESCRIPTION = "Курсор из `next_cursor` предыдущей страницы истории."
+_TOTAL_MODE_DESCRIPTION = (
+    "exact — точный COUNT, estimate — оценка планировщика, none — без total "
+    "(дешевле всего для поллинга)."
+)
+_FIELDS_DESCRIPTION = (
+    "Поля элементов через запятую, например `id,title,status` — без `description` "
+    "список легче. По умолчанию — все поля; из БД читаются только запрошенные."
+)
+
+_REQUEST_FIELDS = frozenset(RequestRead.model_fields)
 
 
 class _EmployeeListForbidden(PermissionDenied):
@@ -36,6 +83,110 @@ def _require_agent_or_admin(user: User) -> None:
         raise _EmployeeListForbidden()
 
 
+def _check_batch_size(items: Sized) -> None:
+    limit = settings.REQUEST_BATCH_MAX_ITEMS
+    if len(items) > limit:
+        raise BatchTooLarge(
+            f"В пачке не больше {limit} элементов.",
+            details={"max_items": limit, "items": len(items)},
+        )
+
+
+# Клиент хранит ответ только у себя (private: он зависит от API-ключа) и
+# перед использованием перепроверяет через If-None-Match (no-cache).
+_CACHE_CONTROL = "private, no-cache"
+
+_T = TypeVar("_T")
+
+
+def _request_version(item: RequestRead) -> tuple[int, datetime]:
+    return item.id, item.updated_at
+
+
+def _conditional(
+    response: Response,
+    etag: str,
+    if_none_match: str | None,
+    body: _T,
+    *,
+    exclude: IncEx | None = None,
+) -> _T | Response:
+    """304 без тела, если у клиента актуальная версия; иначе body с ETag.
+
+    Возвращённый Response FastAPI отдаёт как есть — модель не сериализуется.
+    Готовую pydantic-модель отдаём через ModelResponse (model_dump_json),
+    минуя повторную валидацию по response_model; проекция (exclude) возможна
+    только так — response_model вернул бы все поля.
+    """
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if isinstance(body, BaseModel) and (exclude is not None or settings.JSON_RESPONSE == "orjson"):
+        return ModelResponse(body, headers=headers, exclude=exclude)
+    response.headers.update(headers)
+    return body
+
+
+def _list_fields(raw: str | None) -> frozenset[str] | None:
+    """fields= → набор полей RequestRead; None — все поля."""
+    if raw is None:
+        return None
+    names = frozenset(name.strip() for name in raw.split(",") if name.strip())
+    unknown = names - _REQUEST_FIELDS
+    if not names or unknown:
+        raise InvalidFields(
+            details={"unknown": sorted(unknown), "allowed": sorted(_REQUEST_FIELDS)}
+        )
+    return names
+
+
+def _list_response(
+    response: Response,
+    page: Page[RequestRead],
+    fields: frozenset[str] | None,
+    if_none_match: str | None,
+) -> Page[RequestRead] | Response:
+    # Набор полей входит в ETag: проекция и полный ответ — разные представления.
+    etag = page_etag(page, _request_version, *sorted(fields or ()))
+    exclude = None if fields is None else {"items": {"__all__": set(_REQUEST_FIELDS - fields)}}
+    return _conditional(response, etag, if_none_match, page, exclude=exclude)
+
+
+def _history_response(
+    response: Response,
+    request_id: int,
+    page: Page[RequestLogRead],
+    if_none_match: str | None,
+) -> Page[RequestLogRead] | Response:
+    # История только дописывается: id записей однозначно задают версию страницы.
+    etag = page_etag(page, _log_version, "history", request_id)
+    return _conditional(response, etag, if_none_match, page)
+
+
+def _log_version(item: RequestLogRead) -> int:
+    return item.id
+
+
+def _idempotency_scope(
+    user: User, method: str, path: str, key: str, payload: BaseModel
+) -> IdempotencyScope:
+    return IdempotencyScope(
+        user_id=user.id,
+        method=method,
+        path=path,
+        key=key,
+        request_hash=compute_body_hash(payload.model_dump(mode="json")),
+    )
+
+
+def _replay(response: Response, stored: StoredResponse) -> dict[str, Any]:
+    """Сохранённый ответ в исходном формате, с ETag той версии заявки."""
+    replayed = RequestRead.model_validate(stored.body)
+    response.status_code = stored.status
+    response.headers["ETag"] = compute_etag(replayed.id, replayed.updated_at)
+    return stored.body
+
+
 def get_request_service(
     uow: SqlAlchemyUnitOfWork = Depends(get_uow),
 ) -> RequestService:
@@ -57,40 +208,43 @@ def api_create_request(
     uow: SqlAlchemyUnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_user),
 ):
+    store = build_idempotency_store(uow)
+    service = RequestService(uow, store)
     key = validate_key(idempotency_key)
-    body_hash = compute_body_hash(payload.model_dump(mode="json")) if key else ""
-
-    if key is not None:
-        existing = uow.idempotency.get(
-            user_id=current_user.id, method="POST", path="/api/v1/requests", key=key
+    if key is None:
+        req = service.create(payload, current_user)
+    else:
+        idempotency = IdempotencyService(store)
+        outcome = idempotency.begin(
+            _idempotency_scope(current_user, "POST", "/api/v1/requests", key, payload)
         )
-        if existing is not None:
-            if existing.request_hash != body_hash:
-                raise IdempotencyKeyConflict()
-            # Возвращаем сохранённый ответ в исходном формате.
-            response.status_code = existing.response_status
-            return existing.response_body
-
-    service = RequestService(uow)
-    req = service.create(payload, current_user)
+        if isinstance(outcome, StoredResponse):
+            return _replay(response, outcome)
+        with idempotency.guard(outcome):
+            req = service.create(payload, current_user, idempotency=outcome)
     response.headers["ETag"] = compute_etag(req.id, req.updated_at)
+    return req
 
-    if key is not None:
-        body = RequestRead.model_validate(req).model_dump(mode="json")
-        uow.idempotency.add(
-            IdempotencyKey(
-                key=key,
-                user_id=current_user.id,
-                method="POST",
-                path="/api/v1/requests",
-                request_hash=body_hash,
-                response_status=201,
-                response_body=body,
-            )
-        )
-        uow.commit()
 
-    return req
+@router.post(
+    ":batch",
+    response_model=RequestBatchResult,
+    operation_id="requests_create_batch",
+    summary="Пакетное создание заявок",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+def api_create_requests_batch(
+    payload: RequestBatchCreate,
+    service: RequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user),
+):
+    """Создаёт до REQUEST_BATCH_MAX_ITEMS заявок одной транзакцией.
+
+    Ошибки отдельных элементов (исполнитель не найден, нет прав, конфликт
+    ключа) не валят пачку — у каждого элемента свой status и error.
+    """
+    _check_batch_size(payload.items)
+    return service.create_many(payload.items, current_user)
 
 
 @router.get(
@@ -98,9 +252,10 @@ def api_create_request(
     response_model=Page[RequestRead],
     operation_id="requests_list",
     summary="Список заявок (ADMIN/AGENT)",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_list_requests(
+    response: Response,
     request_status: RequestStatus | None = Query(default=None),
     created_by_id: int | None = Query(default=None, ge=1),
     assigned_to_id: int | None = Query(default=None, ge=1),
@@ -108,11 +263,16 @@ def api_list_requests(
     date_to: datetime | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
     _require_agent_or_admin(current_user)
-    return service.list(
+    projection = _list_fields(fields)
+    page = service.list(
         status=request_status,
         created_by_id=created_by_id,
         assigned_to_id=assigned_to_id,
@@ -120,7 +280,11 @@ def api_list_requests(
         date_to=date_to,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
     )
+    return _list_response(response, page, projection, if_none_match)
 
 
 @router.get(
@@ -128,15 +292,29 @@ def api_list_requests(
     response_model=Page[RequestRead],
     operation_id="requests_list_my",
     summary="Мои заявки",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_list_my_requests(
+    response: Response,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
-    return service.list_for_creator(current_user.id, limit=limit, offset=offset)
+    projection = _list_fields(fields)
+    page = service.list_for_creator(
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
+    )
+    return _list_response(response, page, projection, if_none_match)
 
 
 @router.get(
@@ -144,15 +322,29 @@ def api_list_my_requests(
     response_model=Page[RequestRead],
     operation_id="requests_list_assigned",
     summary="Назначенные на меня",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_list_assigned_to_me(
+    response: Response,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
-    return service.list_for_assignee(current_user.id, limit=limit, offset=offset)
+    projection = _list_fields(fields)
+    page = service.list_for_assignee(
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
+    )
+    return _list_response(response, page, projection, if_none_match)
 
 
 @router.get(
@@ -160,16 +352,25 @@ def api_list_assigned_to_me(
     response_model=Page[RequestRead],
     operation_id="requests_list_queue",
     summary="Очередь (NEW без исполнителя)",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_list_queue(
+    response: Response,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
     _require_agent_or_admin(current_user)
-    return service.list_queue(limit=limit, offset=offset)
+    projection = _list_fields(fields)
+    page = service.list_queue(
+        limit=limit, offset=offset, cursor=cursor, total_mode=total_mode, fields=projection
+    )
+    return _list_response(response, page, projection, if_none_match)
 
 
 @router.get(
@@ -177,18 +378,19 @@ def api_list_queue(
     response_model=RequestRead,
     operation_id="requests_get",
     summary="Получить заявку по id",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_get_request(
     request_id: int,
     response: Response,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
     req = service.get_or_404(request_id)
     RequestPolicy.can_view(current_user, req)
-    response.headers["ETag"] = compute_etag(req.id, req.updated_at)
-    return req
+    etag = compute_etag(req.id, req.updated_at)
+    return _conditional(response, etag, if_none_match, RequestRead.model_validate(req))
 
 
 @router.patch(
@@ -204,9 +406,39 @@ def api_update_status(
     http_request: Request,
     response: Response,
     if_match: str | None = Header(default=None, alias="If-Match"),
-    service: RequestService = Depends(get_request_service),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    uow: SqlAlchemyUnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_user),
 ):
+    store = build_idempotency_store(uow)
+    service = RequestService(uow, store)
+    key = validate_key(idempotency_key)
+    if key is None:
+        updated = _update_status(service, request_id, payload, http_request, if_match, current_user)
+    else:
+        idempotency = IdempotencyService(store)
+        path = f"/api/v1/requests/{request_id}/status"
+        outcome = idempotency.begin(_idempotency_scope(current_user, "PATCH", path, key, payload))
+        # Повтор отдаёт сохранённый ответ до проверки If-Match: ETag уже сменился.
+        if isinstance(outcome, StoredResponse):
+            return _replay(response, outcome)
+        with idempotency.guard(outcome):
+            updated = _update_status(
+                service, request_id, payload, http_request, if_match, current_user, outcome
+            )
+    response.headers["ETag"] = compute_etag(updated.id, updated.updated_at)
+    return updated
+
+
+def _update_status(
+    service: RequestService,
+    request_id: int,
+    payload: RequestStatusUpdate,
+    http_request: Request,
+    if_match: str | None,
+    current_user: User,
+    idempotency: Reservation | None = None,
+) -> RequestRead:
     req = service.get_or_404(request_id)
     RequestPolicy.can_update_status(current_user, req, payload)
 
@@ -216,28 +448,61 @@ def api_update_status(
     if if_match is not None and if_match.strip() != current_etag:
         raise OptimisticLockFailed()
 
-    updated = service.update_status(
+    return service.update_status(
         request_id,
         payload,
         current_user,
         client_ip=http_request.client.host if http_request.client else None,
         user_agent=http_request.headers.get("user-agent"),
+        idempotency=idempotency,
+    )
+
+
+@router.patch(
+    ":batch",
+    response_model=RequestBulkStatusResult,
+    operation_id="requests_update_status_batch",
+    summary="Пакетная смена статуса/исполнителя",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+def api_update_status_batch(
+    payload: RequestBulkStatusUpdate,
+    http_request: Request,
+    service: RequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user),
+):
+    """Меняет статус/исполнителя до REQUEST_BATCH_MAX_ITEMS заявок одной транзакцией.
+
+    Права, If-Match (поле if_match элемента) и переход FSM проверяются
+    поэлементно, как у PATCH /{id}/status; ошибка элемента не валит пачку.
+    """
+    _check_batch_size(payload.items)
+    return service.update_status_many(
+        payload.items,
+        current_user,
+        client_ip=http_request.client.host if http_request.client else None,
+        user_agent=http_request.headers.get("user-agent"),
     )
-    response.headers["ETag"] = compute_etag(updated.id, updated.updated_at)
-    return updated
 
 
 @router.get(
     "/{request_id}/history",
+    response_model=Page[RequestLogRead],
     operation_id="requests_history",
     summary="История изменений заявки",
-    responses={**COMMON_ERROR_RESPONSES},
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
 )
 def api_request_history(
     request_id: int,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, description=_HISTORY_CURSOR_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     service: RequestService = Depends(get_request_service),
     current_user: User = Depends(get_current_user),
 ):
+    """История по возрастанию времени; страницы — по курсору, без total."""
     req = service.get_or_404(request_id)
     RequestPolicy.can_view_history(current_user, req)
-    return service.list_history(request_id)
+    page = service.list_history(req, limit=limit, cursor=cursor)
+    return _history_response(response, request_id, page, if_none_match)
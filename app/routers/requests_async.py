@@ -0,0 +1,380 @@
+"""HTTP-роутер заявок (v1) для DB_STACK=async.
+
+Те же эндпоинты, схемы и operation_id, что в app.routers.requests, но
+async def поверх AsyncRequestService: обработчик не занимает поток из
+threadpool на время запросов к БД. В приложение подключается один из
+двух роутеров (см. app.main).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+
+from app.core.deps import get_async_uow
+from app.core.enums import RequestStatus
+from app.core.exceptions import OptimisticLockFailed
+from app.core.idempotency import validate_key
+from app.core.rate_limit import charge_quota_async
+from app.core.security import get_current_user_async
+from app.models.user import User
+from app.policies.request_policy import RequestPolicy
+from app.routers.requests import (
+    _CURSOR_DESCRIPTION,
+    _FIELDS_DESCRIPTION,
+    _HISTORY_CURSOR_DESCRIPTION,
+    _TOTAL_MODE_DESCRIPTION,
+    _check_batch_size,
+    _conditional,
+    _history_response,
+    _idempotency_scope,
+    _list_fields,
+    _list_response,
+    _replay,
+    _require_agent_or_admin,
+)
+from app.schemas.common import (
+    COMMON_ERROR_RESPONSES,
+    NOT_MODIFIED_RESPONSES,
+    Page,
+    TotalMode,
+    compute_etag,
+)
+from app.schemas.request import (
+    RequestBatchCreate,
+    RequestBatchResult,
+    RequestBulkStatusResult,
+    RequestBulkStatusUpdate,
+    RequestCreate,
+    RequestLogRead,
+    RequestRead,
+    RequestStatusUpdate,
+)
+from app.services.idempotency_service import AsyncIdempotencyService
+from app.services.idempotency_store import (
+    Reservation,
+    StoredResponse,
+    build_async_idempotency_store,
+)
+from app.services.request_service import AsyncRequestService
+from app.uow import AsyncSqlAlchemyUnitOfWork
+
+# Квота роли списывается до обработчика: вес операции — см. app.core.rate_limit.
+router = APIRouter(
+    prefix="/requests", tags=["requests"], dependencies=[Depends(charge_quota_async)]
+)
+
+
+def get_request_service(
+    uow: AsyncSqlAlchemyUnitOfWork = Depends(get_async_uow),
+) -> AsyncRequestService:
+    return AsyncRequestService(uow)
+
+
+@router.post(
+    "",
+    response_model=RequestRead,
+    status_code=status.HTTP_201_CREATED,
+    operation_id="requests_create",
+    summary="Создать заявку",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+async def api_create_request(
+    payload: RequestCreate,
+    response: Response,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    uow: AsyncSqlAlchemyUnitOfWork = Depends(get_async_uow),
+    current_user: User = Depends(get_current_user_async),
+):
+    store = build_async_idempotency_store(uow)
+    service = AsyncRequestService(uow, store)
+    key = validate_key(idempotency_key)
+    if key is None:
+        req = await service.create(payload, current_user)
+    else:
+        idempotency = AsyncIdempotencyService(store)
+        outcome = await idempotency.begin(
+            _idempotency_scope(current_user, "POST", "/api/v1/requests", key, payload)
+        )
+        if isinstance(outcome, StoredResponse):
+            return _replay(response, outcome)
+        async with idempotency.guard(outcome):
+            req = await service.create(payload, current_user, idempotency=outcome)
+    response.headers["ETag"] = compute_etag(req.id, req.updated_at)
+    return req
+
+
+@router.post(
+    ":batch",
+    response_model=RequestBatchResult,
+    operation_id="requests_create_batch",
+    summary="Пакетное создание заявок",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+async def api_create_requests_batch(
+    payload: RequestBatchCreate,
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    _check_batch_size(payload.items)
+    return await service.create_many(payload.items, current_user)
+
+
+@router.get(
+    "",
+    response_model=Page[RequestRead],
+    operation_id="requests_list",
+    summary="Список заявок (ADMIN/AGENT)",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_list_requests(
+    response: Response,
+    request_status: RequestStatus | None = Query(default=None),
+    created_by_id: int | None = Query(default=None, ge=1),
+    assigned_to_id: int | None = Query(default=None, ge=1),
+    date_from: datetime | None = Query(default=None),
+    date_to: datetime | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    _require_agent_or_admin(current_user)
+    projection = _list_fields(fields)
+    page = await service.list(
+        status=request_status,
+        created_by_id=created_by_id,
+        assigned_to_id=assigned_to_id,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
+    )
+    return _list_response(response, page, projection, if_none_match)
+
+
+@router.get(
+    "/my",
+    response_model=Page[RequestRead],
+    operation_id="requests_list_my",
+    summary="Мои заявки",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_list_my_requests(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    projection = _list_fields(fields)
+    page = await service.list_for_creator(
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
+    )
+    return _list_response(response, page, projection, if_none_match)
+
+
+@router.get(
+    "/assigned-to-me",
+    response_model=Page[RequestRead],
+    operation_id="requests_list_assigned",
+    summary="Назначенные на меня",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_list_assigned_to_me(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    projection = _list_fields(fields)
+    page = await service.list_for_assignee(
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total_mode=total_mode,
+        fields=projection,
+    )
+    return _list_response(response, page, projection, if_none_match)
+
+
+@router.get(
+    "/queue",
+    response_model=Page[RequestRead],
+    operation_id="requests_list_queue",
+    summary="Очередь (NEW без исполнителя)",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_list_queue(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description=_CURSOR_DESCRIPTION),
+    total_mode: TotalMode = Query(default=TotalMode.EXACT, description=_TOTAL_MODE_DESCRIPTION),
+    fields: str | None = Query(default=None, description=_FIELDS_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    _require_agent_or_admin(current_user)
+    projection = _list_fields(fields)
+    page = await service.list_queue(
+        limit=limit, offset=offset, cursor=cursor, total_mode=total_mode, fields=projection
+    )
+    return _list_response(response, page, projection, if_none_match)
+
+
+@router.get(
+    "/{request_id}",
+    response_model=RequestRead,
+    operation_id="requests_get",
+    summary="Получить заявку по id",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_get_request(
+    request_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    req = await service.get_or_404(request_id)
+    RequestPolicy.can_view(current_user, req)
+    etag = compute_etag(req.id, req.updated_at)
+    return _conditional(response, etag, if_none_match, RequestRead.model_validate(req))
+
+
+@router.patch(
+    "/{request_id}/status",
+    response_model=RequestRead,
+    operation_id="requests_update_status",
+    summary="Обновить статус/исполнителя (поддерживает If-Match)",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+async def api_update_status(
+    request_id: int,
+    payload: RequestStatusUpdate,
+    http_request: Request,
+    response: Response,
+    if_match: str | None = Header(default=None, alias="If-Match"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    uow: AsyncSqlAlchemyUnitOfWork = Depends(get_async_uow),
+    current_user: User = Depends(get_current_user_async),
+):
+    store = build_async_idempotency_store(uow)
+    service = AsyncRequestService(uow, store)
+    key = validate_key(idempotency_key)
+    if key is None:
+        updated = await _update_status(
+            service, request_id, payload, http_request, if_match, current_user
+        )
+    else:
+        idempotency = AsyncIdempotencyService(store)
+        path = f"/api/v1/requests/{request_id}/status"
+        outcome = await idempotency.begin(
+            _idempotency_scope(current_user, "PATCH", path, key, payload)
+        )
+        # Повтор отдаёт сохранённый ответ до проверки If-Match: ETag уже сменился.
+        if isinstance(outcome, StoredResponse):
+            return _replay(response, outcome)
+        async with idempotency.guard(outcome):
+            updated = await _update_status(
+                service, request_id, payload, http_request, if_match, current_user, outcome
+            )
+    response.headers["ETag"] = compute_etag(updated.id, updated.updated_at)
+    return updated
+
+
+async def _update_status(
+    service: AsyncRequestService,
+    request_id: int,
+    payload: RequestStatusUpdate,
+    http_request: Request,
+    if_match: str | None,
+    current_user: User,
+    idempotency: Reservation | None = None,
+) -> RequestRead:
+    req = await service.get_or_404(request_id)
+    RequestPolicy.can_update_status(current_user, req, payload)
+
+    # Optimistic concurrency control.
+    # Если клиент прислал If-Match — он обязан совпасть с актуальным ETag.
+    current_etag = compute_etag(req.id, req.updated_at)
+    if if_match is not None and if_match.strip() != current_etag:
+        raise OptimisticLockFailed()
+
+    return await service.update_status(
+        request_id,
+        payload,
+        current_user,
+        client_ip=http_request.client.host if http_request.client else None,
+        user_agent=http_request.headers.get("user-agent"),
+        idempotency=idempotency,
+    )
+
+
+@router.patch(
+    ":batch",
+    response_model=RequestBulkStatusResult,
+    operation_id="requests_update_status_batch",
+    summary="Пакетная смена статуса/исполнителя",
+    responses={**COMMON_ERROR_RESPONSES},
+)
+async def api_update_status_batch(
+    payload: RequestBulkStatusUpdate,
+    http_request: Request,
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    _check_batch_size(payload.items)
+    return await service.update_status_many(
+        payload.items,
+        current_user,
+        client_ip=http_request.client.host if http_request.client else None,
+        user_agent=http_request.headers.get("user-agent"),
+    )
+
+
+@router.get(
+    "/{request_id}/history",
+    response_model=Page[RequestLogRead],
+    operation_id="requests_history",
+    summary="История изменений заявки",
+    responses={**COMMON_ERROR_RESPONSES, **NOT_MODIFIED_RESPONSES},
+)
+async def api_request_history(
+    request_id: int,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, description=_HISTORY_CURSOR_DESCRIPTION),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    service: AsyncRequestService = Depends(get_request_service),
+    current_user: User = Depends(get_current_user_async),
+):
+    req = await service.get_or_404(request_id)
+    RequestPolicy.can_view_history(current_user, req)
+    page = await service.list_history(req, limit=limit, cursor=cursor)
+    return _history_response(response, request_id, page, if_none_match)
@@ -1,36 +1,122 @@
-"""Общие схемы API: Pagination envelope, ETag-утилиты."""
+"""Общие схемы API: Pagination envelope, keyset-курсоры, ETag-утилиты."""
 
 from __future__ import annotations
 
+import base64
+import binascii
+from collections.abc import Callable
 from datetime import datetime
+from enum import Enum
+from functools import lru_cache
 from hashlib import sha256
-from typing import Generic, List, TypeVar
+from typing import Any, Generic, List, TypeVar
 
 from pydantic import BaseModel, Field
 
+from app.core.exceptions import InvalidCursor
+
 T = TypeVar("T")
 
 
+class TotalMode(str, Enum):
+    """Как считать `total` в списочном ответе.
+
+    exact    — честный COUNT(*) по фильтру (дорого на больших выборках);
+    estimate — оценка планировщика Postgres, без сканирования строк;
+    none     — total не считается, has_next выводится из выборки limit+1.
+    """
+
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
 class Page(BaseModel, Generic[T]):
     """Единый envelope для списочных ответов."""
 
     items: List[T] = Field(..., description="Элементы текущей страницы.")
-    total: int = Field(..., ge=0, description="Всего элементов по фильтру.")
+    total: int | None = Field(
+        ...,
+        ge=0,
+        description="Всего элементов по фильтру (null при total_mode=none).",
+    )
     limit: int = Field(..., ge=1, description="Размер страницы.")
     offset: int = Field(..., ge=0, description="Смещение от начала.")
     has_next: bool = Field(..., description="Есть ли следующая страница.")
+    next_cursor: str | None = Field(
+        None,
+        description="Непрозрачный курсор следующей страницы (передать в `cursor`).",
+    )
+    total_mode: TotalMode = Field(
+        TotalMode.EXACT,
+        description="Каким способом получен `total`.",
+    )
 
     @classmethod
-    def of(cls, items: List[T], *, total: int, limit: int, offset: int) -> Page[T]:
+    def of(
+        cls,
+        items: List[T],
+        *,
+        total: int | None,
+        limit: int,
+        offset: int,
+        has_next: bool | None = None,
+        next_cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Page[T]:
+        if has_next is None:
+            has_next = total is not None and (offset + len(items)) < total
+        if total is not None and total_mode is TotalMode.ESTIMATE:
+            # Оценка планировщика может отставать от реальности; не даём ей
+            # противоречить тому, что клиент видит на этой же странице.
+            total = max(total, offset + len(items) + int(has_next))
         return cls(
             items=items,
             total=total,
             limit=limit,
             offset=offset,
-            has_next=(offset + len(items)) < total,
+            has_next=has_next,
+            next_cursor=next_cursor,
+            total_mode=total_mode,
         )
 
 
+# ------------------------------------------------------------------
+# Keyset-пагинация
+# ------------------------------------------------------------------
+#
+# Курсор кодирует позицию последнего элемента страницы — пару
+# (created_at, id) — в urlsafe-base64 без паддинга. Клиенту он
+# непрозрачен; сервер по нему строит seek-условие
+# (created_at, id) < (:created_at, :id), которое работает за одинаковое
+# время независимо от «глубины» страницы, в отличие от OFFSET.
+
+CursorPosition = tuple[datetime, int]
+
+# id — Integer (int4) в Postgres: больший id из курсора упал бы в БД
+# NumericValueOutOfRange (500), а не InvalidCursor.
+_MAX_CURSOR_ID = 2**31 - 1
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    raw = f"{created_at.isoformat()},{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorPosition:
+    """Разбирает курсор; любой мусор → InvalidCursor (400)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        ts, _, raw_id = raw.rpartition(",")
+        position, item_id = datetime.fromisoformat(ts), int(raw_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursor()
+    if not 1 <= item_id <= _MAX_CURSOR_ID:
+        raise InvalidCursor()
+    return position, item_id
+
+
 class ProblemDetails(BaseModel):
     """RFC 7807 Problem Details — описательная схема для OpenAPI."""
 
@@ -57,14 +143,61 @@ COMMON_ERROR_RESPONSES = {
 }
 
 
+# Для GET с поддержкой If-None-Match.
+NOT_MODIFIED_RESPONSES = {
+    304: {"description": "Не изменилось: If-None-Match совпал с текущим ETag, тело пустое."},
+}
+
+
+@lru_cache(maxsize=4096)
+def _digest(basis: str) -> str:
+    return sha256(basis.encode("utf-8")).hexdigest()[:32]
+
+
 def compute_etag(resource_id: int | str, updated_at: datetime, *extra: object) -> str:
     """Детерминированный strong ETag для ресурса.
 
     Основа — пара (id, updated_at). extra позволяет добавить версию
-    при будущем переходе на explicit version column.
+    при будущем переходе на explicit version column. Дайджест кешируется:
+    одна и та же версия ресурса опрашивается многократно (поллинг, If-Match).
     """
     basis = f"{resource_id}:{updated_at.isoformat()}"
     for item in extra:
         basis += f":{item}"
-    digest = sha256(basis.encode("utf-8")).hexdigest()[:32]
-    return f'"{digest}"'
+    return f'"{_digest(basis)}"'
+
+
+def compute_weak_etag(*parts: object) -> str:
+    """Weak ETag (W/"...") для составных ответов: страниц, истории.
+
+    Такой ответ семантически тот же при тех же частях, но байт-в-байт
+    идентичность не гарантируется — поэтому weak.
+    """
+    return f'W/"{_digest("|".join(map(str, parts)))}"'
+
+
+def page_etag(page: Page[Any], version: Callable[[Any], object], *extra: object) -> str:
+    """Weak ETag страницы: метаданные + версия каждого элемента (обычно id и updated_at).
+
+    extra — параметры представления (например, проекция полей).
+    """
+    return compute_weak_etag(
+        page.total,
+        page.limit,
+        page.offset,
+        page.has_next,
+        page.next_cursor,
+        page.total_mode.value,
+        *(version(item) for item in page.items),
+        *extra,
+    )
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверка If-None-Match: weak-сравнение (RFC 9110 §13.1.2), «*» — любой."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
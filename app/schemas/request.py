@@ -2,7 +2,7 @@ from datetime import datetime
 
 from pydantic import UUID4, BaseModel, ConfigDict, Field, field_validator
 
-from app.core.enums import RequestStatus
+from app.core.enums import RequestAction, RequestStatus
 
 
 class RequestCreate(BaseModel):
@@ -44,6 +44,24 @@ class RequestRead(BaseModel):
     updated_at: datetime
 
 
+class RequestLogRead(BaseModel):
+    """Запись истории заявки (GET /requests/{id}/history)."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    request_id: int
+    user_id: int
+    action: RequestAction
+    old_value: str | None = None
+    new_value: str | None = None
+    comment: str | None = None
+    source: str
+    client_ip: str | None = None
+    user_agent: str | None = None
+    timestamp: datetime
+
+
 class RequestStatusUpdate(BaseModel):
     status: RequestStatus
     assignee_id: int | None = Field(default=None, ge=1)
@@ -52,3 +70,62 @@ class RequestStatusUpdate(BaseModel):
         max_length=500,
         description="Комментарий при изменении статуса (обязательно при CANCEL)",
     )
+
+
+class RequestBatchItem(RequestCreate):
+    idempotency_key: str | None = Field(
+        default=None,
+        max_length=128,
+        description="Ключ идемпотентности элемента — как Idempotency-Key у одиночного POST.",
+    )
+
+
+class RequestBatchCreate(BaseModel):
+    items: list[RequestBatchItem] = Field(..., min_length=1)
+
+
+class BatchItemError(BaseModel):
+    code: str
+    detail: str
+
+
+class RequestBatchItemResult(BaseModel):
+    index: int = Field(..., description="Позиция элемента во входном items.")
+    status: int = Field(
+        ..., description="201 — создана, 200 — повтор по idempotency_key, 4xx — ошибка элемента."
+    )
+    request: RequestRead | None = None
+    error: BatchItemError | None = None
+
+
+class RequestBatchResult(BaseModel):
+    items: list[RequestBatchItemResult]
+    created: int
+    failed: int
+
+
+class RequestBulkStatusItem(RequestStatusUpdate):
+    request_id: int = Field(..., ge=1)
+    if_match: str | None = Field(
+        default=None,
+        description="ETag заявки, как заголовок If-Match у одиночного PATCH.",
+    )
+
+
+class RequestBulkStatusUpdate(BaseModel):
+    items: list[RequestBulkStatusItem] = Field(..., min_length=1)
+
+
+class RequestBulkStatusItemResult(BaseModel):
+    index: int = Field(..., description="Позиция элемента во входном items.")
+    request_id: int
+    status: int = Field(..., description="200 — обновлена, 4xx — ошибка элемента.")
+    request: RequestRead | None = None
+    etag: str | None = Field(default=None, description="Новый ETag заявки для If-Match.")
+    error: BatchItemError | None = None
+
+
+class RequestBulkStatusResult(BaseModel):
+    items: list[RequestBulkStatusItemResult]
+    updated: int
+    failed: int
@@ -0,0 +1,85 @@
+"""Идемпотентность запросов: бронь ключа → выполнение → ответ.
+
+Протокол reserve-then-complete:
+    1. begin() — бронь ключа в хранилище (app.services.idempotency_store),
+       видна конкурентам ещё до начала работы;
+    2. запрос выполняется; RequestService сохраняет ответ в бронь — в своей
+       транзакции (postgres) или сразу после её commit (redis);
+    3. запрос упал — бронь снимается (guard), клиент может повторить.
+
+Дубль, пришедший во время выполнения оригинала, опрашивает бронь до
+IDEMPOTENCY_WAIT_SECONDS и получает сохранённый ответ, а не дождавшись —
+409 idempotency_key_in_progress с Retry-After. Тот же ключ с другим телом —
+409 idempotency_key_conflict. Брошенные брони и просроченные ключи
+перехватываются новым запросом (см. хранилища).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyInProgress
+from app.services.idempotency_store import (
+    AsyncIdempotencyStore,
+    IdempotencyScope,
+    IdempotencyStore,
+    Reservation,
+    StoredResponse,
+)
+
+_POLL_SECONDS = 0.05
+
+
+def _in_progress() -> IdempotencyKeyInProgress:
+    return IdempotencyKeyInProgress(retry_after=max(1, round(settings.IDEMPOTENCY_WAIT_SECONDS)))
+
+
+class IdempotencyService:
+    def __init__(self, store: IdempotencyStore) -> None:
+        self._store = store
+
+    def begin(self, scope: IdempotencyScope) -> Reservation | StoredResponse:
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            outcome = self._store.reserve(scope)
+            if outcome is not None:
+                return outcome
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            time.sleep(_POLL_SECONDS)
+
+    @contextmanager
+    def guard(self, reservation: Reservation) -> Iterator[Reservation]:
+        """Снимает бронь, если запрос упал, — повтор выполнится заново."""
+        try:
+            yield reservation
+        except BaseException:
+            self._store.release(reservation)
+            raise
+
+
+class AsyncIdempotencyService:
+    def __init__(self, store: AsyncIdempotencyStore) -> None:
+        self._store = store
+
+    async def begin(self, scope: IdempotencyScope) -> Reservation | StoredResponse:
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            outcome = await self._store.reserve(scope)
+            if outcome is not None:
+                return outcome
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            await asyncio.sleep(_POLL_SECONDS)
+
+    @asynccontextmanager
+    async def guard(self, reservation: Reservation) -> AsyncIterator[Reservation]:
+        try:
+            yield reservation
+        except BaseException:
+            await self._store.release(reservation)
+            raise
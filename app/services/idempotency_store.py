@@ -0,0 +1,699 @@
+"""Хранилища ключей идемпотентности: Postgres и Redis.
+
+IdempotencyStore — одна попытка брони ключа, сохранение ответа и снятие
+брони; ожидание конкурентного дубля — в IdempotencyService. Бэкенд
+выбирает IDEMPOTENCY_BACKEND (build_idempotency_store).
+
+postgres — таблица idempotency_keys в UoW запроса. Бронь — строка без
+ответа, ответ пишется в транзакции самого запроса (transactional=True) и
+появляется ровно вместе с изменением. Брошенная бронь перехватывается
+через IDEMPOTENCY_LOCK_SECONDS, просроченные ключи удаляет воркер.
+
+redis — ключ sf:idem:{user_id}:{method}:{path}:{key}, значение — токен
+брони (32 hex) + признак p/d (бронь/ответ) + zlib(JSON {hash, status,
+body}). Бронь — SET NX с TTL IDEMPOTENCY_LOCK_SECONDS, ответ — SET с TTL
+IDEMPOTENCY_TTL_HOURS: брошенные брони и старые ключи истекают в самом
+Redis, таблица и purge-задача не нужны. Ответ пишется сразу после commit запроса
+(transactional=False): если процесс упадёт между commit и записью ответа,
+повтор после истечения брони выполнится заново. Запись ответа и снятие
+брони сверяют токен Lua-скриптом — чужую бронь не трогают, а снятие
+не удаляет уже записанный ответ.
+
+Пачка (POST /requests:batch) бронирует ключи до выполнения так же, но
+одним заходом: reserve_many — multi-row INSERT ... ON CONFLICT DO NOTHING
+RETURNING (postgres) или pipeline SET NX (redis); complete_many и
+release_many — тоже пачкой.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Protocol
+from uuid import uuid4
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyConflict
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis, get_redis
+from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
+
+_log = get_logger("idempotency")
+
+
+@dataclass(frozen=True, slots=True)
+class IdempotencyScope:
+    """Ключ привязан к (user_id, method, path): в разных эндпоинтах не пересекается."""
+
+    user_id: int
+    method: str
+    path: str
+    key: str
+    request_hash: str
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    status: int
+    body: dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class Reservation:
+    """Своя бронь ключа; token — id строки (postgres) или токен значения (redis)."""
+
+    scope: IdempotencyScope
+    token: int | str
+
+
+class StoredKey(Protocol):
+    request_hash: str
+    response_status: int | None
+    response_body: dict[str, Any] | None
+
+
+class IdempotencyStore(Protocol):
+    # True — ответ пишется в транзакции запроса (до commit), False — после commit.
+    transactional: bool
+
+    def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None:
+        """Бронь, сохранённый ответ или None — ключ занят выполняющимся запросом."""
+        ...
+
+    def complete(self, reservation: Reservation, response: StoredResponse) -> None: ...
+
+    def release(self, reservation: Reservation) -> None: ...
+
+    def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]:
+        """Бронь ключей пачки (одного user_id, method, path) за один заход.
+
+        По ключу — своя бронь или чужое состояние ключа (ответ, бронь
+        выполняющегося запроса, другое тело). Ключа нет в ответе — бронь
+        сняли между попыткой и чтением: элемент считается «в работе».
+        """
+        ...
+
+    def complete_many(self, completed: Sequence[tuple[Reservation, StoredResponse]]) -> None: ...
+
+    def release_many(self, reservations: Sequence[Reservation]) -> None: ...
+
+
+class AsyncIdempotencyStore(Protocol):
+    transactional: bool
+
+    async def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None: ...
+
+    async def complete(self, reservation: Reservation, response: StoredResponse) -> None: ...
+
+    async def release(self, reservation: Reservation) -> None: ...
+
+    async def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]: ...
+
+    async def complete_many(
+        self, completed: Sequence[tuple[Reservation, StoredResponse]]
+    ) -> None: ...
+
+    async def release_many(self, reservations: Sequence[Reservation]) -> None: ...
+
+
+def build_idempotency_store(uow: SqlAlchemyUnitOfWork) -> IdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(get_redis())
+    return PostgresIdempotencyStore(uow)
+
+
+def build_async_idempotency_store(uow: AsyncSqlAlchemyUnitOfWork) -> AsyncIdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return AsyncRedisIdempotencyStore(get_async_redis())
+    return AsyncPostgresIdempotencyStore(uow)
+
+
+# ---------- postgres ----------
+
+
+class _KeyState(StoredKey, Protocol):
+    id: int
+    created_at: datetime
+
+
+class _Action(Enum):
+    REPLAY = "replay"
+    WAIT = "wait"
+    TAKE_OVER = "take_over"
+
+
+@dataclass(frozen=True, slots=True)
+class _Clock:
+    now: datetime
+    stale_before: datetime
+    expired_before: datetime
+
+    @classmethod
+    def at(cls, now: datetime) -> _Clock:
+        return cls(
+            now=now,
+            stale_before=now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            expired_before=now - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        )
+
+
+def _resolve(state: _KeyState, request_hash: str, clock: _Clock) -> _Action:
+    """Что делать с уже существующим ключом. Чистая функция — без IO."""
+    if state.created_at < clock.expired_before:
+        return _Action.TAKE_OVER
+    if state.request_hash != request_hash:
+        raise IdempotencyKeyConflict()
+    if state.response_status is not None:
+        return _Action.REPLAY
+    if state.created_at < clock.stale_before:
+        return _Action.TAKE_OVER
+    return _Action.WAIT
+
+
+def _stored(state: StoredKey) -> StoredResponse:
+    assert state.response_status is not None and state.response_body is not None
+    return StoredResponse(status=state.response_status, body=state.response_body)
+
+
+def _lookup_params(scope: IdempotencyScope) -> dict[str, Any]:
+    params = asdict(scope)
+    del params["request_hash"]
+    return params
+
+
+def _batch_action(state: _KeyState, request_hash: str, clock: _Clock) -> _Action | None:
+    # Конфликт тела в пачке — ошибка одного элемента, её решает сервис.
+    try:
+        return _resolve(state, request_hash, clock)
+    except IdempotencyKeyConflict:
+        return None
+
+
+def _completed_values(
+    completed: Sequence[tuple[Reservation, StoredResponse]],
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": reservation.token,
+            "response_status": response.status,
+            "response_body": response.body,
+        }
+        for reservation, response in completed
+    ]
+
+
+def _record_ids(reservations: Sequence[Reservation]) -> list[int]:
+    return [reservation.token for reservation in reservations if isinstance(reservation.token, int)]
+
+
+class PostgresIdempotencyStore:
+    transactional = True
+
+    def __init__(self, uow: SqlAlchemyUnitOfWork) -> None:
+        self._uow = uow
+
+    def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None:
+        """INSERT брони ... ON CONFLICT DO NOTHING; своя бронь сразу коммитится."""
+        clock = _Clock.at(datetime.utcnow())
+        record_id = self._uow.idempotency.reserve(**asdict(scope), now=clock.now)
+        if record_id is None:
+            state = self._uow.idempotency.state(**_lookup_params(scope))
+            # None — бронь сняли между INSERT и SELECT: пробуем снова.
+            if state is not None:
+                action = _resolve(state, scope.request_hash, clock)
+                if action is _Action.REPLAY:
+                    return _stored(state)
+                if action is _Action.TAKE_OVER and self._uow.idempotency.take_over(
+                    state.id,
+                    request_hash=scope.request_hash,
+                    now=clock.now,
+                    stale_before=clock.stale_before,
+                    expired_before=clock.expired_before,
+                ):
+                    record_id = state.id
+        if record_id is None:
+            self._uow.rollback()
+            return None
+        self._uow.commit()
+        return Reservation(scope, record_id)
+
+    def complete(self, reservation: Reservation, response: StoredResponse) -> None:
+        assert isinstance(reservation.token, int)
+        self._uow.idempotency.complete(
+            reservation.token, status=response.status, body=response.body
+        )
+
+    def release(self, reservation: Reservation) -> None:
+        assert isinstance(reservation.token, int)
+        try:
+            self._uow.rollback()
+            self._uow.idempotency.release(reservation.token)
+            self._uow.commit()
+        except SQLAlchemyError as exc:
+            # Бронь останется и будет перехвачена через IDEMPOTENCY_LOCK_SECONDS.
+            _log.warning("idempotency_release_failed", error=str(exc))
+
+    def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]:
+        """Один INSERT ... ON CONFLICT DO NOTHING на всю пачку, затем commit.
+
+        Занятые ключи читаются одним SELECT; брошенные и просроченные брони
+        перехватываются, как в reserve().
+        """
+        if not scopes:
+            return {}
+        clock = _Clock.at(datetime.utcnow())
+        won = self._uow.idempotency.reserve_many([asdict(s) for s in scopes], now=clock.now)
+        claims: dict[str, Reservation | StoredKey] = {
+            s.key: Reservation(s, won[s.key]) for s in scopes if s.key in won
+        }
+        lost = [s for s in scopes if s.key not in won]
+        if lost:
+            first = lost[0]
+            states = self._uow.idempotency.states(
+                user_id=first.user_id,
+                method=first.method,
+                path=first.path,
+                keys=[s.key for s in lost],
+            )
+            for scope in lost:
+                state = states.get(scope.key)
+                if state is None:
+                    continue
+                claims[scope.key] = state
+                if _batch_action(
+                    state, scope.request_hash, clock
+                ) is _Action.TAKE_OVER and self._uow.idempotency.take_over(
+                    state.id,
+                    request_hash=scope.request_hash,
+                    now=clock.now,
+                    stale_before=clock.stale_before,
+                    expired_before=clock.expired_before,
+                ):
+                    claims[scope.key] = Reservation(scope, state.id)
+        self._uow.commit()
+        return claims
+
+    def complete_many(self, completed: Sequence[tuple[Reservation, StoredResponse]]) -> None:
+        self._uow.idempotency.complete_many(_completed_values(completed))
+
+    def release_many(self, reservations: Sequence[Reservation]) -> None:
+        if not reservations:
+            return
+        try:
+            self._uow.rollback()
+            self._uow.idempotency.release_many(_record_ids(reservations))
+            self._uow.commit()
+        except SQLAlchemyError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc), keys=len(reservations))
+
+
+class AsyncPostgresIdempotencyStore:
+    transactional = True
+
+    def __init__(self, uow: AsyncSqlAlchemyUnitOfWork) -> None:
+        self._uow = uow
+
+    async def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None:
+        clock = _Clock.at(datetime.utcnow())
+        record_id = await self._uow.idempotency.reserve(**asdict(scope), now=clock.now)
+        if record_id is None:
+            state = await self._uow.idempotency.state(**_lookup_params(scope))
+            if state is not None:
+                action = _resolve(state, scope.request_hash, clock)
+                if action is _Action.REPLAY:
+                    return _stored(state)
+                if action is _Action.TAKE_OVER and await self._uow.idempotency.take_over(
+                    state.id,
+                    request_hash=scope.request_hash,
+                    now=clock.now,
+                    stale_before=clock.stale_before,
+                    expired_before=clock.expired_before,
+                ):
+                    record_id = state.id
+        if record_id is None:
+            await self._uow.rollback()
+            return None
+        await self._uow.commit()
+        return Reservation(scope, record_id)
+
+    async def complete(self, reservation: Reservation, response: StoredResponse) -> None:
+        assert isinstance(reservation.token, int)
+        await self._uow.idempotency.complete(
+            reservation.token, status=response.status, body=response.body
+        )
+
+    async def release(self, reservation: Reservation) -> None:
+        assert isinstance(reservation.token, int)
+        try:
+            await self._uow.rollback()
+            await self._uow.idempotency.release(reservation.token)
+            await self._uow.commit()
+        except SQLAlchemyError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc))
+
+    async def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]:
+        if not scopes:
+            return {}
+        clock = _Clock.at(datetime.utcnow())
+        won = await self._uow.idempotency.reserve_many([asdict(s) for s in scopes], now=clock.now)
+        claims: dict[str, Reservation | StoredKey] = {
+            s.key: Reservation(s, won[s.key]) for s in scopes if s.key in won
+        }
+        lost = [s for s in scopes if s.key not in won]
+        if lost:
+            first = lost[0]
+            states = await self._uow.idempotency.states(
+                user_id=first.user_id,
+                method=first.method,
+                path=first.path,
+                keys=[s.key for s in lost],
+            )
+            for scope in lost:
+                state = states.get(scope.key)
+                if state is None:
+                    continue
+                claims[scope.key] = state
+                if _batch_action(
+                    state, scope.request_hash, clock
+                ) is _Action.TAKE_OVER and await self._uow.idempotency.take_over(
+                    state.id,
+                    request_hash=scope.request_hash,
+                    now=clock.now,
+                    stale_before=clock.stale_before,
+                    expired_before=clock.expired_before,
+                ):
+                    claims[scope.key] = Reservation(scope, state.id)
+        await self._uow.commit()
+        return claims
+
+    async def complete_many(self, completed: Sequence[tuple[Reservation, StoredResponse]]) -> None:
+        await self._uow.idempotency.complete_many(_completed_values(completed))
+
+    async def release_many(self, reservations: Sequence[Reservation]) -> None:
+        if not reservations:
+            return
+        try:
+            await self._uow.rollback()
+            await self._uow.idempotency.release_many(_record_ids(reservations))
+            await self._uow.commit()
+        except SQLAlchemyError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc), keys=len(reservations))
+
+
+# ---------- redis ----------
+
+_PREFIX = "sf:idem"
+_TOKEN_LEN = 32
+_PENDING = "p"
+_DONE = "d"
+
+# Значение всё ещё начинается с ARGV[1] — бронь наша: истёкшую и
+# перехваченную другим запросом не трогаем. Ответ пишется по токену,
+# снятие (ARGV[1] = токен + «p») удаляет только бронь без ответа.
+_COMPLETE_SCRIPT = """
+local current = redis.call('GET', KEYS[1]) or ''
+if string.sub(current, 1, string.len(ARGV[1])) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+local current = redis.call('GET', KEYS[1]) or ''
+if string.sub(current, 1, string.len(ARGV[1])) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class _RedisKey:
+    token: str
+    request_hash: str
+    response_status: int | None
+    response_body: dict[str, Any] | None
+
+
+def _redis_key(user_id: int, method: str, path: str, key: str) -> str:
+    return f"{_PREFIX}:{user_id}:{method}:{path}:{key}"
+
+
+def _scope_key(scope: IdempotencyScope) -> str:
+    return _redis_key(scope.user_id, scope.method, scope.path, scope.key)
+
+
+def _ttl_seconds() -> int:
+    return settings.IDEMPOTENCY_TTL_HOURS * 3600
+
+
+def _encode(token: str, request_hash: str, response: StoredResponse | None) -> bytes:
+    payload = {
+        "hash": request_hash,
+        "status": response.status if response else None,
+        "body": response.body if response else None,
+    }
+    marker = _PENDING if response is None else _DONE
+    return (token + marker).encode() + zlib.compress(orjson.dumps(payload))
+
+
+def _decode(raw: bytes) -> _RedisKey:
+    payload = orjson.loads(zlib.decompress(raw[_TOKEN_LEN + 1 :]))
+    return _RedisKey(
+        token=raw[:_TOKEN_LEN].decode(),
+        request_hash=payload["hash"],
+        response_status=payload["status"],
+        response_body=payload["body"],
+    )
+
+
+def _resolve_redis(raw: bytes | None, request_hash: str) -> StoredResponse | None:
+    # None — бронь истекла или снята между SET и GET: пробуем снова.
+    if raw is None:
+        return None
+    state = _decode(raw)
+    if state.request_hash != request_hash:
+        raise IdempotencyKeyConflict()
+    return None if state.response_status is None else _stored(state)
+
+
+def _new_token() -> str:
+    return uuid4().hex
+
+
+def _pending_values(scopes: Sequence[IdempotencyScope]) -> list[tuple[str, str, bytes]]:
+    """Ключ Redis, токен и значение брони для каждого ключа пачки."""
+    values = []
+    for scope in scopes:
+        token = _new_token()
+        values.append((_scope_key(scope), token, _encode(token, scope.request_hash, None)))
+    return values
+
+
+def _batch_claims(
+    scopes: Sequence[IdempotencyScope],
+    pending: Sequence[tuple[str, str, bytes]],
+    won: Sequence[Any],
+    raws: Sequence[bytes | None],
+) -> dict[str, Reservation | StoredKey]:
+    """Сводит ответы SET NX и MGET проигранных ключей в брони/состояния."""
+    claims: dict[str, Reservation | StoredKey] = {}
+    lost = iter(raws)
+    for scope, (_, token, _), ok in zip(scopes, pending, won, strict=True):
+        if ok:
+            claims[scope.key] = Reservation(scope, token)
+        elif raw := next(lost):
+            claims[scope.key] = _decode(raw)
+    return claims
+
+
+class RedisIdempotencyStore:
+    transactional = False
+
+    def __init__(self, client: redis.Redis) -> None:
+        self._r = client
+        self._complete = client.register_script(_COMPLETE_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None:
+        key, token = _scope_key(scope), _new_token()
+        pending = _encode(token, scope.request_hash, None)
+        if self._r.set(key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return Reservation(scope, token)
+        return _resolve_redis(self._r.get(key), scope.request_hash)
+
+    def complete(self, reservation: Reservation, response: StoredResponse) -> None:
+        assert isinstance(reservation.token, str)
+        scope = reservation.scope
+        value = _encode(reservation.token, scope.request_hash, response)
+        try:
+            saved = self._complete(
+                keys=[_scope_key(scope)], args=[reservation.token, value, _ttl_seconds()]
+            )
+        except redis.RedisError as exc:
+            # Запрос уже закоммичен: повтор после истечения брони выполнится заново.
+            _log.warning("idempotency_complete_failed", error=str(exc))
+            return
+        if not saved:
+            _log.warning("idempotency_reservation_lost", key=scope.key, path=scope.path)
+
+    def release(self, reservation: Reservation) -> None:
+        try:
+            self._release(
+                keys=[_scope_key(reservation.scope)], args=[f"{reservation.token}{_PENDING}"]
+            )
+        except redis.RedisError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc))
+
+    def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]:
+        """SET NX всех ключей одним pipeline, проигранные — одним MGET."""
+        if not scopes:
+            return {}
+        pending = _pending_values(scopes)
+        pipe = self._r.pipeline(transaction=False)
+        for key, _, value in pending:
+            pipe.set(key, value, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS)
+        won = pipe.execute()
+        lost = [key for (key, _, _), ok in zip(pending, won, strict=True) if not ok]
+        raws = self._r.mget(lost) if lost else []
+        return _batch_claims(scopes, pending, won, raws)
+
+    def complete_many(self, completed: Sequence[tuple[Reservation, StoredResponse]]) -> None:
+        if not completed:
+            return
+        pipe = self._r.pipeline(transaction=False)
+        for reservation, response in completed:
+            scope = reservation.scope
+            value = _encode(str(reservation.token), scope.request_hash, response)
+            self._complete(
+                keys=[_scope_key(scope)],
+                args=[reservation.token, value, _ttl_seconds()],
+                client=pipe,
+            )
+        try:
+            saved = pipe.execute()
+        except redis.RedisError as exc:
+            _log.warning("idempotency_complete_failed", error=str(exc), keys=len(completed))
+            return
+        if lost := len(completed) - sum(saved):
+            _log.warning("idempotency_reservation_lost", keys=lost)
+
+    def release_many(self, reservations: Sequence[Reservation]) -> None:
+        if not reservations:
+            return
+        pipe = self._r.pipeline(transaction=False)
+        for reservation in reservations:
+            self._release(
+                keys=[_scope_key(reservation.scope)],
+                args=[f"{reservation.token}{_PENDING}"],
+                client=pipe,
+            )
+        try:
+            pipe.execute()
+        except redis.RedisError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc), keys=len(reservations))
+
+
+class AsyncRedisIdempotencyStore:
+    transactional = False
+
+    def __init__(self, client: aioredis.Redis) -> None:
+        self._r = client
+        self._complete = client.register_script(_COMPLETE_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    async def reserve(self, scope: IdempotencyScope) -> Reservation | StoredResponse | None:
+        key, token = _scope_key(scope), _new_token()
+        pending = _encode(token, scope.request_hash, None)
+        if await self._r.set(key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return Reservation(scope, token)
+        return _resolve_redis(await self._r.get(key), scope.request_hash)
+
+    async def complete(self, reservation: Reservation, response: StoredResponse) -> None:
+        assert isinstance(reservation.token, str)
+        scope = reservation.scope
+        value = _encode(reservation.token, scope.request_hash, response)
+        try:
+            saved = await self._complete(
+                keys=[_scope_key(scope)], args=[reservation.token, value, _ttl_seconds()]
+            )
+        except redis.RedisError as exc:
+            _log.warning("idempotency_complete_failed", error=str(exc))
+            return
+        if not saved:
+            _log.warning("idempotency_reservation_lost", key=scope.key, path=scope.path)
+
+    async def release(self, reservation: Reservation) -> None:
+        try:
+            await self._release(
+                keys=[_scope_key(reservation.scope)], args=[f"{reservation.token}{_PENDING}"]
+            )
+        except redis.RedisError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc))
+
+    async def reserve_many(
+        self, scopes: Sequence[IdempotencyScope]
+    ) -> Mapping[str, Reservation | StoredKey]:
+        if not scopes:
+            return {}
+        pending = _pending_values(scopes)
+        pipe = self._r.pipeline(transaction=False)
+        for key, _, value in pending:
+            pipe.set(key, value, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS)
+        won = await pipe.execute()
+        lost = [key for (key, _, _), ok in zip(pending, won, strict=True) if not ok]
+        raws = await self._r.mget(lost) if lost else []
+        return _batch_claims(scopes, pending, won, raws)
+
+    async def complete_many(self, completed: Sequence[tuple[Reservation, StoredResponse]]) -> None:
+        if not completed:
+            return
+        pipe = self._r.pipeline(transaction=False)
+        for reservation, response in completed:
+            scope = reservation.scope
+            value = _encode(str(reservation.token), scope.request_hash, response)
+            await self._complete(
+                keys=[_scope_key(scope)],
+                args=[reservation.token, value, _ttl_seconds()],
+                client=pipe,
+            )
+        try:
+            saved = await pipe.execute()
+        except redis.RedisError as exc:
+            _log.warning("idempotency_complete_failed", error=str(exc), keys=len(completed))
+            return
+        if lost := len(completed) - sum(saved):
+            _log.warning("idempotency_reservation_lost", keys=lost)
+
+    async def release_many(self, reservations: Sequence[Reservation]) -> None:
+        if not reservations:
+            return
+        pipe = self._r.pipeline(transaction=False)
+        for reservation in reservations:
+            await self._release(
+                keys=[_scope_key(reservation.scope)],
+                args=[f"{reservation.token}{_PENDING}"],
+                client=pipe,
+            )
+        try:
+            await pipe.execute()
+        except redis.RedisError as exc:
+            _log.warning("idempotency_release_failed", error=str(exc), keys=len(reservations))
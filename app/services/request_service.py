@@ -3,19 +3,37 @@
 Работает через Unit of Work: сервис не знает про Session, коммит один
 на бизнес-операцию. Все проверки переходов делегированы в
 app.domain.request_state_machine.
+
+RequestService (sync, Session в threadpool) и AsyncRequestService
+(AsyncSession, DB_STACK=async) делят всю логику без IO — сборку заявки,
+аудита, outbox-событий и страниц — через модульные функции ниже; классы
+отличаются только обращениями к UoW.
 """
 
 from __future__ import annotations
 
-from datetime import datetime
+from collections import Counter
+from collections.abc import Awaitable, Callable, Collection, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
+
+from sqlalchemy import Row
 
 from app.core.enums import RequestAction, RequestStatus, UserRole
 from app.core.exceptions import (
     AssigneeNotFound,
+    DomainError,
+    IdempotencyKeyConflict,
+    IdempotencyKeyInProgress,
+    OptimisticLockFailed,
     PermissionDenied,
     RequestNotFound,
 )
+from app.core.idempotency import compute_body_hash, validate_key
 from app.core.metrics import requests_created_total, requests_status_changed_total
+from app.domain.request_counters import CounterKey, RequestSnapshot, counter_deltas
 from app.domain.request_state_machine import (
     TransitionRequest,
     validate_transition,
@@ -24,58 +42,594 @@ from app.models.outbox import OutboxEvent
 from app.models.request import ServiceRequest
 from app.models.request_log import RequestLog
 from app.models.user import User
-from app.schemas.common import Page
-from app.schemas.request import RequestCreate, RequestRead, RequestStatusUpdate
-from app.uow import SqlAlchemyUnitOfWork
+from app.policies.request_policy import RequestPolicy
+from app.schemas.common import (
+    CursorPosition,
+    Page,
+    TotalMode,
+    compute_etag,
+    decode_cursor,
+    encode_cursor,
+)
+from app.schemas.request import (
+    BatchItemError,
+    RequestBatchItem,
+    RequestBatchItemResult,
+    RequestBatchResult,
+    RequestBulkStatusItem,
+    RequestBulkStatusItemResult,
+    RequestBulkStatusResult,
+    RequestCreate,
+    RequestLogRead,
+    RequestRead,
+    RequestStatusUpdate,
+)
+from app.services.idempotency_store import (
+    AsyncIdempotencyStore,
+    IdempotencyScope,
+    IdempotencyStore,
+    Reservation,
+    StoredKey,
+    StoredResponse,
+    build_async_idempotency_store,
+    build_idempotency_store,
+)
+from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
 
+# Область Idempotency-Key создания заявок: одиночный POST и пачка делят
+# одно пространство ключей, повтор элемента пачки одиночным POST — replay.
+_CREATE_METHOD = "POST"
+_CREATE_PATH = "/api/v1/requests"
 
-class RequestService:
-    def __init__(self, uow: SqlAlchemyUnitOfWork) -> None:
-        self._uow = uow
 
-    # ---------- создание ----------
+def _snapshot(req: ServiceRequest | Row[Any]) -> RequestSnapshot:
+    return RequestSnapshot(
+        status=req.status,
+        created_by_user_id=req.created_by_user_id,
+        assigned_to_user_id=req.assigned_to_user_id,
+    )
 
-    def create(self, data: RequestCreate, current_user: User) -> ServiceRequest:
-        if data.assignee_id is not None and self._uow.users.get(data.assignee_id) is None:
-            raise AssigneeNotFound()
 
-        if current_user.role == UserRole.EMPLOYEE and data.assignee_id is not None:
-            raise PermissionDenied(
-                "EMPLOYEE не может назначать исполнителя при создании заявки.",
-                code="employee_cannot_assign_on_create",
-            )
+def _status_value(status: RequestStatus | str) -> str:
+    return status.value if isinstance(status, RequestStatus) else str(status)
 
-        req = self._uow.requests.add(
-            ServiceRequest(
-                title=data.title,
-                description=data.description,
-                created_by_user_id=current_user.id,
-                assigned_to_user_id=data.assignee_id,
-            )
+
+def _check_create(data: RequestCreate, current_user: User) -> None:
+    if current_user.role == UserRole.EMPLOYEE and data.assignee_id is not None:
+        raise PermissionDenied(
+            "EMPLOYEE не может назначать исполнителя при создании заявки.",
+            code="employee_cannot_assign_on_create",
         )
-        self._uow.request_logs.add(
-            RequestLog(
-                request_id=req.id,
-                user_id=current_user.id,
-                action=RequestAction.CREATED.value,
-                source="API",
+
+
+def _request_values(data: RequestCreate, current_user: User) -> dict[str, Any]:
+    return {
+        "title": data.title,
+        "description": data.description,
+        "status": RequestStatus.NEW,
+        "created_by_user_id": current_user.id,
+        "assigned_to_user_id": data.assignee_id,
+    }
+
+
+def _created_log_values(req: ServiceRequest | Row[Any], current_user: User) -> dict[str, Any]:
+    return {
+        "request_id": req.id,
+        "user_id": current_user.id,
+        "action": RequestAction.CREATED.value,
+        "source": "API",
+    }
+
+
+def _created_log(req: Row[Any], current_user: User) -> RequestLog:
+    return RequestLog(**_created_log_values(req, current_user))
+
+
+def _created_event_values(req: ServiceRequest | Row[Any], current_user: User) -> dict[str, Any]:
+    return {
+        "event_type": "request.created",
+        "payload": {
+            "request_id": req.id,
+            "created_by_user_id": current_user.id,
+            "assigned_to_user_id": req.assigned_to_user_id,
+            "title": req.title,
+        },
+    }
+
+
+def _created_event(req: Row[Any], current_user: User) -> OutboxEvent:
+    return OutboxEvent(**_created_event_values(req, current_user))
+
+
+@dataclass(slots=True)
+class _BatchEntry:
+    """Элемент пачки, прошедший проверки и идущий в INSERT."""
+
+    index: int
+    data: RequestBatchItem
+    reservation: Reservation | None
+
+
+@dataclass(slots=True)
+class _BatchPlan:
+    """Разбор пачки до записи: ошибки и replay'и уже готовы, остальное — create."""
+
+    results: dict[int, RequestBatchItemResult] = field(default_factory=dict)
+    create: list[_BatchEntry] = field(default_factory=list)
+    # Брони элементов, не прошедших проверки, — снимаются до записи пачки.
+    unused: list[Reservation] = field(default_factory=list)
+
+    def reservations(self) -> list[Reservation]:
+        return [entry.reservation for entry in self.create if entry.reservation is not None]
+
+    def result(self) -> RequestBatchResult:
+        items = [self.results[i] for i in sorted(self.results)]
+        failed = sum(1 for item in items if item.error is not None)
+        return RequestBatchResult(items=items, created=len(self.create), failed=failed)
+
+
+@dataclass(slots=True)
+class _BatchWrites:
+    """Всё, что пишется вместе с заявками пачки, — multi-row INSERT'ами."""
+
+    logs: list[dict[str, Any]] = field(default_factory=list)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    idempotency: list[tuple[Reservation, StoredResponse]] = field(default_factory=list)
+    deltas: Counter[CounterKey] = field(default_factory=Counter)
+
+
+def _batch_keys(items: Sequence[RequestBatchItem]) -> list[str | None]:
+    # Невалидный ключ игнорируется, как и заголовок у одиночного POST.
+    return [validate_key(item.idempotency_key) for item in items]
+
+
+def _batch_scopes(
+    items: Sequence[RequestBatchItem], keys: Sequence[str | None], current_user: User
+) -> dict[int, IdempotencyScope]:
+    """Области ключей пачки по индексу элемента — только первое вхождение ключа."""
+    scopes: dict[int, IdempotencyScope] = {}
+    seen: set[str] = set()
+    for index, (item, key) in enumerate(zip(items, keys, strict=True)):
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        scopes[index] = IdempotencyScope(
+            user_id=current_user.id,
+            method=_CREATE_METHOD,
+            path=_CREATE_PATH,
+            key=key,
+            request_hash=compute_body_hash(
+                item.model_dump(mode="json", exclude={"idempotency_key"})
+            ),
+        )
+    return scopes
+
+
+def _claimed_result(
+    index: int, record: StoredKey | None, request_hash: str
+) -> RequestBatchItemResult:
+    """Ключ уже занят: сохранённый ответ или ошибка элемента."""
+    # None — бронь сняли между попыткой и чтением: как и занятый ключ, «в работе».
+    if record is not None and record.request_hash != request_hash:
+        raise IdempotencyKeyConflict()
+    if record is None or record.response_status is None:
+        # Ключ забронирован другим запросом, который ещё выполняется.
+        raise IdempotencyKeyInProgress()
+    return RequestBatchItemResult(
+        index=index, status=200, request=RequestRead.model_validate(record.response_body)
+    )
+
+
+def _item_error(index: int, exc: DomainError) -> RequestBatchItemResult:
+    return RequestBatchItemResult(
+        index=index,
+        status=exc.http_status,
+        error=BatchItemError(code=exc.code, detail=exc.message),
+    )
+
+
+def _plan_batch(
+    items: Sequence[RequestBatchItem],
+    keys: Sequence[str | None],
+    current_user: User,
+    *,
+    assignees: Collection[int],
+    scopes: Mapping[int, IdempotencyScope],
+    claims: Mapping[str, Reservation | StoredKey],
+) -> _BatchPlan:
+    """Проверки элементов пачки по заранее прочитанным исполнителям и броням.
+
+    Ошибка элемента не валит пачку: он получает свой статус и код, остальные
+    создаются. Ключ, повторённый внутри пачки, — конфликт для всех вхождений
+    кроме первого; ключ, который пачка не выиграла, — replay или ошибка.
+    """
+    plan = _BatchPlan()
+    for index, (item, key) in enumerate(zip(items, keys, strict=True)):
+        claim: Reservation | StoredKey | None = None
+        try:
+            if key is not None:
+                scope = scopes.get(index)
+                if scope is None:
+                    raise IdempotencyKeyConflict("Idempotency-Key повторяется внутри пачки.")
+                claim = claims.get(key)
+                if not isinstance(claim, Reservation):
+                    plan.results[index] = _claimed_result(index, claim, scope.request_hash)
+                    continue
+            if item.assignee_id is not None and item.assignee_id not in assignees:
+                raise AssigneeNotFound()
+            _check_create(item, current_user)
+        except DomainError as exc:
+            plan.results[index] = _item_error(index, exc)
+            if isinstance(claim, Reservation):
+                plan.unused.append(claim)
+            continue
+        plan.create.append(_BatchEntry(index, item, claim))
+    return plan
+
+
+def _complete_batch(plan: _BatchPlan, rows: list[Row[Any]], current_user: User) -> _BatchWrites:
+    """Сопоставляет RETURNING-строки элементам и собирает аудит, outbox и ключи."""
+    writes = _BatchWrites()
+    for entry, row in zip(plan.create, rows, strict=True):
+        created = RequestRead.model_construct(**row._mapping)
+        plan.results[entry.index] = RequestBatchItemResult(
+            index=entry.index, status=201, request=created
+        )
+        writes.logs.append(_created_log_values(row, current_user))
+        writes.events.append(_created_event_values(row, current_user))
+        writes.deltas.update(counter_deltas(None, _snapshot(row)))
+        if entry.reservation is not None:
+            response = StoredResponse(status=201, body=created.model_dump(mode="json"))
+            writes.idempotency.append((entry.reservation, response))
+    return writes
+
+
+@dataclass(slots=True)
+class _StatusChange:
+    """Что записать вместе с изменённой заявкой — в той же транзакции."""
+
+    before: RequestSnapshot
+    logs: list[dict[str, Any]] = field(default_factory=list)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    transition: tuple[str, str] | None = None
+
+
+def _validate_status_update(req: ServiceRequest, payload: RequestStatusUpdate) -> None:
+    if payload.status is not None:
+        validate_transition(
+            TransitionRequest(
+                current_status=req.status,
+                target_status=payload.status,
+                current_assignee_id=req.assigned_to_user_id,
+                new_assignee_id=payload.assignee_id,
             )
         )
-        self._uow.outbox.add(
-            OutboxEvent(
-                event_type="request.created",
-                payload={
+
+
+def _apply_status_update(
+    req: ServiceRequest,
+    payload: RequestStatusUpdate,
+    current_user: User,
+    *,
+    client_ip: str | None,
+    user_agent: str | None,
+) -> _StatusChange:
+    """Меняет заявку и собирает аудит + outbox-события.
+
+    Вызывается после _validate_status_update и проверки исполнителя.
+    """
+    old_status = req.status
+    old_assignee = req.assigned_to_user_id
+    change = _StatusChange(before=_snapshot(req))
+
+    if payload.status is not None:
+        req.status = payload.status
+    if payload.assignee_id is not None:
+        req.assigned_to_user_id = payload.assignee_id
+    req.updated_at = datetime.utcnow()
+
+    status_changed = payload.status is not None and req.status != old_status
+    if status_changed:
+        change.transition = (_status_value(old_status), _status_value(req.status))
+        change.logs.append(
+            {
+                "request_id": req.id,
+                "user_id": current_user.id,
+                "action": RequestAction.STATUS_CHANGED.value,
+                "old_value": change.transition[0],
+                "new_value": change.transition[1],
+                "client_ip": client_ip,
+                "user_agent": user_agent,
+                "comment": payload.comment,
+                "source": "API",
+            }
+        )
+
+    if payload.assignee_id is not None and req.assigned_to_user_id != old_assignee:
+        change.logs.append(
+            {
+                "request_id": req.id,
+                "user_id": current_user.id,
+                "action": RequestAction.ASSIGNEE_CHANGED.value,
+                "old_value": str(old_assignee) if old_assignee is not None else None,
+                "new_value": (
+                    str(req.assigned_to_user_id) if req.assigned_to_user_id is not None else None
+                ),
+                "client_ip": client_ip,
+                "user_agent": user_agent,
+                "comment": None,
+                "source": "API",
+            }
+        )
+        change.events.append(
+            {
+                "event_type": "request.assigned",
+                "payload": {
+                    "request_id": req.id,
+                    "old_assignee_id": old_assignee,
+                    "new_assignee_id": req.assigned_to_user_id,
+                    "actor_id": current_user.id,
+                },
+            }
+        )
+
+    if change.transition is not None:
+        change.events.append(
+            {
+                "event_type": "request.status_changed",
+                "payload": {
                     "request_id": req.id,
-                    "created_by_user_id": current_user.id,
-                    "assigned_to_user_id": req.assigned_to_user_id,
-                    "title": req.title,
+                    "from": change.transition[0],
+                    "to": change.transition[1],
+                    "actor_id": current_user.id,
                 },
+            }
+        )
+    return change
+
+
+def _record_status_change(change: _StatusChange) -> None:
+    if change.transition is not None:
+        from_status, to_status = change.transition
+        requests_status_changed_total.labels(from_status=from_status, to_status=to_status).inc()
+
+
+@dataclass(slots=True)
+class _BulkStatusPlan:
+    """Итог пачки смен статуса в памяти: результаты элементов и что записать."""
+
+    results: list[RequestBulkStatusItemResult] = field(default_factory=list)
+    changes: list[_StatusChange] = field(default_factory=list)
+    deltas: Counter[CounterKey] = field(default_factory=Counter)
+
+    @property
+    def logs(self) -> list[dict[str, Any]]:
+        return [log for change in self.changes for log in change.logs]
+
+    @property
+    def events(self) -> list[dict[str, Any]]:
+        return [event for change in self.changes for event in change.events]
+
+    def result(self) -> RequestBulkStatusResult:
+        failed = sum(1 for item in self.results if item.error is not None)
+        return RequestBulkStatusResult(
+            items=self.results, updated=len(self.results) - failed, failed=failed
+        )
+
+
+def _plan_status_updates(
+    items: Sequence[RequestBulkStatusItem],
+    requests: dict[int, ServiceRequest],
+    current_user: User,
+    *,
+    assignees: Collection[int],
+    client_ip: str | None,
+    user_agent: str | None,
+) -> _BulkStatusPlan:
+    """Проверки и изменения пачки по заявкам, уже заблокированным FOR UPDATE.
+
+    Порядок проверок элемента — как у одиночного PATCH: права, If-Match,
+    переход FSM, исполнитель. Ошибка элемента не валит пачку. Одна заявка
+    в нескольких элементах меняется последовательно, в порядке items.
+    """
+    plan = _BulkStatusPlan()
+    for index, item in enumerate(items):
+        req = requests.get(item.request_id)
+        try:
+            if req is None:
+                raise RequestNotFound()
+            RequestPolicy.can_update_status(current_user, req, item)
+            if item.if_match is not None and item.if_match.strip() != compute_etag(
+                req.id, req.updated_at
+            ):
+                raise OptimisticLockFailed()
+            _validate_status_update(req, item)
+            if item.assignee_id is not None and item.assignee_id not in assignees:
+                raise AssigneeNotFound()
+        except DomainError as exc:
+            plan.results.append(
+                RequestBulkStatusItemResult(
+                    index=index,
+                    request_id=item.request_id,
+                    status=exc.http_status,
+                    error=BatchItemError(code=exc.code, detail=exc.message),
+                )
             )
+            continue
+        change = _apply_status_update(
+            req, item, current_user, client_ip=client_ip, user_agent=user_agent
         )
+        plan.changes.append(change)
+        plan.deltas.update(counter_deltas(change.before, _snapshot(req)))
+        plan.results.append(
+            RequestBulkStatusItemResult(
+                index=index,
+                request_id=req.id,
+                status=200,
+                request=RequestRead.model_validate(req),
+                etag=compute_etag(req.id, req.updated_at),
+            )
+        )
+    return plan
+
+
+def _page(
+    rows: list[Row[Any]],
+    total: int | None,
+    limit: int,
+    offset: int,
+    total_mode: TotalMode,
+) -> Page[RequestRead]:
+    # Репозиторий отдаёт limit+1 строк: лишняя строка — признак следующей
+    # страницы, сама она в ответ не попадает.
+    has_next = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if has_next else None
+    # Строки — прямо из БД и уже нужных типов: собираем DTO без валидации.
+    # При проекции (fields=) в модели только выбранные колонки — остальные
+    # роутер исключает при сериализации.
+    return Page.of(
+        [RequestRead.model_construct(**r._mapping) for r in items],
+        total=total,
+        limit=limit,
+        offset=offset,
+        has_next=has_next,
+        next_cursor=next_cursor,
+        total_mode=total_mode,
+    )
+
+
+# Нижняя граница истории — создание заявки; запас на расхождение часов
+# между нодами (timestamp ставит приложение). Граница по ключу
+# партиционирования отсекает месяцы до создания заявки.
+_HISTORY_CLOCK_SKEW = timedelta(days=1)
+
+
+def _history_since(req: ServiceRequest) -> datetime:
+    return req.created_at - _HISTORY_CLOCK_SKEW
+
+
+def _history_page(logs: list[RequestLog], limit: int) -> Page[RequestLogRead]:
+    has_next = len(logs) > limit
+    items = logs[:limit]
+    next_cursor = encode_cursor(items[-1].timestamp, items[-1].id) if has_next else None
+    return Page.of(
+        [RequestLogRead.model_validate(log) for log in items],
+        total=None,
+        limit=limit,
+        offset=0,
+        has_next=has_next,
+        next_cursor=next_cursor,
+        total_mode=TotalMode.NONE,
+    )
+
+
+def _total(mode: TotalMode, count: Callable[..., int]) -> int | None:
+    """exact → COUNT(*), estimate → оценка планировщика, none → не считаем."""
+    if mode is TotalMode.NONE:
+        return None
+    return count(estimate=mode is TotalMode.ESTIMATE)
+
+
+async def _total_async(mode: TotalMode, count: Callable[..., Awaitable[int]]) -> int | None:
+    if mode is TotalMode.NONE:
+        return None
+    return await count(estimate=mode is TotalMode.ESTIMATE)
+
+
+def _seek(cursor: str | None, offset: int) -> tuple[CursorPosition | None, int]:
+    """С курсором offset игнорируется: позиция задаётся самим курсором."""
+    if cursor is None:
+        return None, offset
+    return decode_cursor(cursor), 0
+
+
+class RequestService:
+    def __init__(
+        self, uow: SqlAlchemyUnitOfWork, idempotency_store: IdempotencyStore | None = None
+    ) -> None:
+        self._uow = uow
+        self._keys = idempotency_store or build_idempotency_store(uow)
+
+    def _commit(self, save_keys: Callable[[], None] | None = None) -> None:
+        """Commit; ключи идемпотентности — в той же транзакции или сразу после неё."""
+        if save_keys is not None and self._keys.transactional:
+            save_keys()
         self._uow.commit()
-        self._uow.refresh(req)
+        if save_keys is not None and not self._keys.transactional:
+            save_keys()
+
+    def _respond(
+        self, reservation: Reservation | None, status: int, dto: RequestRead
+    ) -> Callable[[], None] | None:
+        if reservation is None:
+            return None
+        response = StoredResponse(status=status, body=dto.model_dump(mode="json"))
+        return partial(self._keys.complete, reservation, response)
+
+    # ---------- создание ----------
+
+    def create(
+        self,
+        data: RequestCreate,
+        current_user: User,
+        *,
+        idempotency: Reservation | None = None,
+    ) -> RequestRead:
+        """Заявка + аудит + outbox (+ ответ в бронь ключа) одной транзакцией.
+
+        id и серверные значения заявки — из INSERT ... RETURNING, поэтому
+        ни промежуточного flush, ни refresh после commit: лог и событие
+        уходят в БД flush'ем при commit.
+        """
+        if data.assignee_id is not None and self._uow.users.get(data.assignee_id) is None:
+            raise AssigneeNotFound()
+        _check_create(data, current_user)
+        (row,) = self._uow.requests.add_many([_request_values(data, current_user)])
+        self._uow.request_counters.apply(counter_deltas(None, _snapshot(row)))
+        self._uow.request_logs.add(_created_log(row, current_user))
+        self._uow.outbox.add(_created_event(row, current_user))
+        created = RequestRead.model_construct(**row._mapping)
+        self._commit(self._respond(idempotency, 201, created))
         requests_created_total.inc()
-        return req
+        return created
+
+    def create_many(
+        self, items: Sequence[RequestBatchItem], current_user: User
+    ) -> RequestBatchResult:
+        """Пачка заявок одной транзакцией: по одному INSERT на таблицу.
+
+        Ключи идемпотентности бронируются до выполнения одним заходом в
+        хранилище (как у одиночного POST): элементы, чей ключ занят
+        конкурентом, получают replay или 409, а не дубль заявки. Исполнители
+        читаются одним запросом.
+        """
+        keys = _batch_keys(items)
+        scopes = _batch_scopes(items, keys, current_user)
+        claims = self._keys.reserve_many(list(scopes.values()))
+        assignees = self._uow.users.existing_ids(
+            {item.assignee_id for item in items if item.assignee_id is not None}
+        )
+        plan = _plan_batch(
+            items, keys, current_user, assignees=assignees, scopes=scopes, claims=claims
+        )
+        self._keys.release_many(plan.unused)
+        if plan.create:
+            try:
+                rows = self._uow.requests.add_many(
+                    [_request_values(entry.data, current_user) for entry in plan.create]
+                )
+                writes = _complete_batch(plan, rows, current_user)
+                self._uow.request_logs.add_many(writes.logs)
+                self._uow.outbox.add_many(writes.events)
+                self._uow.request_counters.apply(writes.deltas)
+                self._commit(partial(self._keys.complete_many, writes.idempotency))
+            except BaseException:
+                # Пачка не записалась — повтор с теми же ключами выполнится заново.
+                self._keys.release_many(plan.reservations())
+                raise
+            requests_created_total.inc(len(rows))
+        return plan.result()
 
     # ---------- чтение ----------
 
@@ -85,16 +639,6 @@ class RequestService:
             raise RequestNotFound()
         return req
 
-    def _page(
-        self, items: list[ServiceRequest], total: int, limit: int, offset: int
-    ) -> Page[RequestRead]:
-        return Page.of(
-            [RequestRead.model_validate(r) for r in items],
-            total=total,
-            limit=limit,
-            offset=offset,
-        )
-
     def list(
         self,
         *,
@@ -105,42 +649,96 @@ class RequestService:
         date_to: datetime | None = None,
         limit: int = 50,
         offset: int = 0,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
     ) -> Page[RequestRead]:
-        items = self._uow.requests.list(
+        after, offset = _seek(cursor, offset)
+        rows = self._uow.requests.list(
             status=status,
             created_by_id=created_by_id,
             assigned_to_id=assigned_to_id,
             date_from=date_from,
             date_to=date_to,
-            limit=limit,
+            limit=limit + 1,
             offset=offset,
+            after=after,
+            fields=fields,
         )
-        total = self._uow.requests.count(
-            status=status,
-            created_by_id=created_by_id,
-            assigned_to_id=assigned_to_id,
-            date_from=date_from,
-            date_to=date_to,
+        total = _total(
+            total_mode,
+            partial(
+                self._uow.requests.count,
+                status=status,
+                created_by_id=created_by_id,
+                assigned_to_id=assigned_to_id,
+                date_from=date_from,
+                date_to=date_to,
+            ),
         )
-        return self._page(items, total, limit, offset)
+        return _page(rows, total, limit, offset, total_mode)
 
-    def list_for_creator(self, creator_id: int, *, limit: int, offset: int) -> Page[RequestRead]:
-        items = self._uow.requests.list_by_creator(creator_id, limit=limit, offset=offset)
-        total = self._uow.requests.count_by_creator(creator_id)
-        return self._page(items, total, limit, offset)
+    def list_for_creator(
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = self._uow.requests.list_by_creator(
+            creator_id, limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = _total(total_mode, partial(self._uow.requests.count_by_creator, creator_id))
+        return _page(rows, total, limit, offset, total_mode)
 
-    def list_for_assignee(self, assignee_id: int, *, limit: int, offset: int) -> Page[RequestRead]:
-        items = self._uow.requests.list_by_assignee(assignee_id, limit=limit, offset=offset)
-        total = self._uow.requests.count_by_assignee(assignee_id)
-        return self._page(items, total, limit, offset)
+    def list_for_assignee(
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = self._uow.requests.list_by_assignee(
+            assignee_id, limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = _total(total_mode, partial(self._uow.requests.count_by_assignee, assignee_id))
+        return _page(rows, total, limit, offset, total_mode)
 
-    def list_queue(self, *, limit: int, offset: int) -> Page[RequestRead]:
-        items = self._uow.requests.list_queue(limit=limit, offset=offset)
-        total = self._uow.requests.count_queue()
-        return self._page(items, total, limit, offset)
+    def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = self._uow.requests.list_queue(
+            limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = _total(total_mode, self._uow.requests.count_queue)
+        return _page(rows, total, limit, offset, total_mode)
 
-    def list_history(self, request_id: int) -> list[RequestLog]:
-        return self._uow.request_logs.list_for_request(request_id)
+    def list_history(
+        self, req: ServiceRequest, *, limit: int, cursor: str | None = None
+    ) -> Page[RequestLogRead]:
+        """Страница истории заявки по возрастанию времени (keyset, без total)."""
+        logs = self._uow.request_logs.list_for_request(
+            req.id,
+            since=_history_since(req),
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor is not None else None,
+        )
+        return _history_page(logs, limit)
 
     # ---------- обновление статуса ----------
 
@@ -152,107 +750,316 @@ class RequestService:
         *,
         client_ip: str | None = None,
         user_agent: str | None = None,
-    ) -> ServiceRequest:
-        req = self._uow.requests.get(request_id)
+        idempotency: Reservation | None = None,
+    ) -> RequestRead:
+        # FOR UPDATE: before для дельт счётчиков — под блокировкой строки,
+        # иначе два параллельных PATCH посчитают дельты от одного состояния.
+        req = self._uow.requests.get_for_update(request_id)
         if req is None:
             raise RequestNotFound()
 
-        old_status = req.status
-        old_assignee = req.assigned_to_user_id
+        _validate_status_update(req, payload)
+        if payload.assignee_id is not None and self._uow.users.get(payload.assignee_id) is None:
+            raise AssigneeNotFound()
 
-        if payload.status is not None:
-            validate_transition(
-                TransitionRequest(
-                    current_status=old_status,
-                    target_status=payload.status,
-                    current_assignee_id=old_assignee,
-                    new_assignee_id=payload.assignee_id,
-                )
-            )
-            req.status = payload.status
+        change = _apply_status_update(
+            req, payload, current_user, client_ip=client_ip, user_agent=user_agent
+        )
+        # Аудит — в той же транзакции (одна атомарная запись).
+        self._uow.request_logs.add_many(change.logs)
+        self._uow.outbox.add_many(change.events)
 
-        if payload.assignee_id is not None:
-            if self._uow.users.get(payload.assignee_id) is None:
-                raise AssigneeNotFound()
-            req.assigned_to_user_id = payload.assignee_id
+        self._uow.request_counters.apply(counter_deltas(change.before, _snapshot(req)))
+        # Все поля заявки известны до commit (updated_at ставим сами): DTO
+        # снимаем сейчас, без refresh-SELECT'а после истёкшего commit.
+        updated = RequestRead.model_validate(req)
+        self._commit(self._respond(idempotency, 200, updated))
+        _record_status_change(change)
+        return updated
 
-        req.updated_at = datetime.utcnow()
+    def update_status_many(
+        self,
+        items: Sequence[RequestBulkStatusItem],
+        current_user: User,
+        *,
+        client_ip: str | None = None,
+        user_agent: str | None = None,
+    ) -> RequestBulkStatusResult:
+        """Пачка смен статуса/исполнителя одной транзакцией.
 
-        # Аудит — в той же транзакции (одна атомарная запись).
-        if payload.status is not None and req.status != old_status:
-            self._uow.request_logs.add(
-                RequestLog(
-                    request_id=req.id,
-                    user_id=current_user.id,
-                    action=RequestAction.STATUS_CHANGED.value,
-                    old_value=old_status.value
-                    if isinstance(old_status, RequestStatus)
-                    else str(old_status),
-                    new_value=req.status.value
-                    if isinstance(req.status, RequestStatus)
-                    else str(req.status),
-                    client_ip=client_ip,
-                    user_agent=user_agent,
-                    comment=payload.comment,
-                    source="API",
-                )
-            )
+        Заявки — один SELECT ... FOR UPDATE, исполнители — один запрос,
+        аудит и outbox — по одному multi-row INSERT.
+        """
+        requests = self._uow.requests.get_many_for_update({item.request_id for item in items})
+        assignees = self._uow.users.existing_ids(
+            {item.assignee_id for item in items if item.assignee_id is not None}
+        )
+        plan = _plan_status_updates(
+            items,
+            requests,
+            current_user,
+            assignees=assignees,
+            client_ip=client_ip,
+            user_agent=user_agent,
+        )
+        if plan.changes:
+            self._uow.request_logs.add_many(plan.logs)
+            self._uow.outbox.add_many(plan.events)
+            self._uow.request_counters.apply({k: v for k, v in plan.deltas.items() if v})
+        # Commit и без изменений: снимает блокировки FOR UPDATE.
+        self._uow.commit()
+        for change in plan.changes:
+            _record_status_change(change)
+        return plan.result()
 
-        if payload.assignee_id is not None and req.assigned_to_user_id != old_assignee:
-            self._uow.request_logs.add(
-                RequestLog(
-                    request_id=req.id,
-                    user_id=current_user.id,
-                    action=RequestAction.ASSIGNEE_CHANGED.value,
-                    old_value=str(old_assignee) if old_assignee is not None else None,
-                    new_value=(
-                        str(req.assigned_to_user_id)
-                        if req.assigned_to_user_id is not None
-                        else None
-                    ),
-                    client_ip=client_ip,
-                    user_agent=user_agent,
-                    source="API",
-                )
-            )
-            self._uow.outbox.add(
-                OutboxEvent(
-                    event_type="request.assigned",
-                    payload={
-                        "request_id": req.id,
-                        "old_assignee_id": old_assignee,
-                        "new_assignee_id": req.assigned_to_user_id,
-                        "actor_id": current_user.id,
-                    },
-                )
-            )
 
-        if payload.status is not None and req.status != old_status:
-            self._uow.outbox.add(
-                OutboxEvent(
-                    event_type="request.status_changed",
-                    payload={
-                        "request_id": req.id,
-                        "from": old_status.value
-                        if isinstance(old_status, RequestStatus)
-                        else str(old_status),
-                        "to": req.status.value
-                        if isinstance(req.status, RequestStatus)
-                        else str(req.status),
-                        "actor_id": current_user.id,
-                    },
+class AsyncRequestService:
+    def __init__(
+        self,
+        uow: AsyncSqlAlchemyUnitOfWork,
+        idempotency_store: AsyncIdempotencyStore | None = None,
+    ) -> None:
+        self._uow = uow
+        self._keys = idempotency_store or build_async_idempotency_store(uow)
+
+    async def _commit(self, save_keys: Callable[[], Awaitable[None]] | None = None) -> None:
+        if save_keys is not None and self._keys.transactional:
+            await save_keys()
+        await self._uow.commit()
+        if save_keys is not None and not self._keys.transactional:
+            await save_keys()
+
+    def _respond(
+        self, reservation: Reservation | None, status: int, dto: RequestRead
+    ) -> Callable[[], Awaitable[None]] | None:
+        if reservation is None:
+            return None
+        response = StoredResponse(status=status, body=dto.model_dump(mode="json"))
+        return partial(self._keys.complete, reservation, response)
+
+    # ---------- создание ----------
+
+    async def create(
+        self,
+        data: RequestCreate,
+        current_user: User,
+        *,
+        idempotency: Reservation | None = None,
+    ) -> RequestRead:
+        if data.assignee_id is not None and await self._uow.users.get(data.assignee_id) is None:
+            raise AssigneeNotFound()
+        _check_create(data, current_user)
+        (row,) = await self._uow.requests.add_many([_request_values(data, current_user)])
+        await self._uow.request_counters.apply(counter_deltas(None, _snapshot(row)))
+        await self._uow.request_logs.add(_created_log(row, current_user))
+        await self._uow.outbox.add(_created_event(row, current_user))
+        created = RequestRead.model_construct(**row._mapping)
+        await self._commit(self._respond(idempotency, 201, created))
+        requests_created_total.inc()
+        return created
+
+    async def create_many(
+        self, items: Sequence[RequestBatchItem], current_user: User
+    ) -> RequestBatchResult:
+        keys = _batch_keys(items)
+        scopes = _batch_scopes(items, keys, current_user)
+        claims = await self._keys.reserve_many(list(scopes.values()))
+        assignees = await self._uow.users.existing_ids(
+            {item.assignee_id for item in items if item.assignee_id is not None}
+        )
+        plan = _plan_batch(
+            items, keys, current_user, assignees=assignees, scopes=scopes, claims=claims
+        )
+        await self._keys.release_many(plan.unused)
+        if plan.create:
+            try:
+                rows = await self._uow.requests.add_many(
+                    [_request_values(entry.data, current_user) for entry in plan.create]
                 )
-            )
+                writes = _complete_batch(plan, rows, current_user)
+                await self._uow.request_logs.add_many(writes.logs)
+                await self._uow.outbox.add_many(writes.events)
+                await self._uow.request_counters.apply(writes.deltas)
+                await self._commit(partial(self._keys.complete_many, writes.idempotency))
+            except BaseException:
+                await self._keys.release_many(plan.reservations())
+                raise
+            requests_created_total.inc(len(rows))
+        return plan.result()
 
-        self._uow.commit()
-        self._uow.refresh(req)
-        if payload.status is not None and req.status != old_status:
-            requests_status_changed_total.labels(
-                from_status=old_status.value
-                if isinstance(old_status, RequestStatus)
-                else str(old_status),
-                to_status=req.status.value
-                if isinstance(req.status, RequestStatus)
-                else str(req.status),
-            ).inc()
+    # ---------- чтение ----------
+
+    async def get_or_404(self, request_id: int) -> ServiceRequest:
+        req = await self._uow.requests.get(request_id)
+        if req is None:
+            raise RequestNotFound()
         return req
+
+    async def list(
+        self,
+        *,
+        status: RequestStatus | None = None,
+        created_by_id: int | None = None,
+        assigned_to_id: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = await self._uow.requests.list(
+            status=status,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit + 1,
+            offset=offset,
+            after=after,
+            fields=fields,
+        )
+        total = await _total_async(
+            total_mode,
+            partial(
+                self._uow.requests.count,
+                status=status,
+                created_by_id=created_by_id,
+                assigned_to_id=assigned_to_id,
+                date_from=date_from,
+                date_to=date_to,
+            ),
+        )
+        return _page(rows, total, limit, offset, total_mode)
+
+    async def list_for_creator(
+        self,
+        creator_id: int,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = await self._uow.requests.list_by_creator(
+            creator_id, limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = await _total_async(
+            total_mode, partial(self._uow.requests.count_by_creator, creator_id)
+        )
+        return _page(rows, total, limit, offset, total_mode)
+
+    async def list_for_assignee(
+        self,
+        assignee_id: int,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = await self._uow.requests.list_by_assignee(
+            assignee_id, limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = await _total_async(
+            total_mode, partial(self._uow.requests.count_by_assignee, assignee_id)
+        )
+        return _page(rows, total, limit, offset, total_mode)
+
+    async def list_queue(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.EXACT,
+        fields: Collection[str] | None = None,
+    ) -> Page[RequestRead]:
+        after, offset = _seek(cursor, offset)
+        rows = await self._uow.requests.list_queue(
+            limit=limit + 1, offset=offset, after=after, fields=fields
+        )
+        total = await _total_async(total_mode, self._uow.requests.count_queue)
+        return _page(rows, total, limit, offset, total_mode)
+
+    async def list_history(
+        self, req: ServiceRequest, *, limit: int, cursor: str | None = None
+    ) -> Page[RequestLogRead]:
+        logs = await self._uow.request_logs.list_for_request(
+            req.id,
+            since=_history_since(req),
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor is not None else None,
+        )
+        return _history_page(logs, limit)
+
+    # ---------- обновление статуса ----------
+
+    async def update_status(
+        self,
+        request_id: int,
+        payload: RequestStatusUpdate,
+        current_user: User,
+        *,
+        client_ip: str | None = None,
+        user_agent: str | None = None,
+        idempotency: Reservation | None = None,
+    ) -> RequestRead:
+        req = await self._uow.requests.get_for_update(request_id)
+        if req is None:
+            raise RequestNotFound()
+
+        _validate_status_update(req, payload)
+        if (
+            payload.assignee_id is not None
+            and await self._uow.users.get(payload.assignee_id) is None
+        ):
+            raise AssigneeNotFound()
+
+        change = _apply_status_update(
+            req, payload, current_user, client_ip=client_ip, user_agent=user_agent
+        )
+        await self._uow.request_logs.add_many(change.logs)
+        await self._uow.outbox.add_many(change.events)
+
+        await self._uow.request_counters.apply(counter_deltas(change.before, _snapshot(req)))
+        updated = RequestRead.model_validate(req)
+        await self._commit(self._respond(idempotency, 200, updated))
+        _record_status_change(change)
+        return updated
+
+    async def update_status_many(
+        self,
+        items: Sequence[RequestBulkStatusItem],
+        current_user: User,
+        *,
+        client_ip: str | None = None,
+        user_agent: str | None = None,
+    ) -> RequestBulkStatusResult:
+        requests = await self._uow.requests.get_many_for_update({item.request_id for item in items})
+        assignees = await self._uow.users.existing_ids(
+            {item.assignee_id for item in items if item.assignee_id is not None}
+        )
+        plan = _plan_status_updates(
+            items,
+            requests,
+            current_user,
+            assignees=assignees,
+            client_ip=client_ip,
+            user_agent=user_agent,
+        )
+        if plan.changes:
+            await self._uow.request_logs.add_many(plan.logs)
+            await self._uow.outbox.add_many(plan.events)
+            await self._uow.request_counters.apply({k: v for k, v in plan.deltas.items() if v})
+        # Commit и без изменений: снимает блокировки FOR UPDATE.
+        await self._uow.commit()
+        for change in plan.changes:
+            _record_status_change(change)
+        return plan.result()
@@ -1,10 +1,17 @@
-"""Сервисный слой пользователей (через UoW)."""
+"""Сервисный слой пользователей (через UoW).
+
+UserService — sync-стек, AsyncUserService — DB_STACK=async. argon2
+(генерация и проверка ключа, ~десятки мс CPU) в обоих идёт через
+app.core.argon2_pool: в async-версии он не останавливает event loop.
+"""
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import Optional
 
+from app.core.argon2_pool import argon2_pool
+from app.core.auth_cache import verified_key_cache
 from app.core.enums import UserRole
 from app.core.exceptions import (
     AdminOnly,
@@ -14,6 +21,7 @@ from app.core.exceptions import (
     UserNotFound,
 )
 from app.core.hashing import (
+    IssuedKey,
     extract_prefix,
     generate_api_key,
     hash_api_key,
@@ -24,7 +32,7 @@ from app.core.metrics import api_key_auth_total
 from app.models.user import User
 from app.schemas.common import Page
 from app.schemas.user import UserCreate, UserRead
-from app.uow import SqlAlchemyUnitOfWork
+from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
 
 
 @dataclass(frozen=True, slots=True)
@@ -35,6 +43,32 @@ class UserWithRawKey:
     raw_api_key: str
 
 
+def _new_user(payload: UserCreate, role: UserRole, issued: IssuedKey) -> User:
+    return User(
+        full_name=payload.full_name.strip(),
+        email=str(payload.email).lower(),
+        is_active=True,
+        role=role,
+        api_key_prefix=issued.prefix,
+        api_key_last4=issued.last4,
+        api_key_hash=issued.hash,
+    )
+
+
+def _set_api_key(user: User, issued: IssuedKey) -> None:
+    user.api_key_prefix = issued.prefix
+    user.api_key_last4 = issued.last4
+    user.api_key_hash = issued.hash
+
+
+def _accept(user: User) -> User:
+    if not user.is_active:
+        api_key_auth_total.labels(result="inactive").inc()
+        raise UserInactive()
+    api_key_auth_total.labels(result="ok").inc()
+    return user
+
+
 class UserService:
     def __init__(self, uow: SqlAlchemyUnitOfWork) -> None:
         self._uow = uow
@@ -51,19 +85,9 @@ class UserService:
             raise EmailAlreadyExists()
 
         role = force_role if force_role is not None else UserRole.EMPLOYEE
-        issued = generate_api_key()
-
-        user = self._uow.users.add(
-            User(
-                full_name=payload.full_name.strip(),
-                email=str(payload.email).lower(),
-                is_active=True,
-                role=role,
-                api_key_prefix=issued.prefix,
-                api_key_last4=issued.last4,
-                api_key_hash=issued.hash,
-            )
-        )
+        issued = argon2_pool.run("generate", generate_api_key)
+
+        user = self._uow.users.add(_new_user(payload, role, issued))
         self._uow.commit()
         self._uow.refresh(user)
         return UserWithRawKey(user=user, raw_api_key=issued.raw)
@@ -73,11 +97,10 @@ class UserService:
         if user is None:
             raise UserNotFound()
 
-        issued = generate_api_key()
-        user.api_key_prefix = issued.prefix
-        user.api_key_last4 = issued.last4
-        user.api_key_hash = issued.hash
+        issued = argon2_pool.run("generate", generate_api_key)
+        _set_api_key(user, issued)
         self._uow.commit()
+        verified_key_cache.invalidate_user(user_id)
         self._uow.refresh(user)
         return UserWithRawKey(user=user, raw_api_key=issued.raw)
 
@@ -93,17 +116,23 @@ class UserService:
 
     def authenticate(self, raw_api_key: str) -> User:
         """Аутентификация по сырому ключу. Выбрасывает доменные ошибки."""
+        cached = verified_key_cache.get(raw_api_key)
+        if cached is not None:
+            user_id, key_hash = cached
+            user = self._uow.users.get(user_id)
+            if user is not None and user.api_key_hash == key_hash:
+                return _accept(user)
+            verified_key_cache.discard(raw_api_key)
+
         prefix = extract_prefix(raw_api_key)
         for user in self._uow.users.get_by_api_key_prefix(prefix):
-            if verify_api_key(raw_api_key, user.api_key_hash):
-                if needs_rehash(user.api_key_hash):
-                    user.api_key_hash = hash_api_key(raw_api_key)
+            if argon2_pool.run("verify", verify_api_key, raw_api_key, user.api_key_hash):
+                # Read-only UoW (GET на реплике) не пишет: rehash дождётся записи.
+                if needs_rehash(user.api_key_hash) and not self._uow.read_only:
+                    user.api_key_hash = argon2_pool.run("rehash", hash_api_key, raw_api_key)
                     self._uow.commit()
-                if not user.is_active:
-                    api_key_auth_total.labels(result="inactive").inc()
-                    raise UserInactive()
-                api_key_auth_total.labels(result="ok").inc()
-                return user
+                verified_key_cache.put(raw_api_key, user_id=user.id, api_key_hash=user.api_key_hash)
+                return _accept(user)
         api_key_auth_total.labels(result="invalid").inc()
         raise InvalidApiKey()
 
@@ -119,5 +148,89 @@ class UserService:
             raise UserNotFound()
         user.role = role
         self._uow.commit()
+        verified_key_cache.invalidate_user(user_id)
         self._uow.refresh(user)
         return user
+
+
+class AsyncUserService:
+    def __init__(self, uow: AsyncSqlAlchemyUnitOfWork) -> None:
+        self._uow = uow
+
+    async def has_admin_users(self) -> bool:
+        return await self._uow.users.any_admin()
+
+    async def create(
+        self,
+        payload: UserCreate,
+        force_role: Optional[UserRole] = None,
+    ) -> UserWithRawKey:
+        if await self._uow.users.get_by_email(payload.email) is not None:
+            raise EmailAlreadyExists()
+
+        role = force_role if force_role is not None else UserRole.EMPLOYEE
+        issued = await argon2_pool.arun("generate", generate_api_key)
+
+        user = await self._uow.users.add(_new_user(payload, role, issued))
+        await self._uow.commit()
+        await self._uow.refresh(user)
+        return UserWithRawKey(user=user, raw_api_key=issued.raw)
+
+    async def rotate_api_key(self, user_id: int) -> UserWithRawKey:
+        user = await self._uow.users.get(user_id)
+        if user is None:
+            raise UserNotFound()
+
+        issued = await argon2_pool.arun("generate", generate_api_key)
+        _set_api_key(user, issued)
+        await self._uow.commit()
+        verified_key_cache.invalidate_user(user_id)
+        await self._uow.refresh(user)
+        return UserWithRawKey(user=user, raw_api_key=issued.raw)
+
+    async def list(self, *, limit: int = 50, offset: int = 0) -> Page[UserRead]:
+        items = await self._uow.users.list(limit=limit, offset=offset)
+        total = await self._uow.users.count()
+        return Page.of(
+            [UserRead.model_validate(u) for u in items],
+            total=total,
+            limit=limit,
+            offset=offset,
+        )
+
+    async def authenticate(self, raw_api_key: str) -> User:
+        """Аутентификация по сырому ключу. Выбрасывает доменные ошибки."""
+        cached = verified_key_cache.get(raw_api_key)
+        if cached is not None:
+            user_id, key_hash = cached
+            user = await self._uow.users.get(user_id)
+            if user is not None and user.api_key_hash == key_hash:
+                return _accept(user)
+            verified_key_cache.discard(raw_api_key)
+
+        prefix = extract_prefix(raw_api_key)
+        for user in await self._uow.users.get_by_api_key_prefix(prefix):
+            if await argon2_pool.arun("verify", verify_api_key, raw_api_key, user.api_key_hash):
+                if needs_rehash(user.api_key_hash) and not self._uow.read_only:
+                    user.api_key_hash = await argon2_pool.arun("rehash", hash_api_key, raw_api_key)
+                    await self._uow.commit()
+                verified_key_cache.put(raw_api_key, user_id=user.id, api_key_hash=user.api_key_hash)
+                return _accept(user)
+        api_key_auth_total.labels(result="invalid").inc()
+        raise InvalidApiKey()
+
+    async def authenticate_admin(self, raw_api_key: str) -> User:
+        user = await self.authenticate(raw_api_key)
+        if user.role != UserRole.ADMIN:
+            raise AdminOnly()
+        return user
+
+    async def update_role(self, user_id: int, role: UserRole) -> User:
+        user = await self._uow.users.get(user_id)
+        if user is None:
+            raise UserNotFound()
+        user.role = role
+        await self._uow.commit()
+        verified_key_cache.invalidate_user(user_id)
+        await self._uow.refresh(user)
+        return user
@@ -10,41 +10,77 @@
         uow.requests.add(req)
         uow.request_logs.add(log)
         uow.commit()
+
+Async-вариант (DB_STACK=async) — AsyncSqlAlchemyUnitOfWork поверх
+AsyncSession с тем же набором репозиториев:
+    async with uow:
+        await uow.requests.add(req)
+        await uow.commit()
+
+read_only=True — UoW обработчика чтения (GET/HEAD), обычно на реплике:
+commit запрещён, сервисы пропускают попутные записи (rehash ключа).
+after_commit — хук после успешного commit (LSN для read-your-writes).
 """
 
 from __future__ import annotations
 
+from collections.abc import Awaitable, Callable
 from types import TracebackType
 from typing import Self
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.database.session import SessionLocal
+from app.database.session import AsyncSessionLocal, SessionLocal
 from app.repositories.sqlalchemy import (
     SqlAlchemyIdempotencyRepository,
     SqlAlchemyOutboxRepository,
+    SqlAlchemyRequestCounterRepository,
     SqlAlchemyRequestLogRepository,
     SqlAlchemyRequestRepository,
     SqlAlchemyUserRepository,
 )
+from app.repositories.sqlalchemy_async import (
+    AsyncSqlAlchemyIdempotencyRepository,
+    AsyncSqlAlchemyOutboxRepository,
+    AsyncSqlAlchemyRequestCounterRepository,
+    AsyncSqlAlchemyRequestLogRepository,
+    AsyncSqlAlchemyRequestRepository,
+    AsyncSqlAlchemyUserRepository,
+)
+
+
+def _check_writable(read_only: bool) -> None:
+    if read_only:
+        raise RuntimeError("Unit of Work открыт только для чтения: commit в GET/HEAD запрещён.")
 
 
 class SqlAlchemyUnitOfWork:
     users: SqlAlchemyUserRepository
     requests: SqlAlchemyRequestRepository
     request_logs: SqlAlchemyRequestLogRepository
+    request_counters: SqlAlchemyRequestCounterRepository
     idempotency: SqlAlchemyIdempotencyRepository
     outbox: SqlAlchemyOutboxRepository
 
-    def __init__(self, session_factory: sessionmaker = SessionLocal) -> None:
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        *,
+        read_only: bool = False,
+        after_commit: Callable[[Session], None] | None = None,
+    ) -> None:
         self._session_factory = session_factory
         self._session: Session | None = None
+        self.read_only = read_only
+        self._after_commit = after_commit
 
     def __enter__(self) -> Self:
         self._session = self._session_factory()
         self.users = SqlAlchemyUserRepository(self._session)
         self.requests = SqlAlchemyRequestRepository(self._session)
         self.request_logs = SqlAlchemyRequestLogRepository(self._session)
+        self.request_counters = SqlAlchemyRequestCounterRepository(self._session)
         self.idempotency = SqlAlchemyIdempotencyRepository(self._session)
         self.outbox = SqlAlchemyOutboxRepository(self._session)
         return self
@@ -70,7 +106,10 @@ class SqlAlchemyUnitOfWork:
 
     def commit(self) -> None:
         assert self._session is not None
+        _check_writable(self.read_only)
         self._session.commit()
+        if self._after_commit is not None:
+            self._after_commit(self._session)
 
     def rollback(self) -> None:
         assert self._session is not None
@@ -83,3 +122,72 @@ class SqlAlchemyUnitOfWork:
     def refresh(self, obj: object) -> None:
         assert self._session is not None
         self._session.refresh(obj)
+
+
+class AsyncSqlAlchemyUnitOfWork:
+    users: AsyncSqlAlchemyUserRepository
+    requests: AsyncSqlAlchemyRequestRepository
+    request_logs: AsyncSqlAlchemyRequestLogRepository
+    request_counters: AsyncSqlAlchemyRequestCounterRepository
+    idempotency: AsyncSqlAlchemyIdempotencyRepository
+    outbox: AsyncSqlAlchemyOutboxRepository
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        *,
+        read_only: bool = False,
+        after_commit: Callable[[AsyncSession], Awaitable[None]] | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._session: AsyncSession | None = None
+        self.read_only = read_only
+        self._after_commit = after_commit
+
+    async def __aenter__(self) -> Self:
+        self._session = self._session_factory()
+        self.users = AsyncSqlAlchemyUserRepository(self._session)
+        self.requests = AsyncSqlAlchemyRequestRepository(self._session)
+        self.request_logs = AsyncSqlAlchemyRequestLogRepository(self._session)
+        self.request_counters = AsyncSqlAlchemyRequestCounterRepository(self._session)
+        self.idempotency = AsyncSqlAlchemyIdempotencyRepository(self._session)
+        self.outbox = AsyncSqlAlchemyOutboxRepository(self._session)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        assert self._session is not None
+        try:
+            if exc is not None:
+                await self._session.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> AsyncSession:
+        assert self._session is not None, "UoW used outside of context"
+        return self._session
+
+    async def commit(self) -> None:
+        assert self._session is not None
+        _check_writable(self.read_only)
+        await self._session.commit()
+        if self._after_commit is not None:
+            await self._after_commit(self._session)
+
+    async def rollback(self) -> None:
+        assert self._session is not None
+        await self._session.rollback()
+
+    async def flush(self) -> None:
+        assert self._session is not None
+        await self._session.flush()
+
+    async def refresh(self, obj: object) -> None:
+        assert self._session is not None
+        await self._session.refresh(obj)
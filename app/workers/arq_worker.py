@@ -1,56 +1,300 @@
-"""arq-воркер: периодический drain outbox_events.
+"""arq-воркер: периодический drain outbox_events и сверка счётчиков.
 
 Запуск:
     arq app.workers.arq_worker.WorkerSettings
 
-По cron каждую секунду (низкая задержка, но дешёво) забираем пачку
-непроцессированных событий под SKIP LOCKED и «публикуем» их — пока
-просто структурный лог, позже сюда ляжет реальная шина/webhook/email.
+Drain запускается по Postgres NOTIFY (см. app.workers.outbox_listener):
+вставка события будит воркер сразу после COMMIT, а на холостом ходу
+к БД не идёт ни одного запроса. Cron раз в минуту — только страховочный
+sweep на случай обрыва LISTEN-соединения. Drain забирает пачки
+непроцессированных событий под SKIP LOCKED и отдаёт их sink'у
+(app.workers.sinks: структурный лог или батчевый webhook, OUTBOX_SINK).
+Пачки идут подряд, пока приходят полными; размер пачки адаптивный
+(app.workers.outbox.AdaptiveBatchSize), processed_at ставится одним
+UPDATE ... WHERE id = ANY(:ids) на пачку. Внутри пачки события
+публикуют OUTBOX_PUBLISHERS конкурентных дорожек, шардированных по
+payload.request_id: порядок внутри заявки сохраняется.
+
+Между процессами порядок держат advisory-lock'и: заявки разложены по
+OUTBOX_LOCK_SHARDS шардам (hashtext(request_id)), пачка сначала берёт
+pg_try_advisory_xact_lock свободных шардов и забирает события только из
+них. Все события заявки — в одном шарде, а шард до commit пачки публикует
+один процесс, так что SKIP LOCKED не отдаст второму воркеру более позднее
+событие заявки, пока первое ещё в полёте.
+
+Сбой публикации не откатывает пачку: событие откладывается с
+экспоненциальным backoff (attempts / next_attempt_at / last_error), а
+после OUTBOX_MAX_ATTEMPTS переносится в outbox_dead_letters.
+
+outbox_events партиционирована по created_at: раз в час
+maintain_outbox_partitions создаёт партиции вперёд и DROP'ает целиком
+обработанные партиции старше OUTBOX_RETENTION_DAYS. request_logs
+партиционирована помесячно: maintain_request_log_partitions держит
+REQUEST_LOG_PARTITIONS_AHEAD месяцев вперёд (журнал не удаляется).
+
+Раз в час пересчитываем request_counters с нуля: счётчики двигаются
+в транзакциях сервиса под блокировкой строки заявки, так что дрейф
+дают только ручные правки в БД — сверка его обнуляет и логирует.
+
+Раз в час purge_idempotency_keys удаляет ключи идемпотентности старше
+IDEMPOTENCY_TTL_HOURS пачками по IDEMPOTENCY_PURGE_BATCH строк, каждая —
+своей короткой транзакцией.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from typing import ClassVar
 
 from arq.connections import RedisSettings
 from arq.cron import cron
+from prometheus_client import start_http_server
+from sqlalchemy import text
 
+from app.core.config import settings
 from app.core.logging import configure_logging, get_logger
+from app.core.metrics import (
+    outbox_backlog_events,
+    outbox_batch_size,
+    outbox_dead_letters_total,
+    outbox_delivery_lag_seconds,
+    outbox_drain_rate_events_per_second,
+    outbox_events_published_total,
+    outbox_publish_failures_total,
+)
+from app.database.partitioning import (
+    PartitionInterval,
+    create_partitions,
+    drop_expired_partitions,
+)
+from app.database.session import engine
+from app.models.outbox import OutboxEvent
+from app.models.request_log import RequestLog
 from app.uow import SqlAlchemyUnitOfWork
+from app.workers.outbox import AdaptiveBatchSize, publish_sharded, retry_delay
+from app.workers.outbox_listener import drain_on_wake, listen_for_outbox
+from app.workers.sinks import OutboxSink, build_sink
 
 configure_logging()
 _log = get_logger("outbox_worker")
 
 
-async def drain_outbox(ctx: dict) -> None:
-    """Забираем пачку pending-событий и помечаем processed_at."""
+_batch_size = AdaptiveBatchSize(
+    minimum=settings.OUTBOX_BATCH_MIN,
+    maximum=settings.OUTBOX_BATCH_MAX,
+    target_seconds=settings.OUTBOX_BATCH_TARGET_SECONDS,
+)
+
+
+# Один drain на процесс: cron-sweep и LISTEN-цикл не конкурируют за
+# advisory-lock'и шардов (между процессами порядок держат они).
+_drain_lock = asyncio.Lock()
+
+
+async def _drain_batch(limit: int, publishers: int, sink: OutboxSink) -> int:
+    """Одна пачка в своей транзакции; возвращает число забранных событий."""
     with SqlAlchemyUnitOfWork() as uow:
-        batch = uow.outbox.fetch_pending(limit=100)
+        # Шарды, занятые другим процессом, пропускаем: их пачки ещё публикуются.
+        shards = uow.outbox.claim_shards(settings.OUTBOX_LOCK_SHARDS)
+        if not shards:
+            return 0
+        batch = uow.outbox.fetch_pending(
+            limit=limit, shards=shards, shard_count=settings.OUTBOX_LOCK_SHARDS
+        )
         if not batch:
-            return
-
-        for event in batch:
-            # TODO(next): реальная публикация наружу (Kafka, webhook, email).
-            _log.info(
-                "outbox_event_published",
-                event_id=event.id,
-                event_type=event.event_type,
-                payload=event.payload,
-            )
-            event.processed_at = datetime.utcnow()
+            return 0
+
+        outcome = await publish_sharded(
+            batch, sink, publishers, batch_size=settings.OUTBOX_SINK_BATCH_SIZE
+        )
+
+        now = datetime.utcnow()
+        lags = [(now - event.created_at).total_seconds() for event in outcome.published]
+        uow.outbox.mark_processed(
+            [event.id for event in outcome.published],
+            now,
+            created_from=min((event.created_at for event in outcome.published), default=None),
+        )
+        for event, error in outcome.failed:
+            _record_failure(uow, event, error, now)
+        uow.commit()
+
+    for lag in lags:
+        outbox_delivery_lag_seconds.observe(lag)
+    outbox_events_published_total.inc(len(outcome.published))
+    if outcome.held:
+        _log.info("outbox_events_held", count=len(outcome.held))
+    return len(batch)
+
+
+def _record_failure(
+    uow: SqlAlchemyUnitOfWork, event: OutboxEvent, error: str, now: datetime
+) -> None:
+    attempt = event.attempts + 1
+    outbox_publish_failures_total.inc()
+    if attempt >= settings.OUTBOX_MAX_ATTEMPTS:
+        uow.outbox.dead_letter(event, error=error, failed_at=now)
+        outbox_dead_letters_total.inc()
+        _log.error("outbox_event_dead_lettered", event_id=event.id, attempts=attempt, error=error)
+        return
+
+    delay = retry_delay(
+        attempt,
+        base=settings.OUTBOX_RETRY_BASE_SECONDS,
+        cap=settings.OUTBOX_RETRY_MAX_SECONDS,
+    )
+    uow.outbox.defer(event, error=error, next_attempt_at=now + timedelta(seconds=delay))
+    _log.warning(
+        "outbox_event_deferred",
+        event_id=event.id,
+        attempt=attempt,
+        retry_in=round(delay, 3),
+        error=error,
+    )
+
 
+async def drain_outbox(ctx: dict) -> None:
+    """Дренит outbox пачками, пока они приходят полными."""
+    publishers = ctx.get("outbox_publishers", 1)
+    sink = ctx["outbox_sink"]
+    started = time.perf_counter()
+    drained = 0
+    async with _drain_lock:
+        while True:
+            limit = _batch_size.current
+            batch_started = time.perf_counter()
+            processed = await _drain_batch(limit, publishers, sink)
+            _batch_size.observe(processed, time.perf_counter() - batch_started)
+            drained += processed
+            if processed < limit:
+                break
+            # Между пачками отдаём управление loop'у: LISTEN и другие job'ы
+            # не должны стоять, пока разгребается бурст.
+            await asyncio.sleep(0)
+
+    elapsed = time.perf_counter() - started
+    with SqlAlchemyUnitOfWork() as uow:
+        backlog = uow.outbox.count_pending()
+
+    outbox_backlog_events.set(backlog)
+    outbox_batch_size.set(_batch_size.current)
+    outbox_drain_rate_events_per_second.set(drained / elapsed if elapsed > 0 else 0.0)
+    if drained:
+        _log.info(
+            "outbox_drained",
+            events=drained,
+            seconds=round(elapsed, 3),
+            batch_size=_batch_size.current,
+            backlog=backlog,
+        )
+
+
+async def reconcile_request_counters(ctx: dict) -> None:
+    """Пересчитывает request_counters по service_requests и логирует дрейф."""
+    with SqlAlchemyUnitOfWork() as uow:
+        # before снимается под LOCK'ом пересчёта: в дрейф не попадают
+        # изменения, закоммиченные между снимком и блокировкой.
+        before = uow.request_counters.rebuild()
+        after = uow.request_counters.snapshot()
         uow.commit()
-        _log.info("outbox_batch_processed", size=len(batch))
+
+    drifted = {
+        f"{scope}:{key}": after.get((scope, key), 0) - before.get((scope, key), 0)
+        for scope, key in before.keys() | after.keys()
+        if before.get((scope, key), 0) != after.get((scope, key), 0)
+    }
+    if drifted:
+        _log.warning("request_counters_drift_fixed", drift=drifted)
+    else:
+        _log.info("request_counters_reconciled", keys=len(after))
+
+
+async def maintain_outbox_partitions(ctx: dict) -> None:
+    """Создаёт партиции outbox_events вперёд и удаляет просроченные."""
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with engine.begin() as conn:
+        created = create_partitions(
+            conn,
+            OutboxEvent.__tablename__,
+            interval=PartitionInterval(settings.OUTBOX_PARTITION_INTERVAL),
+            today=midnight.date(),
+            ahead=settings.OUTBOX_PARTITIONS_AHEAD,
+        )
+    with engine.begin() as conn:
+        # DETACH берёт эксклюзивную блокировку родителя: лучше пропустить
+        # проход, чем надолго встать в очередь перед вставками в outbox.
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        dropped = drop_expired_partitions(
+            conn,
+            OutboxEvent.__tablename__,
+            column="created_at",
+            before=midnight - timedelta(days=settings.OUTBOX_RETENTION_DAYS),
+            keep_if="processed_at IS NULL",
+        )
+    if created or dropped:
+        _log.info("outbox_partitions_maintained", created=created, dropped=dropped)
+
+
+async def maintain_request_log_partitions(ctx: dict) -> None:
+    """Создаёт месячные партиции request_logs вперёд."""
+    with engine.begin() as conn:
+        created = create_partitions(
+            conn,
+            RequestLog.__tablename__,
+            interval=PartitionInterval.MONTH,
+            today=datetime.utcnow().date(),
+            ahead=settings.REQUEST_LOG_PARTITIONS_AHEAD,
+        )
+    if created:
+        _log.info("request_log_partitions_created", created=created)
+
+
+async def purge_idempotency_keys(ctx: dict) -> None:
+    """Удаляет просроченные ключи идемпотентности пачками."""
+    before = datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    limit = settings.IDEMPOTENCY_PURGE_BATCH
+    purged = 0
+    while True:
+        with SqlAlchemyUnitOfWork() as uow:
+            deleted = uow.idempotency.purge(before, limit=limit)
+            uow.commit()
+        purged += deleted
+        if deleted < limit:
+            break
+        await asyncio.sleep(0)
+    if purged:
+        _log.info("idempotency_keys_purged", count=purged)
 
 
 async def on_startup(ctx: dict) -> None:
     _log.info("arq_worker_starting")
+    metrics_port = int(os.getenv("WORKER_METRICS_PORT", "0"))
+    if metrics_port:
+        start_http_server(metrics_port)
+        _log.info("worker_metrics_exposed", port=metrics_port)
+
+    ctx["outbox_publishers"] = WorkerSettings.outbox_publishers
+    ctx["outbox_sink"] = build_sink()
+    _log.info("outbox_sink_configured", sink=ctx["outbox_sink"].name)
+    wake = asyncio.Event()
+    ctx["outbox_tasks"] = [
+        asyncio.create_task(listen_for_outbox(wake)),
+        asyncio.create_task(drain_on_wake(wake, lambda: drain_outbox(ctx))),
+    ]
 
 
 async def on_shutdown(ctx: dict) -> None:
     _log.info("arq_worker_stopping")
+    tasks = ctx.pop("outbox_tasks", [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    sink = ctx.pop("outbox_sink", None)
+    if sink is not None:
+        await sink.aclose()
 
 
 class WorkerSettings:
@@ -58,9 +302,17 @@ class WorkerSettings:
         os.getenv("REDIS_URL", "redis://redis:6379/0")
     )
     cron_jobs: ClassVar = [
-        # каждую секунду
-        cron(drain_outbox, second=set(range(0, 60))),
+        # страховочный sweep раз в минуту; основной триггер — LISTEN/NOTIFY
+        cron(drain_outbox, second={0}),
+        # раз в час
+        cron(reconcile_request_counters, minute={17}, second={0}),
+        cron(maintain_outbox_partitions, minute={7}, second={0}),
+        cron(maintain_request_log_partitions, minute={27}, second={0}),
+        cron(purge_idempotency_keys, minute={37}, second={0}),
     ]
     on_startup = on_startup
     on_shutdown = on_shutdown
     max_jobs = 5
+    # Число конкурентных publisher'ов drain'а (шардирование по request_id);
+    # 1 — строго последовательная публикация. arq сам это поле игнорирует.
+    outbox_publishers: ClassVar[int] = int(os.getenv("OUTBOX_PUBLISHERS", "4"))
@@ -0,0 +1,138 @@
+"""Вспомогательная логика drain outbox, не привязанная к arq.
+
+publish_sharded — параллельная публикация пачки с сохранением порядка
+внутри заявки: события раскладываются по N «дорожкам» по хешу
+payload.request_id, дорожки публикуются конкурентно, а внутри дорожки —
+строго последовательно в порядке created_at, кусками для sink'а
+(app.workers.sinks). Медленный sink по одной заявке тормозит только её
+дорожку, а не всю пачку.
+
+AdaptiveBatchSize — AIMD-регулятор размера пачки. Цель — держать время
+обработки одной пачки около target_seconds: пока пачки приходят полными
+и укладываются в цель, размер растёт (бурст разгребается крупными
+пачками и меньшим числом транзакций); как только пачка «тормозит» —
+размер режется вдвое, чтобы не держать долгие транзакции и row-lock'и.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import zlib
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+from app.core.metrics import outbox_sink_latency_seconds
+from app.models.outbox import OutboxEvent
+from app.workers.sinks import OutboxSink
+
+_MAX_ERROR_LEN = 2000
+
+
+@dataclass(slots=True)
+class AdaptiveBatchSize:
+    minimum: int
+    maximum: int
+    target_seconds: float
+    growth: float = 1.5
+    current: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.minimum <= self.maximum:
+            raise ValueError("Нужно 1 <= minimum <= maximum.")
+        self.current = self.minimum
+
+    def observe(self, processed: int, elapsed_seconds: float) -> None:
+        """Подстраивает размер по результату очередной пачки."""
+        if elapsed_seconds > self.target_seconds:
+            self.current = max(self.minimum, self.current // 2)
+        elif processed >= self.current:
+            self.current = min(self.maximum, max(self.current + 1, int(self.current * self.growth)))
+
+
+def shard_for(event: OutboxEvent, shards: int) -> int:
+    """Номер дорожки события; стабилен между процессами (crc32, не hash())."""
+    key = event.payload.get("request_id", event.id)
+    return zlib.crc32(str(key).encode()) % shards
+
+
+@dataclass(slots=True)
+class PublishOutcome:
+    published: list[OutboxEvent] = field(default_factory=list)
+    failed: list[tuple[OutboxEvent, str]] = field(default_factory=list)
+    held: list[OutboxEvent] = field(default_factory=list)
+
+
+def _ordering_key(event: OutboxEvent) -> object:
+    return event.payload.get("request_id", ("event", event.id))
+
+
+async def publish_sharded(
+    events: Sequence[OutboxEvent], sink: OutboxSink, shards: int, *, batch_size: int
+) -> PublishOutcome:
+    """Публикует пачку в shards конкурентных дорожек.
+
+    Дорожка отдаёт sink'у свои события кусками по batch_size. Исключение
+    sink'а не валит пачку: первое событие каждой заявки из упавшего куска
+    уходит в failed, остальные её события в дорожке — в held и остаются
+    pending, чтобы не обогнать его.
+    """
+    lanes: list[list[OutboxEvent]] = [[] for _ in range(max(1, shards))]
+    for event in events:
+        lanes[shard_for(event, len(lanes))].append(event)
+
+    outcome = PublishOutcome()
+
+    async def run(lane: list[OutboxEvent]) -> None:
+        blocked: set[object] = set()
+        for i in range(0, len(lane), batch_size):
+            ready = []
+            for event in lane[i : i + batch_size]:
+                if _ordering_key(event) in blocked:
+                    outcome.held.append(event)
+                else:
+                    ready.append(event)
+            if not ready:
+                continue
+
+            started = time.perf_counter()
+            try:
+                await sink.publish(ready)
+            except Exception as exc:
+                _observe(sink, "error", started)
+                error = f"{type(exc).__name__}: {exc}"[:_MAX_ERROR_LEN]
+                for event in ready:
+                    key = _ordering_key(event)
+                    if key in blocked:
+                        outcome.held.append(event)
+                    else:
+                        outcome.failed.append((event, error))
+                        blocked.add(key)
+            else:
+                _observe(sink, "ok", started)
+                outcome.published.extend(ready)
+
+    async with asyncio.TaskGroup() as tg:
+        for lane in lanes:
+            if lane:
+                tg.create_task(run(lane))
+    return outcome
+
+
+def _observe(sink: OutboxSink, outcome: str, started: float) -> None:
+    outbox_sink_latency_seconds.labels(sink=sink.name, outcome=outcome).observe(
+        time.perf_counter() - started
+    )
+
+
+def retry_delay(
+    attempt: int, *, base: float, cap: float, rand: Callable[[], float] = random.random
+) -> float:
+    """Задержка перед попыткой номер attempt + 1: экспонента с jitter.
+
+    Верхняя граница base * 2^(attempt-1), обрезанная cap; случайная
+    половина («equal jitter») разносит ретраи упавшего разом sink'а.
+    """
+    ceiling = min(cap, base * 2 ** min(max(0, attempt - 1), 32))
+    return ceiling / 2 + rand() * ceiling / 2
@@ -0,0 +1,71 @@
+"""LISTEN/NOTIFY-триггер для drain outbox.
+
+SqlAlchemyOutboxRepository.add делает NOTIFY в транзакции бизнес-операции;
+Postgres доставляет его после COMMIT. Воркер держит отдельное
+autocommit-соединение с LISTEN и на каждое уведомление взводит
+asyncio.Event — отдельный цикл дренит outbox, пока событие взведено.
+
+Пачка уведомлений, пришедших во время drain, схлопывается в один
+повторный проход. Пока событий нет, соединение просто ждёт: ни одного
+запроса к БД на холостом ходу. Cron-sweep в WorkerSettings остаётся
+страховкой на случай обрыва LISTEN-соединения.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.outbox import OUTBOX_NOTIFY_CHANNEL
+
+_log = get_logger("outbox_listener")
+
+_RECONNECT_MIN_DELAY = 0.5
+_RECONNECT_MAX_DELAY = 30.0
+
+
+def _libpq_dsn() -> str:
+    # SQLAlchemy-URL (postgresql+psycopg://) → обычный libpq DSN.
+    url = make_url(settings.db_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+async def listen_for_outbox(wake: asyncio.Event) -> None:
+    """Держит LISTEN и взводит wake на каждое уведомление; переподключается сам."""
+    delay = _RECONNECT_MIN_DELAY
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(_libpq_dsn(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {OUTBOX_NOTIFY_CHANNEL}")
+                _log.info("outbox_listen_started", channel=OUTBOX_NOTIFY_CHANNEL)
+                delay = _RECONNECT_MIN_DELAY
+                # Пока не слушали, события могли накопиться — забираем их сразу.
+                wake.set()
+                async for _ in conn.notifies():
+                    wake.set()
+        except asyncio.CancelledError:
+            raise
+        except psycopg.Error as exc:
+            _log.warning("outbox_listen_lost", error=str(exc), retry_in=delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_MAX_DELAY)
+
+
+async def drain_on_wake(wake: asyncio.Event, drain: Callable[[], Awaitable[None]]) -> None:
+    """Запускает drain каждый раз, когда listener взвёл wake."""
+    while True:
+        await wake.wait()
+        wake.clear()
+        try:
+            await drain()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Ошибка одного прохода не должна убивать цикл: события останутся
+            # pending и будут подобраны следующим уведомлением или sweep'ом.
+            _log.exception("outbox_drain_failed")
@@ -0,0 +1,113 @@
+"""Sink'и outbox: куда воркер публикует события.
+
+Sink получает пачку событий целиком (один вызов — один запрос наружу)
+и либо публикует её всю, либо бросает исключение — тогда пачка целиком
+уходит в ретраи (см. app.workers.outbox.publish_sharded). Порядок событий
+в пачке — порядок created_at внутри одной дорожки.
+
+    LogSink     — структурный лог; дефолт для локальной разработки.
+    WebhookSink — POST пачки в JSON на внешний URL через пул keep-alive
+                  соединений httpx (HTTP/2 там, где сервер его умеет).
+
+Выбор — OUTBOX_SINK в Settings, сборка — build_sink(). Латентность
+каждого вызова sink'а пишется в outbox_sink_latency_seconds{sink,outcome}.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from typing import Protocol
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.outbox import OutboxEvent
+
+_log = get_logger("outbox_sink")
+
+
+class OutboxSink(Protocol):
+    name: str
+
+    async def publish(self, events: Sequence[OutboxEvent]) -> None: ...
+    async def aclose(self) -> None: ...
+
+
+def _event_body(event: OutboxEvent) -> dict:
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "created_at": event.created_at.isoformat(),
+        "payload": event.payload,
+    }
+
+
+class LogSink:
+    name = "log"
+
+    async def publish(self, events: Sequence[OutboxEvent]) -> None:
+        for event in events:
+            _log.info(
+                "outbox_event_published",
+                event_id=event.id,
+                event_type=event.event_type,
+                payload=event.payload,
+            )
+
+    async def aclose(self) -> None:
+        return None
+
+
+class WebhookSink:
+    """POST {"events": [...]} на url; любой ответ кроме 2xx — ошибка пачки.
+
+    Один AsyncClient на процесс: соединения переиспользуются между
+    пачками, семафор ограничивает число одновременных запросов поверх
+    лимитов пула (дорожек drain'а может быть больше, чем хочет принимать
+    получатель).
+    """
+
+    name = "webhook"
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout_seconds: float,
+        concurrency: int,
+        http2: bool = True,
+    ) -> None:
+        self._url = url
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+            ),
+            headers={"User-Agent": f"{settings.APP_NAME}-outbox"},
+        )
+
+    async def publish(self, events: Sequence[OutboxEvent]) -> None:
+        body = {"events": [_event_body(event) for event in events]}
+        async with self._semaphore:
+            response = await self._client.post(self._url, json=body)
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def build_sink() -> OutboxSink:
+    if settings.OUTBOX_SINK == "webhook":
+        if not settings.OUTBOX_WEBHOOK_URL:
+            raise RuntimeError("OUTBOX_SINK=webhook требует OUTBOX_WEBHOOK_URL.")
+        return WebhookSink(
+            settings.OUTBOX_WEBHOOK_URL,
+            timeout_seconds=settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS,
+            concurrency=settings.OUTBOX_WEBHOOK_CONCURRENCY,
+        )
+    return LogSink()
@@ -61,19 +61,23 @@ export type ServiceRequest = z.infer<typeof ServiceRequestSchema>;
 export function pageSchemaOf<T extends z.ZodTypeAny>(item: T) {
   return z.object({
     items: z.array(item),
-    total: z.number().int().nonnegative(),
+    total: z.number().int().nonnegative().nullable(),
     limit: z.number().int().positive(),
     offset: z.number().int().nonnegative(),
     has_next: z.boolean(),
+    next_cursor: z.string().nullable().optional(),
+    total_mode: z.enum(['exact', 'estimate', 'none']).optional(),
   });
 }
 
 export type Page<T> = {
   items: T[];
-  total: number;
+  total: number | null;
   limit: number;
   offset: number;
   has_next: boolean;
+  next_cursor?: string | null;
+  total_mode?: 'exact' | 'estimate' | 'none';
 };
 
 // ============================================================================
@@ -0,0 +1,75 @@
+"""Async-стек (DB_STACK=async): AsyncSqlAlchemyUnitOfWork и async-сервисы.
+
+Свой AsyncEngine на тест: pytest-asyncio даёт каждому тесту новый event
+loop, а соединения пула привязаны к loop'у, в котором открыты.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+pytestmark = pytest.mark.integration
+
+
+@pytest_asyncio.fixture()
+async def async_sessions(_app_with_db) -> AsyncIterator[async_sessionmaker]:
+    from app.core.config import settings
+
+    engine = create_async_engine(settings.async_db_url)
+    try:
+        yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_and_update_status_match_sync_stack(async_sessions, admin_user, agent_user):
+    from app.core.enums import RequestStatus
+    from app.schemas.request import RequestCreate, RequestStatusUpdate
+    from app.services.request_service import AsyncRequestService, RequestService
+    from app.uow import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
+
+    async with AsyncSqlAlchemyUnitOfWork(async_sessions) as uow:
+        service = AsyncRequestService(uow)
+        author = await uow.users.get(admin_user.user.id)
+        req = await service.create(RequestCreate(title="Async-заявка"), author)
+        assert req.status == RequestStatus.NEW
+
+        updated = await service.update_status(
+            req.id,
+            RequestStatusUpdate(status=RequestStatus.IN_PROGRESS, assignee_id=agent_user.user.id),
+            author,
+        )
+        assert updated.status == RequestStatus.IN_PROGRESS
+        assert updated.assigned_to_user_id == agent_user.user.id
+
+        page = await service.list_for_assignee(agent_user.user.id, limit=10, offset=0)
+        assert [item.id for item in page.items] == [req.id]
+        assert page.total == 1
+
+    # Записанное async-стеком видно sync-стеку: аудит, outbox и счётчики
+    # пишутся в той же транзакции, что и заявка.
+    with SqlAlchemyUnitOfWork() as uow:
+        sync_service = RequestService(uow)
+        history = sync_service.list_history(sync_service.get_or_404(req.id), limit=10)
+        actions = [log.action for log in history.items]
+        assert actions == ["created", "status_changed", "assignee_changed"]
+        assert sync_service.list_for_assignee(agent_user.user.id, limit=10, offset=0).total == 1
+
+
+@pytest.mark.asyncio
+async def test_async_authenticate(async_sessions, employee_user):
+    from app.core.exceptions import InvalidApiKey
+    from app.services.user_service import AsyncUserService
+    from app.uow import AsyncSqlAlchemyUnitOfWork
+
+    async with AsyncSqlAlchemyUnitOfWork(async_sessions) as uow:
+        service = AsyncUserService(uow)
+        user = await service.authenticate(employee_user.raw_api_key)
+        assert user.id == employee_user.user.id
+        with pytest.raises(InvalidApiKey):
+            await service.authenticate("sf_invalid_key_0000000000000000")
@@ -0,0 +1,67 @@
+"""Онлайн-конвертация в партиции: ATTACH legacy-таблицы не строит индексы заново.
+
+Откатываемся до ревизии перед партиционированием outbox_events и снова
+накатываем head; вокруг каждого ATTACH PARTITION снимаем OID индексов
+legacy-партиции. Новый OID — значит, ATTACH перестраивал индекс под
+ACCESS EXCLUSIVE.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+pytestmark = pytest.mark.integration
+
+_BEFORE_OUTBOX_PARTITIONING = "c3d4e5f6a7b9"
+_LEGACY = ("outbox_events_legacy", "request_logs_legacy")
+
+
+def _index_oids(dbapi_connection, table: str) -> list[int]:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT indexrelid::int FROM pg_index WHERE indrelid = %s::regclass ORDER BY 1",
+            (table,),
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def test_attach_reuses_prebuilt_legacy_indexes(_app_with_db, _postgres_url):
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config("alembic.ini")
+    cfg.set_main_option("sqlalchemy.url", _postgres_url)
+    command.downgrade(cfg, _BEFORE_OUTBOX_PARTITIONING)
+
+    seen: dict[str, dict[str, list[int]]] = defaultdict(dict)
+
+    def _legacy_attached(statement: str) -> str | None:
+        return next((t for t in _LEGACY if f"ATTACH PARTITION {t} " in statement), None)
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if table := _legacy_attached(statement):
+            seen[table]["before"] = _index_oids(cursor.connection, table)
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        if table := _legacy_attached(statement):
+            seen[table]["after"] = _index_oids(cursor.connection, table)
+
+    event.listen(Engine, "before_cursor_execute", before)
+    event.listen(Engine, "after_cursor_execute", after)
+    try:
+        command.upgrade(cfg, "head")
+    finally:
+        event.remove(Engine, "before_cursor_execute", before)
+        event.remove(Engine, "after_cursor_execute", after)
+
+    for table in _LEGACY:
+        # PK (id, ключ партиционирования) и вторичные индексы — те же объекты.
+        assert len(seen[table]["before"]) >= 2, table
+        assert seen[table]["after"] == seen[table]["before"], table
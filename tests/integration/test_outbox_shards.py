@@ -0,0 +1,32 @@
+"""Шарды drain outbox: два процесса не публикуют события одной заявки разом."""
+
+from __future__ import annotations
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+_SHARDS = 8
+
+
+def test_claimed_shards_are_exclusive_until_commit(admin_user):
+    from app.schemas.request import RequestCreate
+    from app.services.request_service import RequestService
+    from app.uow import SqlAlchemyUnitOfWork
+
+    with SqlAlchemyUnitOfWork() as uow:
+        author = uow.users.get(admin_user.user.id)
+        created = RequestService(uow).create(RequestCreate(title="Шарды outbox"), author)
+
+    with SqlAlchemyUnitOfWork() as first, SqlAlchemyUnitOfWork() as second:
+        mine = first.outbox.claim_shards(_SHARDS)
+        assert sorted(mine) == list(range(_SHARDS))
+        assert second.outbox.claim_shards(_SHARDS) == []
+
+        batch = first.outbox.fetch_pending(limit=1_000, shards=mine, shard_count=_SHARDS)
+        assert created.id in {event.payload.get("request_id") for event in batch}
+        first.rollback()
+
+        # После конца транзакции шарды снова свободны.
+        assert sorted(second.outbox.claim_shards(_SHARDS)) == list(range(_SHARDS))
+        second.rollback()
@@ -0,0 +1,78 @@
+"""Реплика для чтения: одна БД, указанная и как primary, и как реплика.
+
+Проверяем маршрутизацию GET и read-your-writes по LSN. С двумя инстансами
+Postgres достаточно задать DATABASE_URL_REPLICA — тест тот же.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture()
+def replica_as_primary(_app_with_db, monkeypatch) -> Iterator[None]:
+    import os
+
+    from app.core.config import settings
+    from app.database import replica
+
+    url = os.getenv("DATABASE_URL_REPLICA") or settings.db_url
+    engine = create_engine(url, execution_options={"postgresql_readonly": True})
+    monkeypatch.setattr(replica, "replica_engine", engine)
+    monkeypatch.setattr(replica, "ReplicaSessionLocal", sessionmaker(bind=engine, autoflush=False))
+    try:
+        yield
+    finally:
+        engine.dispose()
+
+
+def _routed(target: str, reason: str) -> float:
+    labels = {"target": target, "reason": reason}
+    return REGISTRY.get_sample_value("serviceflow_db_read_route_total", labels) or 0.0
+
+
+def test_reads_follow_client_lsn(client: TestClient, employee_api_key: str, replica_as_primary):
+    from app.database.replica import LSN_COOKIE, LSN_HEADER
+
+    created = client.post(
+        "/api/v1/requests",
+        headers={"X-API-Key": employee_api_key},
+        json={"title": "Чтение с реплики", "description": None},
+    )
+    assert created.status_code == HTTPStatus.CREATED
+    lsn = created.headers[LSN_HEADER]
+    assert created.cookies.get(LSN_COOKIE) == lsn
+    req_id = created.json()["id"]
+
+    # Реплика (та же БД) уже проиграла LSN записи — читаем с неё.
+    before = _routed("replica", "caught_up")
+    fresh = client.get(
+        f"/api/v1/requests/{req_id}",
+        headers={"X-API-Key": employee_api_key, LSN_HEADER: lsn},
+    )
+    assert fresh.status_code == HTTPStatus.OK
+    assert _routed("replica", "caught_up") == before + 1
+
+    # LSN из «будущего» — реплика отстаёт, чтение уходит в primary.
+    before = _routed("primary", "stale")
+    client.cookies.clear()
+    stale = client.get(
+        f"/api/v1/requests/{req_id}",
+        headers={"X-API-Key": employee_api_key, LSN_HEADER: "FFFFFFFF/FFFFFFFF"},
+    )
+    assert stale.status_code == HTTPStatus.OK
+    assert _routed("primary", "stale") == before + 1
+
+    before = _routed("replica", "no_lsn")
+    plain = client.get("/api/v1/requests/my", headers={"X-API-Key": employee_api_key})
+    assert plain.status_code == HTTPStatus.OK
+    assert _routed("replica", "no_lsn") == before + 1
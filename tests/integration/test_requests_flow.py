@@ -80,7 +80,7 @@ def test_full_request_lifecycle(
         headers={"X-API-Key": admin_api_key},
     )
     assert history.status_code == HTTPStatus.OK
-    actions = [row["action"] for row in history.json()]
+    actions = [row["action"] for row in history.json()["items"]]
     assert actions.count("created") == 1
     assert actions.count("status_changed") == 2
 
@@ -149,3 +149,327 @@ def test_employee_cannot_see_foreign_request(
     )
     assert resp.status_code == HTTPStatus.FORBIDDEN
     assert resp.json()["code"] == "forbidden_to_view_request"
+
+
+def test_cursor_pagination_walks_all_pages_without_duplicates(
+    client: TestClient,
+    employee_api_key: str,
+):
+    created = []
+    for i in range(5):
+        r = client.post(
+            "/api/v1/requests",
+            headers={"X-API-Key": employee_api_key},
+            json={"title": f"cursor-{i}", "description": None},
+        )
+        created.append(r.json()["id"])
+
+    seen: list[int] = []
+    url = "/api/v1/requests/my?limit=2"
+    while True:
+        page = client.get(url, headers={"X-API-Key": employee_api_key})
+        assert page.status_code == HTTPStatus.OK
+        body = page.json()
+        seen.extend(item["id"] for item in body["items"])
+        if not body["has_next"]:
+            assert body["next_cursor"] is None
+            break
+        url = f"/api/v1/requests/my?limit=2&cursor={body['next_cursor']}"
+
+    assert seen == sorted(created, reverse=True)
+
+
+def test_invalid_cursor_returns_400(client: TestClient, employee_api_key: str):
+    resp = client.get(
+        "/api/v1/requests/my?cursor=not-a-cursor",
+        headers={"X-API-Key": employee_api_key},
+    )
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.json()["code"] == "invalid_cursor"
+
+
+@pytest.mark.parametrize("mode", ["exact", "estimate", "none"])
+def test_total_mode_controls_total(client: TestClient, employee_api_key: str, mode: str):
+    for i in range(3):
+        client.post(
+            "/api/v1/requests",
+            headers={"X-API-Key": employee_api_key},
+            json={"title": f"total-{i}", "description": None},
+        )
+    resp = client.get(
+        f"/api/v1/requests/my?limit=2&total_mode={mode}",
+        headers={"X-API-Key": employee_api_key},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert body["total_mode"] == mode
+    assert body["has_next"] is True
+    if mode == "exact":
+        assert body["total"] == 3
+    elif mode == "estimate":
+        assert body["total"] >= 3
+    else:
+        assert body["total"] is None
+
+
+def test_conditional_get_returns_304(
+    client: TestClient,
+    admin_user,
+    employee_api_key: str,
+    admin_api_key: str,
+):
+    req_id = client.post(
+        "/api/v1/requests",
+        headers={"X-API-Key": employee_api_key},
+        json={"title": "Условный GET", "description": None},
+    ).json()["id"]
+
+    for path, api_key in [
+        (f"/api/v1/requests/{req_id}", employee_api_key),
+        ("/api/v1/requests/my", employee_api_key),
+        (f"/api/v1/requests/{req_id}/history", admin_api_key),
+    ]:
+        first = client.get(path, headers={"X-API-Key": api_key})
+        assert first.status_code == HTTPStatus.OK
+        etag = first.headers["ETag"]
+        cached = client.get(path, headers={"X-API-Key": api_key, "If-None-Match": etag})
+        assert cached.status_code == HTTPStatus.NOT_MODIFIED
+        assert cached.headers["ETag"] == etag
+        assert cached.content == b""
+
+    # Изменение заявки меняет ETag — старый больше не даёт 304.
+    old_etag = client.get(
+        f"/api/v1/requests/{req_id}", headers={"X-API-Key": employee_api_key}
+    ).headers["ETag"]
+    client.patch(
+        f"/api/v1/requests/{req_id}/status",
+        headers={"X-API-Key": admin_api_key},
+        json={"status": "IN_PROGRESS", "assignee_id": admin_user.user.id},
+    )
+    fresh = client.get(
+        f"/api/v1/requests/{req_id}",
+        headers={"X-API-Key": employee_api_key, "If-None-Match": old_etag},
+    )
+    assert fresh.status_code == HTTPStatus.OK
+    assert fresh.headers["ETag"] != old_etag
+
+
+def test_list_fields_projection(client: TestClient, employee_api_key: str):
+    client.post(
+        "/api/v1/requests",
+        headers={"X-API-Key": employee_api_key},
+        json={"title": "Проекция", "description": "длинное описание"},
+    )
+    full = client.get("/api/v1/requests/my", headers={"X-API-Key": employee_api_key})
+    slim = client.get(
+        "/api/v1/requests/my?fields=id,title,status",
+        headers={"X-API-Key": employee_api_key},
+    )
+    assert slim.status_code == HTTPStatus.OK
+    assert slim.json()["items"] == [
+        {"id": item["id"], "title": item["title"], "status": item["status"]}
+        for item in full.json()["items"]
+    ]
+    assert slim.headers["ETag"] != full.headers["ETag"]
+
+    bad = client.get(
+        "/api/v1/requests/my?fields=id,secret",
+        headers={"X-API-Key": employee_api_key},
+    )
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+    assert bad.json()["code"] == "invalid_fields"
+
+
+def test_batch_create_reports_items_and_replays(
+    client: TestClient, admin_user, employee_api_key: str
+):
+    headers = {"X-API-Key": employee_api_key}
+    single = client.post(
+        "/api/v1/requests",
+        headers={**headers, "Idempotency-Key": "batch-k1"},
+        json={"title": "Принтер зажёвывает бумагу"},
+    )
+    assert single.status_code == HTTPStatus.CREATED
+
+    batch = client.post(
+        "/api/v1/requests:batch",
+        headers=headers,
+        json={
+            "items": [
+                {"title": "Не работает мышь", "idempotency_key": "batch-k2"},
+                {"title": "Назначить админу", "assignee_id": admin_user.user.id},
+                {"title": "Принтер зажёвывает бумагу", "idempotency_key": "batch-k1"},
+                {"title": "Сломался стул"},
+            ]
+        },
+    )
+    assert batch.status_code == HTTPStatus.OK
+    body = batch.json()
+    assert [item["status"] for item in body["items"]] == [201, 403, 200, 201]
+    assert body["items"][1]["error"]["code"] == "employee_cannot_assign_on_create"
+    assert body["items"][2]["request"]["id"] == single.json()["id"]
+    assert (body["created"], body["failed"]) == (2, 1)
+
+    created_id = body["items"][0]["request"]["id"]
+    history = client.get(f"/api/v1/requests/{created_id}/history", headers=headers)
+    assert [log["action"] for log in history.json()["items"]] == ["created"]
+
+    # Повтор пачки: элемент с ключом отдаёт сохранённый результат.
+    again = client.post(
+        "/api/v1/requests:batch",
+        headers=headers,
+        json={"items": [{"title": "Не работает мышь", "idempotency_key": "batch-k2"}]},
+    )
+    assert again.json()["items"][0] == {**body["items"][0], "status": 200}
+
+
+def test_batch_item_does_not_run_under_foreign_reservation(
+    client: TestClient, employee_user, employee_api_key: str
+):
+    from app.core.idempotency import compute_body_hash
+    from app.schemas.request import RequestBatchItem
+    from app.services.idempotency_store import IdempotencyScope, PostgresIdempotencyStore
+    from app.uow import SqlAlchemyUnitOfWork
+
+    item = RequestBatchItem(title="Гонка ключей", idempotency_key="race-k1")
+    scope = IdempotencyScope(
+        user_id=employee_user.user.id,
+        method="POST",
+        path="/api/v1/requests",
+        key="race-k1",
+        request_hash=compute_body_hash(item.model_dump(mode="json", exclude={"idempotency_key"})),
+    )
+    # Одиночный POST с тем же ключом ещё выполняется.
+    with SqlAlchemyUnitOfWork() as uow:
+        PostgresIdempotencyStore(uow).reserve(scope)
+
+    batch = client.post(
+        "/api/v1/requests:batch",
+        headers={"X-API-Key": employee_api_key},
+        json={"items": [{"title": "Гонка ключей", "idempotency_key": "race-k1"}]},
+    )
+    assert batch.status_code == HTTPStatus.OK
+    body = batch.json()
+    assert body["items"][0]["error"]["code"] == "idempotency_key_in_progress"
+    assert (body["created"], body["failed"]) == (0, 1)
+
+
+def test_batch_status_update_reports_items_and_etags(
+    client: TestClient, admin_user, employee_api_key: str, admin_api_key: str
+):
+    created = client.post(
+        "/api/v1/requests:batch",
+        headers={"X-API-Key": employee_api_key},
+        json={"items": [{"title": "Упал VPN"}, {"title": "Нет доступа к почте"}]},
+    ).json()
+    first, second = (item["request"] for item in created["items"])
+    first_etag = client.get(
+        f"/api/v1/requests/{first['id']}", headers={"X-API-Key": admin_api_key}
+    ).headers["ETag"]
+
+    batch = client.patch(
+        "/api/v1/requests:batch",
+        headers={"X-API-Key": admin_api_key},
+        json={
+            "items": [
+                {
+                    "request_id": first["id"],
+                    "status": "IN_PROGRESS",
+                    "assignee_id": admin_user.user.id,
+                    "if_match": first_etag,
+                },
+                {"request_id": second["id"], "status": "DONE"},
+                {"request_id": second["id"], "status": "CANCELED", "if_match": '"stale"'},
+            ]
+        },
+    )
+    assert batch.status_code == HTTPStatus.OK
+    body = batch.json()
+    assert [item["status"] for item in body["items"]] == [200, 400, 412]
+    assert body["items"][1]["error"]["code"] == "invalid_status_transition"
+    assert (body["updated"], body["failed"]) == (1, 2)
+
+    updated = body["items"][0]
+    assert updated["request"]["status"] == "IN_PROGRESS"
+    fresh = client.get(f"/api/v1/requests/{first['id']}", headers={"X-API-Key": admin_api_key})
+    assert fresh.headers["ETag"] == updated["etag"]
+    history = client.get(
+        f"/api/v1/requests/{first['id']}/history", headers={"X-API-Key": admin_api_key}
+    )
+    assert sorted(row["action"] for row in history.json()["items"]) == [
+        "assignee_changed",
+        "created",
+        "status_changed",
+    ]
+
+
+def test_status_update_idempotency_key(client: TestClient, admin_api_key: str):
+    headers = {"X-API-Key": admin_api_key}
+    created = client.post("/api/v1/requests", headers=headers, json={"title": "Сломался сканер"})
+    path = f"/api/v1/requests/{created.json()['id']}/status"
+
+    # Ошибка снимает бронь: тот же ключ с исправленным телом выполнится.
+    failed = client.patch(
+        path, headers={**headers, "Idempotency-Key": "patch-1"}, json={"status": "DONE"}
+    )
+    assert failed.status_code == HTTPStatus.BAD_REQUEST
+
+    first = client.patch(
+        path,
+        headers={**headers, "Idempotency-Key": "patch-1", "If-Match": created.headers["ETag"]},
+        json={"status": "IN_PROGRESS"},
+    )
+    assert first.status_code == HTTPStatus.OK
+
+    # Повтор с устаревшим If-Match отдаёт сохранённый ответ, а не 412.
+    repeat = client.patch(
+        path,
+        headers={**headers, "Idempotency-Key": "patch-1", "If-Match": created.headers["ETag"]},
+        json={"status": "IN_PROGRESS"},
+    )
+    assert repeat.status_code == HTTPStatus.OK
+    assert repeat.json() == first.json()
+    assert repeat.headers["ETag"] == first.headers["ETag"]
+
+    history = client.get(path.removesuffix("/status") + "/history", headers=headers).json()
+    assert [entry["action"] for entry in history["items"]].count("status_changed") == 1
+
+
+def test_role_quota_charges_list_with_count(
+    client: TestClient, employee_api_key: str, monkeypatch: pytest.MonkeyPatch
+):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_QUOTA_EMPLOYEE", "6/minute")
+    headers = {"X-API-Key": employee_api_key}
+
+    # Список с COUNT стоит 5, без total — 2: второй запрос квоту превышает.
+    assert client.get("/api/v1/requests/my", headers=headers).status_code == HTTPStatus.OK
+    resp = client.get("/api/v1/requests/my?total_mode=none", headers=headers)
+    assert resp.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert resp.json()["code"] == "quota_exceeded"
+    assert int(resp.headers["Retry-After"]) >= 1
+
+
+def test_history_is_paginated_by_cursor(client: TestClient, admin_api_key: str, admin_user):
+    headers = {"X-API-Key": admin_api_key}
+    req_id = client.post(
+        "/api/v1/requests", headers=headers, json={"title": "history pages", "description": None}
+    ).json()["id"]
+    for status in ("IN_PROGRESS", "DONE"):
+        client.patch(
+            f"/api/v1/requests/{req_id}/status",
+            headers=headers,
+            json={"status": status, "assignee_id": admin_user.user.id},
+        )
+
+    first = client.get(f"/api/v1/requests/{req_id}/history?limit=2", headers=headers).json()
+    assert first["has_next"] is True and first["total"] is None
+    rest = client.get(
+        f"/api/v1/requests/{req_id}/history?limit=2&cursor={first['next_cursor']}", headers=headers
+    ).json()
+    entries = first["items"] + rest["items"]
+    assert len({entry["id"] for entry in entries}) == len(entries)
+    assert entries[0]["action"] == "created"
+    assert rest["has_next"] is False
+    assert set(entries[0]) >= {"id", "request_id", "user_id", "action", "timestamp"}
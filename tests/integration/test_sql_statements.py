@@ -0,0 +1,137 @@
+"""Сколько SQL уходит в БД на операцию заявки.
+
+add() репозиториев не делает flush, id новой заявки приходит из
+INSERT ... RETURNING, DTO собирается без refresh после commit. Тест
+фиксирует это: лишний flush или SELECT сразу меняет список.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+pytestmark = pytest.mark.integration
+
+_TABLE = re.compile(r"^(INSERT INTO|UPDATE|DELETE FROM)\s+(\w+)")
+
+
+def _op(statement: str) -> str:
+    match = _TABLE.match(statement.lstrip())
+    if match:
+        return f"{match.group(1).split()[0]} {match.group(2)}"
+    if "pg_notify" in statement:
+        return "NOTIFY"
+    if statement.lstrip().upper().startswith("SELECT") and " FROM " in statement:
+        return "SELECT " + statement.split(" FROM ", 1)[1].split()[0]
+    return statement.split()[0]
+
+
+@contextmanager
+def _statements() -> Iterator[Counter[str]]:
+    from app.database.session import engine
+
+    seen: Counter[str] = Counter()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        seen[_op(statement)] += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def test_create_request_statements(admin_user):
+    from app.schemas.request import RequestCreate
+    from app.services.request_service import RequestService
+    from app.uow import SqlAlchemyUnitOfWork
+
+    with SqlAlchemyUnitOfWork() as uow:
+        author = uow.users.get(admin_user.user.id)
+        with _statements() as seen:
+            created = RequestService(uow).create(RequestCreate(title="Счётчик SQL"), author)
+
+    assert created.id is not None and created.public_id is not None
+    assert seen == Counter(
+        {
+            "INSERT service_requests": 1,
+            "INSERT request_counters": 1,
+            "INSERT request_logs": 1,
+            "INSERT outbox_events": 1,
+            "NOTIFY": 1,
+        }
+    )
+
+
+def test_update_status_statements(admin_user):
+    from app.core.enums import RequestStatus
+    from app.schemas.request import RequestCreate, RequestStatusUpdate
+    from app.services.request_service import RequestService
+    from app.uow import SqlAlchemyUnitOfWork
+
+    with SqlAlchemyUnitOfWork() as uow:
+        author = uow.users.get(admin_user.user.id)
+        created = RequestService(uow).create(RequestCreate(title="Счётчик SQL"), author)
+
+    with SqlAlchemyUnitOfWork() as uow:
+        author = uow.users.get(admin_user.user.id)
+        with _statements() as seen:
+            updated = RequestService(uow).update_status(
+                created.id,
+                RequestStatusUpdate(status=RequestStatus.IN_PROGRESS, assignee_id=author.id),
+                author,
+            )
+
+    assert updated.status == RequestStatus.IN_PROGRESS
+    # Два лога и два события (статус + назначение) — по одному INSERT;
+    # исполнитель уже в identity map, refresh после commit нет.
+    assert seen == Counter(
+        {
+            "SELECT service_requests": 1,
+            "INSERT request_logs": 1,
+            "INSERT outbox_events": 1,
+            "NOTIFY": 1,
+            "INSERT request_counters": 1,
+            "UPDATE service_requests": 1,
+        }
+    )
+
+
+def test_update_status_locks_request_row(admin_user):
+    """Дельты счётчиков считаются от строки под FOR UPDATE, а не от снимка."""
+    from app.core.enums import RequestStatus
+    from app.database.session import engine
+    from app.schemas.request import RequestCreate, RequestStatusUpdate
+    from app.services.request_service import RequestService
+    from app.uow import SqlAlchemyUnitOfWork
+
+    with SqlAlchemyUnitOfWork() as uow:
+        author = uow.users.get(admin_user.user.id)
+        created = RequestService(uow).create(RequestCreate(title="Блокировка"), author)
+
+    selects: list[str] = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if _op(statement) == "SELECT service_requests":
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        with SqlAlchemyUnitOfWork() as uow:
+            author = uow.users.get(admin_user.user.id)
+            RequestService(uow).update_status(
+                created.id,
+                RequestStatusUpdate(status=RequestStatus.IN_PROGRESS, assignee_id=author.id),
+                author,
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+    assert len(selects) == 1
+    assert selects[0].rstrip().endswith("FOR UPDATE")
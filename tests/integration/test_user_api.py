@@ -60,6 +60,14 @@ def test_users_list_is_paginated(client: TestClient, admin_api_key: str):
     resp = client.get("/api/v1/users?limit=1&offset=0", headers={"X-API-Key": admin_api_key})
     assert resp.status_code == HTTPStatus.OK
     body = resp.json()
-    assert set(body.keys()) == {"items", "total", "limit", "offset", "has_next"}
+    assert set(body.keys()) == {
+        "items",
+        "total",
+        "limit",
+        "offset",
+        "has_next",
+        "next_cursor",
+        "total_mode",
+    }
     assert body["limit"] == 1
     assert body["total"] >= 1
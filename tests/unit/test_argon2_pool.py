@@ -0,0 +1,106 @@
+"""Юнит-тесты выделенного пула argon2: backpressure, метрики, process-пул."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.argon2_pool import Argon2Pool
+from app.core.errors import domain_exception_handler
+from app.core.exceptions import Argon2Overloaded, DomainError
+from app.core.hashing import hash_api_key, verify_api_key
+
+pytestmark = pytest.mark.unit
+
+
+def _samples(name: str, op: str) -> float:
+    return REGISTRY.get_sample_value(name, {"op": op}) or 0.0
+
+
+@pytest.fixture()
+def thread_pool():
+    pool = Argon2Pool(kind="thread", workers=1, queue_depth=1, retry_after=3)
+    yield pool
+    pool.shutdown()
+
+
+def test_inline_runs_in_caller_thread():
+    pool = Argon2Pool(kind="inline", workers=0, queue_depth=0, retry_after=1)
+    assert pool.run("test_inline", threading.get_ident) == threading.get_ident()
+    assert _samples("serviceflow_argon2_hash_seconds_count", "test_inline") == 1
+
+
+def test_saturated_pool_rejects_with_retry_after(thread_pool):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker() -> int:
+        started.set()
+        release.wait(5)
+        return 1
+
+    callers = [
+        threading.Thread(target=thread_pool.run, args=("test_block", blocker)) for _ in range(2)
+    ]
+    for caller in callers:
+        caller.start()
+    started.wait(5)
+    deadline = time.monotonic() + 5
+    while thread_pool._in_flight < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Один выполняется, один в очереди — третий сверх ёмкости.
+    with pytest.raises(Argon2Overloaded) as exc_info:
+        thread_pool.run("test_block", blocker)
+    assert exc_info.value.retry_after == 3
+    assert _samples("serviceflow_argon2_rejected_total", "test_block") == 1
+
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    assert thread_pool.run("test_block", lambda: 42) == 42
+
+
+def test_queue_wait_and_hash_time_are_observed(thread_pool):
+    thread_pool.run("test_metrics", lambda: None)
+    assert _samples("serviceflow_argon2_hash_seconds_count", "test_metrics") == 1
+    assert _samples("serviceflow_argon2_queue_wait_seconds_count", "test_metrics") == 1
+
+
+@pytest.mark.asyncio
+async def test_arun_uses_pool_thread(thread_pool):
+    ident = await thread_pool.arun("test_async", threading.get_ident)
+    assert ident != threading.get_ident()
+
+
+def test_process_pool_verifies_keys():
+    pool = Argon2Pool(kind="process", workers=1, queue_depth=0, retry_after=1)
+    try:
+        stored = hash_api_key("raw-key")
+        assert pool.run("test_process", verify_api_key, "raw-key", stored) is True
+        assert pool.run("test_process", verify_api_key, "other", stored) is False
+    finally:
+        pool.shutdown()
+
+
+def test_invalid_worker_count_rejected():
+    with pytest.raises(ValueError):
+        Argon2Pool(kind="process", workers=0, queue_depth=1, retry_after=1)
+
+
+def test_overload_maps_to_503_with_retry_after():
+    app = FastAPI()
+    app.add_exception_handler(DomainError, domain_exception_handler)
+
+    @app.get("/boom")
+    def boom():
+        raise Argon2Overloaded(retry_after=2)
+
+    response = TestClient(app).get("/boom")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert response.json()["code"] == "argon2_overloaded"
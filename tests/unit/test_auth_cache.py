@@ -0,0 +1,86 @@
+"""Юнит-тесты кеша проверенных API-ключей."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.core.auth_cache import VerifiedKeyCache
+
+pytestmark = pytest.mark.unit
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(*, max_size: int = 10, ttl: float = 60.0, clock=None) -> VerifiedKeyCache:
+    return VerifiedKeyCache(max_size=max_size, ttl_seconds=ttl, clock=clock or _Clock())
+
+
+def test_put_then_get_returns_user_and_hash():
+    cache = _cache()
+    cache.put("raw-key-1", user_id=7, api_key_hash="$argon2id$h1")
+    assert cache.get("raw-key-1") == (7, "$argon2id$h1")
+    assert cache.get("raw-key-2") is None
+
+
+def test_raw_key_is_not_stored():
+    cache = _cache()
+    cache.put("super-secret-raw-key", user_id=1, api_key_hash="h")
+    assert all(b"super-secret-raw-key" not in d for d in cache._entries)
+
+
+def test_entry_expires_after_ttl():
+    clock = _Clock()
+    cache = _cache(ttl=30, clock=clock)
+    cache.put("k", user_id=1, api_key_hash="h")
+    clock.now += 29
+    assert cache.get("k") is not None
+    clock.now += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = _cache(max_size=2)
+    cache.put("a", user_id=1, api_key_hash="h")
+    cache.put("b", user_id=2, api_key_hash="h")
+    assert cache.get("a") is not None  # "a" теперь самый свежий
+    cache.put("c", user_id=3, api_key_hash="h")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_invalidate_user_drops_all_their_keys():
+    cache = _cache()
+    cache.put("a1", user_id=1, api_key_hash="h")
+    cache.put("a2", user_id=1, api_key_hash="h")
+    cache.put("b", user_id=2, api_key_hash="h")
+    cache.invalidate_user(1)
+    assert cache.get("a1") is None
+    assert cache.get("a2") is None
+    assert cache.get("b") == (2, "h")
+
+
+def test_disabled_cache_never_hits():
+    cache = _cache(max_size=0)
+    cache.put("k", user_id=1, api_key_hash="h")
+    assert cache.get("k") is None
+
+
+def test_peek_returns_user_without_touching_lru():
+    clock = _Clock()
+    cache = _cache(max_size=2, ttl=30, clock=clock)
+    cache.put("a", user_id=1, api_key_hash="h")
+    cache.put("b", user_id=2, api_key_hash="h")
+    assert cache.peek("a") == 1
+    cache.put("c", user_id=3, api_key_hash="h")
+    assert cache.peek("a") is None  # peek не освежил "a" — вытеснен первым
+    assert cache.peek("unknown") is None
+    clock.now += 31
+    assert cache.peek("c") is None
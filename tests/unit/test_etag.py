@@ -0,0 +1,65 @@
+"""Юнит-тесты ETag: weak-сравнение If-None-Match, ETag страниц."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from app.schemas.common import (
+    Page,
+    TotalMode,
+    compute_etag,
+    compute_weak_etag,
+    etag_matches,
+    page_etag,
+)
+
+pytestmark = pytest.mark.unit
+
+TS = datetime(2026, 10, 18, 12, 0, 0, 1)
+
+
+def _page(*items: tuple[int, datetime]) -> Page[tuple[int, datetime]]:
+    return Page.of(list(items), total=len(items), limit=10, offset=0, total_mode=TotalMode.EXACT)
+
+
+def test_strong_etag_is_stable_and_version_sensitive():
+    assert compute_etag(1, TS) == compute_etag(1, TS)
+    assert compute_etag(1, TS) != compute_etag(1, TS.replace(microsecond=2))
+    assert compute_etag(1, TS).startswith('"')
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        compute_etag(1, TS),
+        "W/" + compute_etag(1, TS),
+        f'"other", {compute_etag(1, TS)}',
+        "*",
+    ],
+)
+def test_if_none_match_matches(header: str):
+    assert etag_matches(header, compute_etag(1, TS))
+
+
+@pytest.mark.parametrize("header", [None, "", '"other"', 'W/"other", "another"'])
+def test_if_none_match_mismatch(header: str | None):
+    assert not etag_matches(header, compute_etag(1, TS))
+
+
+def test_weak_etag_matches_its_strong_form():
+    etag = compute_weak_etag("history", 7, 1, 2)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag.removeprefix("W/"), etag)
+
+
+def _version(item: tuple[int, datetime]) -> tuple[int, datetime]:
+    return item
+
+
+def test_page_etag_tracks_item_versions():
+    base = page_etag(_page((1, TS), (2, TS)), _version)
+    assert base == page_etag(_page((1, TS), (2, TS)), _version)
+    assert base != page_etag(_page((1, TS), (2, TS.replace(microsecond=5))), _version)
+    assert base != page_etag(_page((1, TS)), _version)
@@ -1,10 +1,25 @@
-"""Юнит-тесты утилит идемпотентности."""
+"""Юнит-тесты утилит идемпотентности и протокола бронирования ключа."""
 
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
 import pytest
 
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyConflict, IdempotencyKeyInProgress
 from app.core.idempotency import compute_body_hash, validate_key
+from app.services.idempotency_service import IdempotencyService
+from app.services.idempotency_store import (
+    IdempotencyScope,
+    PostgresIdempotencyStore,
+    Reservation,
+    StoredResponse,
+    _Action,
+    _Clock,
+    _resolve,
+)
 
 pytestmark = pytest.mark.unit
 
@@ -29,3 +44,104 @@ def test_body_hash_differs_on_content_change():
     a = compute_body_hash({"title": "t"})
     b = compute_body_hash({"title": "t2"})
     assert a != b
+
+
+_NOW = datetime(2026, 1, 1, 12, 0)
+_SCOPE = IdempotencyScope(
+    user_id=1, method="POST", path="/api/v1/requests", key="k", request_hash="h"
+)
+
+
+def _state(*, age: timedelta = timedelta(0), request_hash="h", status=None, body=None):
+    return SimpleNamespace(
+        id=7,
+        request_hash=request_hash,
+        response_status=status,
+        response_body=body,
+        created_at=_NOW - age,
+    )
+
+
+def test_resolve_existing_key():
+    clock = _Clock.at(_NOW)
+    assert _resolve(_state(status=201, body={}), "h", clock) is _Action.REPLAY
+    assert _resolve(_state(), "h", clock) is _Action.WAIT
+    stale = timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS + 1)
+    assert _resolve(_state(age=stale), "h", clock) is _Action.TAKE_OVER
+    with pytest.raises(IdempotencyKeyConflict):
+        _resolve(_state(status=201, body={}), "other", clock)
+    # Просроченный ключ свободен, даже с другим телом.
+    expired = timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS, seconds=1)
+    assert _resolve(_state(age=expired, request_hash="x"), "h", clock) is _Action.TAKE_OVER
+
+
+class _FakeIdempotencyRepo:
+    def __init__(self, *, reserved: int | None = None, state=None, take_over: bool = False):
+        self.reserved = reserved
+        self.current = state
+        self.taken = take_over
+        self.released: list[int] = []
+
+    def reserve(self, **_) -> int | None:
+        return self.reserved
+
+    def state(self, **_):
+        return self.current
+
+    def take_over(self, record_id: int, **_) -> bool:
+        return self.taken
+
+    def release(self, record_id: int) -> None:
+        self.released.append(record_id)
+
+
+class _FakeUow:
+    def __init__(self, repo: _FakeIdempotencyRepo):
+        self.idempotency = repo
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+def test_begin_reserves_and_publishes_before_work():
+    uow = _FakeUow(_FakeIdempotencyRepo(reserved=3))
+    assert IdempotencyService(PostgresIdempotencyStore(uow)).begin(_SCOPE) == Reservation(_SCOPE, 3)
+    assert uow.commits == 1
+
+
+def test_begin_replays_completed_key():
+    body = {"id": 1}
+    uow = _FakeUow(_FakeIdempotencyRepo(state=_state(status=201, body=body)))
+    uow.idempotency.current.created_at = datetime.utcnow()
+    assert IdempotencyService(PostgresIdempotencyStore(uow)).begin(_SCOPE) == StoredResponse(
+        status=201, body=body
+    )
+    assert uow.commits == 0
+
+
+def test_begin_gives_up_on_key_in_progress(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.0)
+    uow = _FakeUow(_FakeIdempotencyRepo(state=_state()))
+    uow.idempotency.current.created_at = datetime.utcnow()
+    with pytest.raises(IdempotencyKeyInProgress) as exc:
+        IdempotencyService(PostgresIdempotencyStore(uow)).begin(_SCOPE)
+    assert exc.value.retry_after >= 1
+    assert uow.commits == 0 and uow.rollbacks == 1
+
+
+def test_guard_releases_reservation_on_error():
+    uow = _FakeUow(_FakeIdempotencyRepo())
+    service = IdempotencyService(PostgresIdempotencyStore(uow))
+    with pytest.raises(RuntimeError), service.guard(Reservation(_SCOPE, 5)):
+        raise RuntimeError("boom")
+    assert uow.idempotency.released == [5]
+    assert uow.commits == 1
+
+    with service.guard(Reservation(_SCOPE, 6)):
+        pass
+    assert uow.idempotency.released == [5]
@@ -0,0 +1,158 @@
+"""Юнит-тесты Redis-хранилища ключей идемпотентности (fakeredis, без сети)."""
+
+from __future__ import annotations
+
+import zlib
+
+import fakeredis
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyConflict, IdempotencyKeyInProgress
+from app.services.idempotency_service import AsyncIdempotencyService, IdempotencyService
+from app.services.idempotency_store import (
+    AsyncRedisIdempotencyStore,
+    IdempotencyScope,
+    RedisIdempotencyStore,
+    Reservation,
+    StoredResponse,
+    _scope_key,
+)
+from app.services.request_service import RequestService
+
+pytestmark = pytest.mark.unit
+
+_SCOPE = IdempotencyScope(
+    user_id=1, method="POST", path="/api/v1/requests", key="k", request_hash="h"
+)
+_RESPONSE = StoredResponse(status=201, body={"id": 42, "title": "Принтер " * 50})
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def store(client):
+    return RedisIdempotencyStore(client)
+
+
+def test_reserve_then_replay(store, client):
+    reservation = store.reserve(_SCOPE)
+    assert isinstance(reservation, Reservation)
+    assert 0 < client.ttl(_scope_key(_SCOPE)) <= settings.IDEMPOTENCY_LOCK_SECONDS
+
+    # Пока ответа нет — дубль ждёт; другое тело — конфликт.
+    assert store.reserve(_SCOPE) is None
+    with pytest.raises(IdempotencyKeyConflict):
+        store.reserve(IdempotencyScope(1, "POST", "/api/v1/requests", "k", "other"))
+
+    store.complete(reservation, _RESPONSE)
+    assert store.reserve(_SCOPE) == _RESPONSE
+    assert client.ttl(_scope_key(_SCOPE)) > settings.IDEMPOTENCY_LOCK_SECONDS
+
+
+def test_stored_response_is_compressed(store, client):
+    reservation = store.reserve(_SCOPE)
+    store.complete(reservation, _RESPONSE)
+
+    raw = client.get(_scope_key(_SCOPE))
+    assert raw[:32].decode() == reservation.token
+    assert len(raw) < len(str(_RESPONSE.body).encode())
+    assert b'"status":201' in zlib.decompress(raw[33:])
+
+
+def test_lost_reservation_is_not_touched(store, client):
+    stale = store.reserve(_SCOPE)
+    client.delete(_scope_key(_SCOPE))  # бронь истекла
+    fresh = store.reserve(_SCOPE)
+    assert isinstance(fresh, Reservation)
+
+    store.complete(stale, _RESPONSE)
+    store.release(stale)
+    assert store.reserve(_SCOPE) is None  # бронь fresh на месте, без ответа
+
+    store.release(fresh)
+    assert isinstance(store.reserve(_SCOPE), Reservation)
+
+
+def _scope(key: str, request_hash: str = "b") -> IdempotencyScope:
+    return IdempotencyScope(1, "POST", "/api/v1/requests", key, request_hash)
+
+
+def test_batch_reserves_keys_before_execution(store, client):
+    pending = store.reserve(_SCOPE)
+    claims = store.reserve_many([_scope("k"), _scope("k2"), _scope("k3")])
+
+    # Ключ, занятый одиночным запросом, пачка не выигрывает и не перетирает.
+    assert claims["k"].token == pending.token and claims["k"].response_status is None
+    assert isinstance(claims["k2"], Reservation) and isinstance(claims["k3"], Reservation)
+    # Конкурентная пачка с теми же ключами не получает ни одной брони.
+    assert not any(isinstance(c, Reservation) for c in store.reserve_many([_scope("k2")]).values())
+
+    store.complete_many([(claims["k2"], StoredResponse(201, {"id": 2}))])
+    store.release_many([claims["k3"]])
+
+    again = store.reserve_many([_scope("k2"), _scope("k3")])
+    assert again["k2"].response_body == {"id": 2}
+    assert isinstance(again["k3"], Reservation)
+    assert client.ttl(_scope_key(_scope("k2"))) > settings.IDEMPOTENCY_LOCK_SECONDS
+
+
+def test_service_gives_up_on_pending_key(store, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.0)
+    service = IdempotencyService(store)
+    assert isinstance(service.begin(_SCOPE), Reservation)
+    with pytest.raises(IdempotencyKeyInProgress):
+        service.begin(_SCOPE)
+
+
+class _OrderedUow:
+    def __init__(self, calls: list[str]):
+        self.calls = calls
+
+    def commit(self) -> None:
+        self.calls.append("commit")
+
+
+@pytest.mark.parametrize(
+    ("transactional", "order"), [(True, ["save", "commit"]), (False, ["commit", "save"])]
+)
+def test_request_service_saves_keys_around_commit(transactional, order, store):
+    calls: list[str] = []
+    store.transactional = transactional
+    service = RequestService(_OrderedUow(calls), store)
+    service._commit(lambda: calls.append("save"))
+    assert calls == order
+
+
+@pytest.mark.asyncio
+async def test_async_store_roundtrip():
+    client = fakeredis.FakeAsyncRedis()
+    store = AsyncRedisIdempotencyStore(client)
+    service = AsyncIdempotencyService(store)
+
+    reservation = await service.begin(_SCOPE)
+    assert isinstance(reservation, Reservation)
+    await store.complete(reservation, _RESPONSE)
+    assert await service.begin(_SCOPE) == _RESPONSE
+
+    with pytest.raises(RuntimeError):
+        async with service.guard(reservation):
+            raise RuntimeError("boom")
+    # Ответ уже записан: сбой после commit не снимает ключ, повтор — replay.
+    assert await store.reserve(_SCOPE) == _RESPONSE
+
+    other = IdempotencyScope(1, "POST", "/api/v1/requests", "k2", "h")
+    pending = await service.begin(other)
+    with pytest.raises(RuntimeError):
+        async with service.guard(pending):
+            raise RuntimeError("boom")
+    assert isinstance(await store.reserve(other), Reservation)
+    claims = await store.reserve_many([_scope("b1"), _scope("b2")])
+    await store.complete_many([(claims["b1"], _RESPONSE)])
+    await store.release_many([claims["b2"]])
+    again = await store.reserve_many([_scope("b1"), _scope("b2")])
+    assert again["b1"].response_status == 201 and isinstance(again["b2"], Reservation)
+    await client.aclose(close_connection_pool=True)
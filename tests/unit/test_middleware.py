@@ -0,0 +1,78 @@
+"""Юнит-тесты ASGI-middleware: X-Request-ID, security-заголовки, access-лог."""
+
+from __future__ import annotations
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core import middleware
+from app.core.logging import request_id_ctx
+from app.core.middleware import (
+    REQUEST_ID_HEADER,
+    RequestContextMiddleware,
+    SecurityHeadersMiddleware,
+)
+
+pytestmark = pytest.mark.unit
+
+
+async def _echo_request_id(_: Request) -> PlainTextResponse:
+    return PlainTextResponse(request_id_ctx.get() or "")
+
+
+async def _framed(_: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+
+async def _boom(_: Request) -> PlainTextResponse:
+    raise RuntimeError("boom")
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/rid", _echo_request_id),
+            Route("/framed", _framed),
+            Route("/boom", _boom),
+        ]
+    )
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_client_request_id_is_propagated(client):
+    response = client.get("/rid", headers={REQUEST_ID_HEADER: "trace-123"})
+    assert response.headers[REQUEST_ID_HEADER] == "trace-123"
+    assert response.text == "trace-123"
+
+
+def test_request_id_generated_when_missing_or_invalid(client):
+    generated = client.get("/rid").headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32
+    too_long = client.get("/rid", headers={REQUEST_ID_HEADER: "x" * 500})
+    assert too_long.headers[REQUEST_ID_HEADER] != "x" * 500
+
+
+def test_security_headers_do_not_override_handler(client):
+    response = client.get("/framed")
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "SAMEORIGIN"
+    assert "Strict-Transport-Security" not in response.headers
+
+
+def test_access_log_records_status(client, monkeypatch):
+    events: list[dict] = []
+    monkeypatch.setattr(middleware._log, "info", lambda event, **kw: events.append(kw))
+
+    client.get("/rid?x=1")
+    client.get("/boom")
+
+    assert [(e["path"], e["status_code"]) for e in events] == [("/rid", 200), ("/boom", 500)]
+    assert events[0]["query"] == "x=1"
+    assert events[0]["method"] == "GET"
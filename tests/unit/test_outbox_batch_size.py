@@ -0,0 +1,72 @@
+"""Юнит-тесты адаптивного размера пачки и backoff ретраев outbox."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.workers.outbox import AdaptiveBatchSize, retry_delay
+
+pytestmark = pytest.mark.unit
+
+
+def _sizer(**kwargs) -> AdaptiveBatchSize:
+    params = {"minimum": 10, "maximum": 100, "target_seconds": 0.5}
+    params.update(kwargs)
+    return AdaptiveBatchSize(**params)
+
+
+def test_starts_at_minimum():
+    assert _sizer().current == 10
+
+
+def test_grows_on_full_fast_batches_up_to_maximum():
+    sizer = _sizer()
+    sizes = []
+    for _ in range(10):
+        sizer.observe(sizer.current, 0.1)
+        sizes.append(sizer.current)
+    assert sizes == sorted(sizes)
+    assert sizes[0] == 15
+    assert sizer.current == 100
+
+
+def test_partial_batch_keeps_size():
+    sizer = _sizer()
+    sizer.observe(10, 0.1)
+    sizer.observe(3, 0.1)
+    assert sizer.current == 15
+
+
+def test_slow_batch_halves_size_but_not_below_minimum():
+    sizer = _sizer()
+    for _ in range(10):
+        sizer.observe(sizer.current, 0.1)
+    sizer.observe(100, 2.0)
+    assert sizer.current == 50
+    for _ in range(10):
+        sizer.observe(sizer.current, 2.0)
+    assert sizer.current == 10
+
+
+def test_small_growth_factor_still_grows():
+    sizer = _sizer(minimum=1, growth=1.1)
+    sizer.observe(1, 0.01)
+    assert sizer.current == 2
+
+
+def test_invalid_bounds_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveBatchSize(minimum=0, maximum=10, target_seconds=1.0)
+    with pytest.raises(ValueError):
+        AdaptiveBatchSize(minimum=20, maximum=10, target_seconds=1.0)
+
+
+def test_retry_delay_grows_exponentially_within_jitter_bounds():
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (5, 16.0)]:
+        assert retry_delay(attempt, base=1.0, cap=100.0, rand=lambda: 0.0) == ceiling / 2
+        assert retry_delay(attempt, base=1.0, cap=100.0, rand=lambda: 1.0) == ceiling
+
+
+def test_retry_delay_capped():
+    assert retry_delay(50, base=1.0, cap=60.0, rand=lambda: 1.0) == 60.0
+    assert retry_delay(10_000, base=1.0, cap=60.0, rand=lambda: 0.0) == 30.0
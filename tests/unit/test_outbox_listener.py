@@ -0,0 +1,62 @@
+"""Юнит-тесты цикла drain по NOTIFY (без БД)."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.workers.outbox_listener import drain_on_wake
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.asyncio
+async def test_notifications_during_drain_coalesce_into_one_rerun():
+    wake = asyncio.Event()
+    calls = 0
+    release = asyncio.Event()
+
+    async def drain() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await release.wait()
+
+    task = asyncio.create_task(drain_on_wake(wake, drain))
+    wake.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    # Пока идёт первый drain, приходит пачка уведомлений.
+    for _ in range(5):
+        wake.set()
+    release.set()
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_drain_does_not_stop_loop():
+    wake = asyncio.Event()
+    calls = 0
+
+    async def drain() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("db hiccup")
+
+    task = asyncio.create_task(drain_on_wake(wake, drain))
+    wake.set()
+    await asyncio.sleep(0.01)
+    wake.set()
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert calls == 2
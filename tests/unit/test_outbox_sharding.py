@@ -0,0 +1,179 @@
+"""Юнит-тесты параллельной публикации outbox с порядком внутри заявки."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.outbox import OutboxEvent
+from app.workers.outbox import publish_sharded, shard_for
+
+pytestmark = pytest.mark.unit
+
+
+def _event(event_id: int, request_id: int) -> OutboxEvent:
+    return OutboxEvent(
+        id=event_id,
+        event_type="request.status_changed",
+        payload={"request_id": request_id},
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+class _SlowSink:
+    """Fake sink: пишет порядок публикации и держит паузу на каждой пачке."""
+
+    name = "fake"
+
+    def __init__(self, delay: float, fail_ids: set[int] | None = None) -> None:
+        self.delay = delay
+        self.fail_ids = fail_ids or set()
+        self.published: list[tuple[int, int]] = []
+        self.batches: list[list[int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def publish(self, events) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_ids & {e.id for e in events}:
+                raise RuntimeError("sink down")
+            self.batches.append([e.id for e in events])
+            self.published.extend((e.payload.get("request_id"), e.id) for e in events)
+        finally:
+            self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        return None
+
+
+def test_shard_is_stable_and_in_range():
+    event = _event(1, request_id=42)
+    assert shard_for(event, 8) == shard_for(_event(99, request_id=42), 8)
+    assert 0 <= shard_for(event, 8) < 8
+
+
+def test_event_without_request_id_is_sharded_by_event_id():
+    event = OutboxEvent(id=5, event_type="x", payload={}, created_at=datetime(2024, 1, 1))
+    assert 0 <= shard_for(event, 4) < 4
+
+
+@pytest.mark.asyncio
+async def test_order_preserved_per_request():
+    events = [_event(i, request_id=i % 5) for i in range(50)]
+    sink = _SlowSink(delay=0.001)
+    await publish_sharded(events, sink, shards=4, batch_size=3)
+
+    assert sorted(e for _, e in sink.published) == list(range(50))
+    for request_id in range(5):
+        ids = [e for r, e in sink.published if r == request_id]
+        assert ids == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_requests_publish_in_parallel():
+    events = [_event(i, request_id=i) for i in range(16)]
+    sink = _SlowSink(delay=0.05)
+    started = time.perf_counter()
+    await publish_sharded(events, sink, shards=16, batch_size=10)
+    elapsed = time.perf_counter() - started
+
+    assert sink.max_in_flight > 1
+    # последовательно было бы 16 × 50 мс = 0.8 с
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_single_publisher_is_sequential():
+    events = [_event(i, request_id=i) for i in range(5)]
+    sink = _SlowSink(delay=0.001)
+    await publish_sharded(events, sink, shards=1, batch_size=2)
+    assert sink.max_in_flight == 1
+    assert [e for _, e in sink.published] == list(range(5))
+    assert sink.batches == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_failure_is_isolated_and_holds_later_events_of_same_request():
+    sink = _SlowSink(delay=0, fail_ids={2})
+    events = [_event(1, request_id=1), _event(2, request_id=2), _event(3, request_id=2)]
+    outcome = await publish_sharded(events, sink, shards=2, batch_size=1)
+
+    assert [e.id for e in outcome.published] == [1]
+    assert [(e.id, err) for e, err in outcome.failed] == [(2, "RuntimeError: sink down")]
+    assert [e.id for e in outcome.held] == [3]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_first_event_per_request_and_holds_rest():
+    sink = _SlowSink(delay=0, fail_ids={2})
+    events = [_event(1, request_id=7), _event(2, request_id=8), _event(3, request_id=7)]
+    outcome = await publish_sharded(events, sink, shards=1, batch_size=10)
+
+    assert outcome.published == []
+    assert sorted(e.id for e, _ in outcome.failed) == [1, 2]
+    assert [e.id for e in outcome.held] == [3]
+
+
+@pytest.mark.asyncio
+async def test_events_without_request_id_are_not_held():
+    sink = _SlowSink(delay=0, fail_ids={1})
+    events = [
+        OutboxEvent(id=i, event_type="x", payload={}, created_at=datetime(2024, 1, 1))
+        for i in (1, 2)
+    ]
+    outcome = await publish_sharded(events, sink, shards=1, batch_size=1)
+    assert [e.id for e in outcome.published] == [2]
+    assert outcome.held == []
+
+
+def test_shard_claim_uses_non_blocking_xact_locks():
+    from sqlalchemy.dialects import postgresql
+
+    from app.repositories.sqlalchemy import _outbox_claim_shards
+
+    sql = str(
+        _outbox_claim_shards(16).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    # try-вариант и xact-lock: занятый шард пропускается, lock живёт до commit.
+    assert "pg_try_advisory_xact_lock" in sql
+    assert "generate_series(0, 15)" in sql
+
+
+class _CapturingSession:
+    """Fake Session: запоминает statement и отдаёт заранее заданные строки."""
+
+    def __init__(self, rows: list[OutboxEvent]) -> None:
+        self.rows = rows
+        self.statements: list = []
+
+    def scalars(self, stmt):
+        self.statements.append(stmt)
+        return self
+
+    def all(self) -> list[OutboxEvent]:
+        return self.rows
+
+
+def test_fetch_pending_breaks_created_at_ties_by_id():
+    from sqlalchemy.dialects import postgresql
+
+    from app.repositories.sqlalchemy import SqlAlchemyOutboxRepository
+
+    # Два события одной заявки в один и тот же момент: без id в ORDER BY
+    # Postgres вправе отдать их в любом порядке, и второе обгонит первое.
+    same_moment = [_event(1, request_id=7), _event(2, request_id=7)]
+    session = _CapturingSession(same_moment)
+
+    batch = SqlAlchemyOutboxRepository(session).fetch_pending(limit=10)
+
+    assert [e.id for e in batch] == [1, 2]
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ORDER BY outbox_events.created_at ASC, outbox_events.id ASC" in sql
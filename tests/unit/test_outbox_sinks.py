@@ -0,0 +1,154 @@
+"""WebhookSink против локального stub HTTP-сервера."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.models.outbox import OutboxEvent
+from app.workers.sinks import WebhookSink
+
+pytestmark = pytest.mark.unit
+
+
+class _Stub:
+    """Состояние stub-сервера: что пришло и как отвечать."""
+
+    def __init__(self) -> None:
+        self.bodies: list[dict] = []
+        self.status = 200
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client_ports: set[int] = set()
+        self.lock = threading.Lock()
+
+
+@pytest.fixture()
+def stub() -> Iterator[tuple[_Stub, str]]:
+    state = _Stub()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_POST(self) -> None:
+            with state.lock:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                state.client_ports.add(self.client_address[1])
+            try:
+                length = int(self.headers["Content-Length"])
+                body = json.loads(self.rfile.read(length))
+                time.sleep(state.delay)
+                with state.lock:
+                    state.bodies.append(body)
+                self.send_response(state.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def log_message(self, *args) -> None:
+            return None
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield state, f"http://127.0.0.1:{server.server_address[1]}/hooks/outbox"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _events(*ids: int) -> list[OutboxEvent]:
+    return [
+        OutboxEvent(
+            id=i,
+            event_type="request.created",
+            payload={"request_id": i},
+            created_at=datetime(2026, 10, 18, 12, 0, 0),
+        )
+        for i in ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_posts_whole_batch_in_one_request(stub):
+    state, url = stub
+    sink = WebhookSink(url, timeout_seconds=2, concurrency=2)
+    try:
+        await sink.publish(_events(1, 2, 3))
+    finally:
+        await sink.aclose()
+
+    assert len(state.bodies) == 1
+    assert [e["id"] for e in state.bodies[0]["events"]] == [1, 2, 3]
+    assert state.bodies[0]["events"][0] == {
+        "id": 1,
+        "type": "request.created",
+        "created_at": "2026-10-18T12:00:00",
+        "payload": {"request_id": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(stub):
+    state, url = stub
+    sink = WebhookSink(url, timeout_seconds=2, concurrency=1)
+    try:
+        for i in range(5):
+            await sink.publish(_events(i))
+    finally:
+        await sink.aclose()
+
+    assert len(state.bodies) == 5
+    assert len(state.client_ports) == 1
+
+
+@pytest.mark.asyncio
+async def test_non_2xx_raises(stub):
+    state, url = stub
+    state.status = 503
+    sink = WebhookSink(url, timeout_seconds=2, concurrency=1)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await sink.publish(_events(1))
+    finally:
+        await sink.aclose()
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises(stub):
+    state, url = stub
+    state.delay = 0.5
+    sink = WebhookSink(url, timeout_seconds=0.1, concurrency=1)
+    try:
+        with pytest.raises(httpx.TimeoutException):
+            await sink.publish(_events(1))
+    finally:
+        await sink.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited(stub):
+    state, url = stub
+    state.delay = 0.05
+    sink = WebhookSink(url, timeout_seconds=2, concurrency=2)
+    try:
+        await asyncio.gather(*(sink.publish(_events(i)) for i in range(6)))
+    finally:
+        await sink.aclose()
+
+    assert len(state.bodies) == 6
+    assert state.max_in_flight == 2
@@ -0,0 +1,106 @@
+"""Юнит-тесты pagination envelope, keyset-курсоров и страниц истории."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.exceptions import InvalidCursor
+from app.models.request_log import RequestLog
+from app.repositories.sqlalchemy import _request_history
+from app.schemas.common import Page, TotalMode, decode_cursor, encode_cursor
+from app.services.request_service import _history_page
+
+pytestmark = pytest.mark.unit
+
+
+def test_cursor_roundtrip_keeps_microseconds():
+    ts = datetime(2026, 10, 18, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+
+
+def test_cursor_is_urlsafe_without_padding():
+    cursor = encode_cursor(datetime(2026, 1, 1), 1)
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("garbage", ["", "!!!", "bm90LWEtY3Vyc29y", "MjAyNi0wMS0wMSxhYmM"])
+def test_garbage_cursor_rejected(garbage: str):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(garbage)
+
+
+@pytest.mark.parametrize("item_id", [0, -1, 2**31, 10**30])
+def test_cursor_id_outside_int4_rejected(item_id: int):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(datetime(2026, 1, 1), item_id))
+    assert decode_cursor(encode_cursor(datetime(2026, 1, 1), 2**31 - 1))[1] == 2**31 - 1
+
+
+def test_page_of_derives_has_next_from_total():
+    page = Page[int].of([1, 2], total=5, limit=2, offset=0)
+    assert page.has_next is True
+    assert page.next_cursor is None
+    last = Page[int].of([5], total=5, limit=2, offset=4)
+    assert last.has_next is False
+
+
+def test_page_of_accepts_explicit_has_next_and_cursor():
+    page = Page[int].of([1], total=1, limit=1, offset=0, has_next=True, next_cursor="abc")
+    assert page.has_next is True
+    assert page.next_cursor == "abc"
+
+
+def test_page_without_total_relies_on_explicit_has_next():
+    page = Page[int].of(
+        [1, 2], total=None, limit=2, offset=0, has_next=True, total_mode=TotalMode.NONE
+    )
+    assert page.total is None
+    assert page.has_next is True
+    assert page.total_mode is TotalMode.NONE
+
+
+def test_estimated_total_never_contradicts_visible_page():
+    # Планировщик «думает», что строк 3, а на странице уже 4 и есть следующая.
+    page = Page[int].of(
+        [1, 2, 3, 4], total=3, limit=4, offset=0, has_next=True, total_mode=TotalMode.ESTIMATE
+    )
+    assert page.total == 5
+
+
+def test_exact_total_is_not_adjusted():
+    page = Page[int].of([1], total=1, limit=1, offset=0, has_next=False)
+    assert page.total == 1
+    assert page.total_mode is TotalMode.EXACT
+
+
+def _log(log_id: int, ts: datetime) -> RequestLog:
+    return RequestLog(
+        id=log_id, request_id=1, user_id=1, action="created", source="API", timestamp=ts
+    )
+
+
+def test_history_page_cursor_points_at_last_item():
+    ts = datetime(2026, 10, 18, 12, 0)
+    page = _history_page([_log(1, ts), _log(2, ts), _log(3, ts)], limit=2)
+    assert [item.id for item in page.items] == [1, 2]
+    assert page.has_next is True and page.total is None
+    assert decode_cursor(page.next_cursor) == (ts, 2)
+
+    assert _history_page([_log(3, ts)], limit=2).next_cursor is None
+
+
+def test_history_query_prunes_partitions_by_timestamp():
+    since = datetime(2026, 9, 1)
+    sql = str(
+        _request_history(1, since=since, limit=51, after=(datetime(2026, 10, 1), 7)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    # Простые условия по ключу партиционирования — помимо сравнения кортежей.
+    assert sql.count("request_logs.timestamp >=") == 2
+    assert "(request_logs.timestamp, request_logs.id) >" in sql
+    assert "ORDER BY request_logs.timestamp ASC, request_logs.id ASC" in sql
@@ -0,0 +1,71 @@
+"""Юнит-тесты расчёта партиций по времени."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from itertools import pairwise
+
+import pytest
+
+from app.database.partitioning import (
+    PartitionInterval,
+    next_period,
+    parse_upper_bound,
+    period_start,
+    planned_partitions,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def test_daily_plan_covers_today_and_ahead():
+    plan = planned_partitions("outbox_events", PartitionInterval.DAY, date(2026, 10, 18), ahead=2)
+    assert [(p.name, p.start, p.end) for p in plan] == [
+        ("outbox_events_p20261018", date(2026, 10, 18), date(2026, 10, 19)),
+        ("outbox_events_p20261019", date(2026, 10, 19), date(2026, 10, 20)),
+        ("outbox_events_p20261020", date(2026, 10, 20), date(2026, 10, 21)),
+    ]
+
+
+def test_weekly_periods_start_on_monday():
+    # 2026-10-18 — воскресенье
+    assert period_start(date(2026, 10, 18), PartitionInterval.WEEK) == date(2026, 10, 12)
+    assert next_period(date(2026, 10, 12), PartitionInterval.WEEK) == date(2026, 10, 19)
+
+
+@pytest.mark.parametrize(
+    ("start", "expected"),
+    [
+        (date(2026, 1, 1), date(2026, 2, 1)),
+        (date(2026, 2, 1), date(2026, 3, 1)),
+        (date(2026, 12, 1), date(2027, 1, 1)),
+    ],
+)
+def test_monthly_periods_roll_over(start, expected):
+    assert next_period(start, PartitionInterval.MONTH) == expected
+
+
+def test_monthly_plan_is_contiguous():
+    plan = planned_partitions("request_logs", PartitionInterval.MONTH, date(2026, 11, 30), ahead=2)
+    assert [p.name for p in plan] == [
+        "request_logs_p20261101",
+        "request_logs_p20261201",
+        "request_logs_p20270101",
+    ]
+    assert all(a.end == b.start for a, b in pairwise(plan))
+
+
+@pytest.mark.parametrize(
+    ("bound", "expected"),
+    [
+        (
+            "FOR VALUES FROM ('2026-10-18 00:00:00') TO ('2026-10-19 00:00:00')",
+            datetime(2026, 10, 19),
+        ),
+        ("FOR VALUES FROM (MINVALUE) TO ('2026-10-19 00:00:00')", datetime(2026, 10, 19)),
+        ("FOR VALUES FROM ('2026-10-18 00:00:00') TO (MAXVALUE)", None),
+        ("DEFAULT", None),
+    ],
+)
+def test_parse_upper_bound(bound, expected):
+    assert parse_upper_bound(bound) == expected
@@ -0,0 +1,51 @@
+"""Юнит-тесты проекции списков заявок: SELECT колонок и параметр fields."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.core.exceptions import InvalidFields
+from app.repositories.sqlalchemy import _request_rows
+from app.routers.requests import _list_fields
+
+pytestmark = pytest.mark.unit
+
+
+def _selected(fields: frozenset[str] | None) -> list[str]:
+    return [c.key for c in _request_rows(fields).selected_columns]
+
+
+def test_full_projection_selects_read_model_columns_only():
+    assert _selected(None) == [
+        "id",
+        "public_id",
+        "title",
+        "description",
+        "status",
+        "created_by_user_id",
+        "assigned_to_user_id",
+        "created_at",
+        "updated_at",
+    ]
+
+
+def test_partial_projection_keeps_page_keys():
+    # id/created_at — курсор, updated_at — ETag: читаются всегда.
+    assert _selected(frozenset({"title", "status"})) == [
+        "id",
+        "title",
+        "status",
+        "created_at",
+        "updated_at",
+    ]
+
+
+def test_list_fields_parsing():
+    assert _list_fields(None) is None
+    assert _list_fields(" id, title ,status,") == frozenset({"id", "title", "status"})
+
+
+@pytest.mark.parametrize("raw", ["", " , ", "id,secret"])
+def test_list_fields_rejects_unknown_or_empty(raw: str):
+    with pytest.raises(InvalidFields):
+        _list_fields(raw)
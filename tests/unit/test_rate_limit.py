@@ -0,0 +1,122 @@
+"""Юнит-тесты ключа rate limit, веса операций и квот ролей."""
+
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.core import rate_limit
+from app.core.auth_cache import VerifiedKeyCache
+from app.core.config import settings
+from app.core.enums import UserRole
+from app.core.exceptions import QuotaExceeded
+
+pytestmark = pytest.mark.unit
+
+
+def _request(
+    operation_id: str | None = None,
+    *,
+    query: bytes = b"",
+    body: bytes = b"",
+    headers: dict[str, str] | None = None,
+) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/requests",
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+        "route": SimpleNamespace(operation_id=operation_id),
+    }
+    return Request(scope, receive)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiter():
+    rate_limit.limiter.reset()
+    yield
+    rate_limit.limiter.reset()
+
+
+def test_client_key_prefers_verified_api_key(monkeypatch):
+    cache = VerifiedKeyCache(max_size=10, ttl_seconds=60)
+    cache.put("known", user_id=7, api_key_hash="h")
+    monkeypatch.setattr(rate_limit, "verified_key_cache", cache)
+
+    assert rate_limit._client_key(_request(headers={"X-API-Key": "known"})) == "user:7"
+    # Непроверенный ключ не даёт своего счётчика: иначе перебор ключей обходил бы лимит.
+    assert rate_limit._client_key(_request(headers={"X-API-Key": "random"})) == "10.0.0.1"
+    forwarded = _request(headers={"X-Forwarded-For": "203.0.113.5, 10.0.0.1"})
+    assert rate_limit._client_key(forwarded) == "203.0.113.5"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("operation_id", "query", "body", "cost"),
+    [
+        ("requests_list", b"", b"", 5),
+        ("requests_list_queue", b"total_mode=none", b"", 2),
+        ("requests_get", b"", b"", 1),
+        ("requests_create_batch", b"", b'{"items": [{}, {}, {}]}', 3),
+        ("requests_update_status_batch", b"", b"not json", 1),
+        (None, b"", b"", 1),
+    ],
+)
+async def test_operation_cost(operation_id, query, body, cost):
+    assert await rate_limit._operation_cost(_request(operation_id, query=query, body=body)) == cost
+
+
+def test_quota_is_per_user_and_weighted(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_QUOTA_EMPLOYEE", "10/minute")
+    employee = SimpleNamespace(id=1, role=UserRole.EMPLOYEE)
+    neighbour = SimpleNamespace(id=2, role=UserRole.EMPLOYEE)
+
+    rate_limit._charge(employee, 5)
+    rate_limit._charge(employee, 5)
+    with pytest.raises(QuotaExceeded) as exc_info:
+        rate_limit._charge(employee, 1)
+    assert 0 < exc_info.value.retry_after <= 60
+    assert exc_info.value.details == {"quota": "10 per 1 minute", "cost": 1}
+
+    rate_limit._charge(neighbour, 5)  # у соседа по NAT своя квота
+
+
+def test_role_quotas_and_oversized_batch(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_QUOTA_EMPLOYEE", "10/minute")
+    monkeypatch.setattr(settings, "RATE_LIMIT_QUOTA_AGENT", "100/minute")
+
+    # Пачка дороже квоты списывает квоту целиком, а не отклоняется навсегда.
+    employee = SimpleNamespace(id=3, role=UserRole.EMPLOYEE)
+    rate_limit._charge(employee, 500)
+    with pytest.raises(QuotaExceeded):
+        rate_limit._charge(employee, 1)
+
+    for _ in range(10):
+        rate_limit._charge(SimpleNamespace(id=4, role=UserRole.AGENT), 10)
+    with pytest.raises(QuotaExceeded):
+        rate_limit._charge(SimpleNamespace(id=4, role=UserRole.AGENT), 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dependency", [rate_limit.charge_quota, rate_limit.charge_quota_async])
+async def test_charge_runs_off_event_loop(monkeypatch, dependency):
+    calls: list[tuple[int, int]] = []
+    monkeypatch.setattr(
+        rate_limit, "_charge", lambda user, cost: calls.append((threading.get_ident(), cost))
+    )
+
+    await dependency(_request("requests_list"), SimpleNamespace(id=5, role=UserRole.AGENT))
+
+    # Синхронный hit() storage может ждать Redis — только не в потоке event loop.
+    assert len(calls) == 1
+    thread_id, cost = calls[0]
+    assert cost == 5
+    assert thread_id != threading.get_ident()
@@ -0,0 +1,181 @@
+"""Юнит-тесты BatchedRedisStorage (fakeredis, два «процесса» на одном сервере)."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+from limits import RateLimitItemPerMinute
+from limits.strategies import FixedWindowRateLimiter
+
+from app.core.rate_limit_storage import _PREFIX, BatchedRedisStorage
+
+pytestmark = pytest.mark.unit
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+def _storage(server, clock, batch: int = 5) -> BatchedRedisStorage:
+    return BatchedRedisStorage(
+        "batched+redis://localhost:6379/0",
+        sync_batch=batch,
+        sync_interval=1.0,
+        client=fakeredis.FakeRedis(server=server),
+        clock=clock,
+    )
+
+
+def _global(server, key: str) -> int:
+    return int(fakeredis.FakeRedis(server=server).get(_PREFIX + key) or 0)
+
+
+def test_hits_are_synced_in_batches(server, clock):
+    storage = _storage(server, clock)
+
+    assert storage.incr("k", 60) == 1  # новое окно — сразу в Redis
+    for expected in range(2, 6):
+        assert storage.incr("k", 60) == expected
+    assert _global(server, "k") == 1
+
+    assert storage.incr("k", 60) == 6  # pending дорос до пачки
+    assert _global(server, "k") == 6
+    assert 55 < storage.get_expiry("k") - time.time() <= 60  # окно по TTL ключа в Redis
+
+
+def test_processes_see_each_other_after_sync(server, clock):
+    first, second = _storage(server, clock), _storage(server, clock)
+    for _ in range(6):
+        first.incr("k", 60)
+
+    # Второй процесс при открытии окна забирает глобальный счётчик.
+    assert second.incr("k", 60) == 7
+
+    # Интервал вышел — следующий хит синхронизируется без полной пачки.
+    first.incr("k", 60)
+    assert _global(server, "k") == 7
+    clock.now += 1.5
+    assert first.incr("k", 60) == 9
+
+
+def test_limiter_holds_limit_across_processes(server, clock):
+    item = RateLimitItemPerMinute(20)
+    limiters = [FixedWindowRateLimiter(_storage(server, clock, batch=2)) for _ in range(4)]
+
+    allowed = sum(limiters[i % 4].hit(item, "ip") for i in range(200))
+    # Превышение не больше чем (процессы) × пачка; без Redis было бы 4 × 20.
+    assert 20 <= allowed <= 20 + 4 * 2
+
+
+def test_new_window_starts_from_zero(server, clock):
+    storage = _storage(server, clock)
+    for _ in range(6):
+        storage.incr("k", 60)
+
+    clock.now += 61
+    fakeredis.FakeRedis(server=server).delete(_PREFIX + "k")  # TTL окна истёк
+    assert storage.get("k") == 0
+    assert storage.incr("k", 60) == 1
+
+
+def test_redis_failure_falls_back_to_local_counting(server, clock):
+    storage = _storage(server, clock)
+    storage.incr("k", 60)
+
+    server.connected = False
+    for _ in range(10):
+        storage.incr("k", 60)
+    assert storage.get("k") == 11
+    assert storage.check() is False
+
+    server.connected = True
+    clock.now += 1.5
+    # Накопленное за время сбоя уходит следующей синхронизацией.
+    assert storage.incr("k", 60) == 12
+    assert _global(server, "k") == 12
+
+
+def test_reset_drops_only_own_keys(server, clock):
+    storage = _storage(server, clock)
+    other = fakeredis.FakeRedis(server=server)
+    other.set("sf:idem:1", "x")
+    storage.incr("a", 60)
+    storage.incr("b", 60)
+
+    assert storage.reset() == 2
+    assert storage.get("a") == 0
+    assert other.get("sf:idem:1") == b"x"
+
+
+def test_base_exceptions_are_redis_errors(server, clock):
+    assert _storage(server, clock).base_exceptions is redis.RedisError
+
+
+class _SlowRedis:
+    """Клиент, чей sync-скрипт висит, пока тест не отпустит."""
+
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls += 1
+            self.entered.set()
+            self.release.wait(5)
+            return [int(args[0]), 60_000]
+
+        return run
+
+
+def test_sync_does_not_hold_lock_during_io(clock):
+    slow = _SlowRedis()
+    storage = BatchedRedisStorage(
+        "batched+redis://localhost:6379/0", sync_batch=2, client=slow, clock=clock
+    )
+    syncing = threading.Thread(target=storage.incr, args=("k", 60))
+    syncing.start()
+    assert slow.entered.wait(5)
+
+    # Пока идёт синхронизация, остальные хиты считаются локально, без ожидания.
+    assert storage.incr("k", 60) == 2
+    assert storage.incr("k", 60) == 3
+    assert slow.calls == 1
+
+    slow.release.set()
+    syncing.join(5)
+    assert storage.get("k") == 3
+
+
+def test_redis_outage_skips_sync_for_interval(server, clock):
+    storage = _storage(server, clock)
+    server.connected = False
+    storage.incr("a", 60)
+
+    # Новые ключи не ждут таймаута сети, пока не выйдет интервал.
+    calls = []
+    storage._push = lambda *args: calls.append(args)  # type: ignore[method-assign]
+    assert storage.incr("b", 60) == 1
+    assert calls == []
+    clock.now += 1.5
+    storage.incr("c", 60)
+    assert len(calls) == 1
@@ -0,0 +1,78 @@
+"""Юнит-тесты маршрутизации чтений: LSN клиента, read-only UoW, хук after_commit."""
+
+from __future__ import annotations
+
+import pytest
+from starlette.requests import Request
+
+from app.database import replica
+from app.database.replica import LSN_COOKIE, LSN_HEADER, client_lsn, is_read_request
+from app.uow import SqlAlchemyUnitOfWork
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "headers": raw})
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, None),
+        ({LSN_HEADER: "0/16B3748"}, "0/16B3748"),
+        ({"Cookie": f"{LSN_COOKIE}=1A/FF00"}, "1A/FF00"),
+        ({LSN_HEADER: "2/10", "Cookie": f"{LSN_COOKIE}=1/10"}, "2/10"),
+        ({LSN_HEADER: "0/1; DROP"}, None),
+        ({LSN_HEADER: "123456789/0"}, None),
+    ],
+)
+def test_client_lsn(headers: dict[str, str], expected: str | None):
+    assert client_lsn(_request(headers=headers)) == expected
+
+
+def test_only_get_and_head_are_reads():
+    assert is_read_request(_request("GET"))
+    assert is_read_request(_request("HEAD"))
+    assert not is_read_request(_request("POST"))
+    assert not is_read_request(_request("PATCH"))
+
+
+def test_read_only_uow_refuses_commit():
+    session = _FakeSession()
+    with SqlAlchemyUnitOfWork(lambda: session, read_only=True) as uow:
+        with pytest.raises(RuntimeError):
+            uow.commit()
+    assert session.commits == 0
+
+
+def test_after_commit_hook_runs_after_commit():
+    session = _FakeSession()
+    seen: list[int] = []
+    with SqlAlchemyUnitOfWork(
+        lambda: session, after_commit=lambda s: seen.append(s.commits)
+    ) as uow:
+        uow.commit()
+    assert seen == [1]
+
+
+def test_without_replica_reads_use_read_only_primary(monkeypatch):
+    monkeypatch.setattr(replica, "ReplicaSessionLocal", None)
+    monkeypatch.setattr(replica, "replica_engine", None)
+    assert replica.read_session_factory("0/1") is replica.ReadOnlySessionLocal
+    assert replica.lsn_tracker(object()) is None  # type: ignore[arg-type]
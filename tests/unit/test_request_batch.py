@@ -0,0 +1,252 @@
+"""Юнит-тесты разбора пачки POST /requests:batch. Без БД."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.core.enums import RequestStatus, UserRole
+from app.core.exceptions import BatchTooLarge
+from app.core.idempotency import compute_body_hash
+from app.routers.requests import _check_batch_size
+from app.schemas.common import compute_etag
+from app.schemas.request import RequestBatchCreate, RequestBatchItem, RequestBulkStatusItem
+from app.services.idempotency_store import Reservation
+from app.services.request_service import (
+    _batch_keys,
+    _batch_scopes,
+    _complete_batch,
+    _plan_batch,
+    _plan_status_updates,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def _user(uid: int, role: UserRole):
+    return SimpleNamespace(id=uid, role=role)
+
+
+def _plan(items, user, *, assignees=(), claims=None):
+    """Разбор пачки; без claims все ключи считаются выигранными бронями."""
+    keys = _batch_keys(items)
+    scopes = _batch_scopes(items, keys, user)
+    if claims is None:
+        claims = {scope.key: Reservation(scope, index) for index, scope in scopes.items()}
+    return _plan_batch(items, keys, user, assignees=set(assignees), scopes=scopes, claims=claims)
+
+
+def _row(rid: int, item: RequestBatchItem, creator: int):
+    now = datetime(2026, 1, 1)
+    return SimpleNamespace(
+        _mapping={
+            "id": rid,
+            "public_id": uuid4(),
+            "title": item.title,
+            "description": item.description,
+            "status": RequestStatus.NEW,
+            "created_by_user_id": creator,
+            "assigned_to_user_id": item.assignee_id,
+            "created_at": now,
+            "updated_at": now,
+        },
+        id=rid,
+        title=item.title,
+        status=RequestStatus.NEW,
+        created_by_user_id=creator,
+        assigned_to_user_id=item.assignee_id,
+    )
+
+
+def _req(rid: int, *, status=RequestStatus.NEW, created_by=1, assignee=None):
+    now = datetime(2026, 1, 1)
+    return SimpleNamespace(
+        id=rid,
+        public_id=uuid4(),
+        title=f"request {rid}",
+        description=None,
+        status=status,
+        created_by_user_id=created_by,
+        assigned_to_user_id=assignee,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _plan_status(items, user, requests, *, assignees=()):
+    return _plan_status_updates(
+        items,
+        {req.id: req for req in requests},
+        user,
+        assignees=set(assignees),
+        client_ip="10.0.0.1",
+        user_agent="pytest",
+    )
+
+
+def test_item_errors_do_not_fail_batch():
+    items = [
+        RequestBatchItem(title="fine"),
+        RequestBatchItem(title="ghost", assignee_id=99),
+        RequestBatchItem(title="assigned", assignee_id=7),
+    ]
+    plan = _plan(items, _user(1, UserRole.EMPLOYEE), assignees={7})
+
+    assert [entry.index for entry in plan.create] == [0]
+    assert plan.results[1].status == 404
+    assert plan.results[1].error.code == "assignee_not_found"
+    assert plan.results[2].status == 403
+    assert plan.results[2].error.code == "employee_cannot_assign_on_create"
+
+
+def test_stored_key_replays_or_conflicts():
+    item = RequestBatchItem(title="dup", idempotency_key="k1")
+    body = {"id": 5, "public_id": str(uuid4()), "title": "dup", "description": None}
+    body |= {"status": "NEW", "created_by_user_id": 1, "assigned_to_user_id": None}
+    body |= {"created_at": "2026-01-01T00:00:00", "updated_at": "2026-01-01T00:00:00"}
+    same = SimpleNamespace(
+        request_hash=compute_body_hash(item.model_dump(mode="json", exclude={"idempotency_key"})),
+        response_status=201,
+        response_body=body,
+    )
+
+    replay = _plan([item], _user(1, UserRole.AGENT), claims={"k1": same})
+    assert replay.create == []
+    assert replay.results[0].status == 200
+    assert replay.results[0].request.id == 5
+
+    other = SimpleNamespace(request_hash="0" * 64, response_status=201, response_body=body)
+    conflict = _plan([item], _user(1, UserRole.AGENT), claims={"k1": other})
+    assert conflict.results[0].error.code == "idempotency_key_conflict"
+
+    pending = SimpleNamespace(request_hash=same.request_hash, response_status=None)
+    busy = _plan([item], _user(1, UserRole.AGENT), claims={"k1": pending})
+    assert busy.results[0].status == 409
+    assert busy.results[0].error.code == "idempotency_key_in_progress"
+
+    # Бронь сняли между попыткой и чтением — тоже «в работе», без дубля.
+    released = _plan([item], _user(1, UserRole.AGENT), claims={})
+    assert released.create == []
+    assert released.results[0].error.code == "idempotency_key_in_progress"
+
+
+def test_failed_item_gives_its_reservation_back():
+    items = [
+        RequestBatchItem(title="fine", idempotency_key="k1"),
+        RequestBatchItem(title="ghost", assignee_id=99, idempotency_key="k2"),
+    ]
+    plan = _plan(items, _user(1, UserRole.ADMIN))
+
+    assert [entry.reservation.scope.key for entry in plan.create] == ["k1"]
+    assert [reservation.scope.key for reservation in plan.unused] == ["k2"]
+    assert plan.reservations() == [plan.create[0].reservation]
+
+
+def test_key_repeated_inside_batch_conflicts():
+    items = [
+        RequestBatchItem(title="same", idempotency_key="k"),
+        RequestBatchItem(title="same", idempotency_key="k"),
+        RequestBatchItem(title="other", idempotency_key="\x00bad"),
+    ]
+    plan = _plan(items, _user(1, UserRole.AGENT))
+
+    # Невалидный ключ игнорируется, элемент создаётся без идемпотентности.
+    assert [(entry.index, entry.reservation is not None) for entry in plan.create] == [
+        (0, True),
+        (2, False),
+    ]
+    assert plan.results[1].status == 409
+
+
+def test_complete_batch_collects_writes_in_input_order():
+    user = _user(1, UserRole.AGENT)
+    items = [
+        RequestBatchItem(title="first", idempotency_key="k1"),
+        RequestBatchItem(title="bad", assignee_id=42),
+        RequestBatchItem(title="second", assignee_id=7),
+    ]
+    plan = _plan(items, user, assignees={7})
+    rows = [_row(10, items[0], 1), _row(11, items[2], 1)]
+
+    writes = _complete_batch(plan, rows, user)
+    result = plan.result()
+
+    assert [(i.index, i.status) for i in result.items] == [(0, 201), (1, 404), (2, 201)]
+    assert (result.created, result.failed) == (2, 1)
+    assert [log["request_id"] for log in writes.logs] == [10, 11]
+    assert [event["payload"]["request_id"] for event in writes.events] == [10, 11]
+    assert [(r.scope.key, resp.status, resp.body["id"]) for r, resp in writes.idempotency] == [
+        ("k1", 201, 10)
+    ]
+    assert writes.deltas[("all", "")] == 2
+    assert writes.deltas[("queue", "")] == 1
+    assert writes.deltas[("assignee", "7")] == 1
+
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_BATCH_MAX_ITEMS", 2)
+    _check_batch_size(RequestBatchCreate(items=[{"title": "one"}, {"title": "two"}]).items)
+    with pytest.raises(BatchTooLarge):
+        _check_batch_size(RequestBatchCreate(items=[{"title": "one"}] * 3).items)
+
+
+def test_bulk_status_checks_each_item_in_memory():
+    agent = _user(5, UserRole.AGENT)
+    mine = _req(1, status=RequestStatus.IN_PROGRESS, assignee=5)
+    foreign = _req(2, status=RequestStatus.IN_PROGRESS, assignee=6)
+    queued = _req(3)
+    items = [
+        RequestBulkStatusItem(request_id=1, status=RequestStatus.DONE),
+        RequestBulkStatusItem(request_id=2, status=RequestStatus.DONE),
+        RequestBulkStatusItem(request_id=3, status=RequestStatus.IN_PROGRESS, assignee_id=5),
+        RequestBulkStatusItem(request_id=99, status=RequestStatus.DONE),
+        RequestBulkStatusItem(request_id=3, status=RequestStatus.DONE, if_match='"stale"'),
+    ]
+
+    plan = _plan_status(items, agent, [mine, foreign, queued], assignees={5})
+    result = plan.result()
+
+    assert [(i.request_id, i.status) for i in result.items] == [
+        (1, 200),
+        (2, 403),
+        (3, 200),
+        (99, 404),
+        (3, 412),
+    ]
+    assert result.items[1].error.code == "agent_cannot_modify_foreign_request"
+    assert (result.updated, result.failed) == (2, 3)
+    assert mine.status == RequestStatus.DONE and foreign.status == RequestStatus.IN_PROGRESS
+    assert result.items[0].etag == compute_etag(1, mine.updated_at)
+    # Заявка 3: смена статуса + назначение → два лога и два события.
+    assert [log["action"] for log in plan.logs] == [
+        "status_changed",
+        "status_changed",
+        "assignee_changed",
+    ]
+    assert [event["event_type"] for event in plan.events] == [
+        "request.status_changed",
+        "request.assigned",
+        "request.status_changed",
+    ]
+    assert plan.deltas[("queue", "")] == -1
+    assert plan.deltas[("assignee", "5")] == 1
+
+
+def test_bulk_status_applies_repeated_request_in_order():
+    admin = _user(1, UserRole.ADMIN)
+    req = _req(1, assignee=1)
+    items = [
+        RequestBulkStatusItem(request_id=1, status=RequestStatus.IN_PROGRESS),
+        RequestBulkStatusItem(request_id=1, status=RequestStatus.DONE),
+        RequestBulkStatusItem(request_id=1, status=RequestStatus.DONE),
+    ]
+
+    result = _plan_status(items, admin, [req]).result()
+
+    assert [i.status for i in result.items] == [200, 200, 400]
+    assert result.items[2].error.code == "status_is_terminal"
+    assert req.status == RequestStatus.DONE
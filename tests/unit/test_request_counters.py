@@ -0,0 +1,67 @@
+"""Юнит-тесты расчёта дельт денормализованных счётчиков."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.core.enums import RequestStatus
+from app.domain.request_counters import (
+    RequestSnapshot,
+    counter_deltas,
+    counter_key_for_filters,
+    counter_keys,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def _snap(status=RequestStatus.NEW, creator=1, assignee=None) -> RequestSnapshot:
+    return RequestSnapshot(status=status, created_by_user_id=creator, assigned_to_user_id=assignee)
+
+
+def test_new_unassigned_request_is_in_queue():
+    assert counter_keys(_snap()) == {
+        ("all", ""),
+        ("status", "NEW"),
+        ("creator", "1"),
+        ("queue", ""),
+    }
+
+
+def test_create_increments_every_key_once():
+    deltas = counter_deltas(None, _snap(assignee=5))
+    assert deltas == {
+        ("all", ""): 1,
+        ("status", "NEW"): 1,
+        ("creator", "1"): 1,
+        ("assignee", "5"): 1,
+    }
+
+
+def test_take_from_queue_moves_status_and_assignee():
+    before = _snap()
+    after = _snap(status=RequestStatus.IN_PROGRESS, assignee=7)
+    assert counter_deltas(before, after) == {
+        ("status", "NEW"): -1,
+        ("status", "IN_PROGRESS"): 1,
+        ("queue", ""): -1,
+        ("assignee", "7"): 1,
+    }
+
+
+def test_reassign_moves_only_assignee():
+    before = _snap(status=RequestStatus.IN_PROGRESS, assignee=7)
+    after = _snap(status=RequestStatus.IN_PROGRESS, assignee=8)
+    assert counter_deltas(before, after) == {("assignee", "7"): -1, ("assignee", "8"): 1}
+
+
+def test_no_change_no_deltas():
+    assert counter_deltas(_snap(), _snap()) == {}
+
+
+def test_counter_key_for_filters():
+    assert counter_key_for_filters() == ("all", "")
+    assert counter_key_for_filters(status=RequestStatus.DONE) == ("status", "DONE")
+    assert counter_key_for_filters(assigned_to_id=3) == ("assignee", "3")
+    assert counter_key_for_filters(status=RequestStatus.NEW, assigned_to_id=3) is None
+    assert counter_key_for_filters(has_date_filter=True) is None
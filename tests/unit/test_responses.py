@@ -0,0 +1,63 @@
+"""Юнит-тесты классов JSON-ответов: orjson и прямой model_dump_json."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+from app.core import responses
+from app.core.errors import PROBLEM_CONTENT_TYPE, domain_exception_handler
+from app.core.exceptions import DomainError, InvalidCursor
+from app.core.responses import ModelResponse, default_response_class
+from app.schemas.common import Page, TotalMode
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture()
+def json_mode(monkeypatch):
+    def _set(mode: str) -> None:
+        monkeypatch.setattr(responses.settings, "JSON_RESPONSE", mode)
+        default_response_class.cache_clear()
+
+    yield _set
+    default_response_class.cache_clear()
+
+
+@pytest.mark.parametrize(("mode", "expected"), [("orjson", ORJSONResponse), ("std", JSONResponse)])
+def test_default_response_class_follows_setting(json_mode, mode: str, expected: type):
+    json_mode(mode)
+    assert default_response_class() is expected
+
+
+def test_model_response_renders_model_dump_json():
+    page = Page.of(
+        [{"at": datetime(2026, 10, 18, 12, 0)}],
+        total=1,
+        limit=10,
+        offset=0,
+        total_mode=TotalMode.EXACT,
+    )
+    response = ModelResponse(page, headers={"ETag": '"x"'})
+    assert response.body == page.model_dump_json().encode()
+    assert response.media_type == "application/json"
+    assert response.headers["ETag"] == '"x"'
+
+
+def test_problem_details_use_default_class(json_mode):
+    json_mode("orjson")
+    app = FastAPI()
+    app.add_exception_handler(DomainError, domain_exception_handler)
+
+    @app.get("/boom")
+    def boom():
+        raise InvalidCursor()
+
+    response = TestClient(app).get("/boom?x=1")
+    assert response.status_code == 400
+    assert response.headers["content-type"] == PROBLEM_CONTENT_TYPE
+    assert response.json()["instance"] == "/boom?x=1"